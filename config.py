@@ -1,24 +1,88 @@
 """Configuration settings for CaféIndex AI project."""
 
+import os
+
 # SubQuery related settings
-SUBQL_GRAPHQL_ENDPOINT = "http://localhost:3000/graphql"
+SUBQL_GRAPHQL_ENDPOINT = os.environ.get("SUBQL_GRAPHQL_ENDPOINT", "http://localhost:3000/graphql")
 
 # Data storage settings
 DATA_DIR = "data"
 RAW_DATA_PATH = f"{DATA_DIR}/raw_coffee_prices.csv"
 PROCESSED_DATA_PATH = f"{DATA_DIR}/processed_coffee_prices.csv"
 MODEL_PATH = f"{DATA_DIR}/model.pkl"
+FORECAST_TABLE_PATH = f"{DATA_DIR}/forecast_table.json"
+PRICE_STORE_PATH = f"{DATA_DIR}/cafe_index.db"  # Indexed price history served by /prices
+SHARED_STATE_DIR = f"{DATA_DIR}/shared"  # Model and price arrays mapped by every API worker
+ORACLE_LEDGER_PATH = f"{DATA_DIR}/oracle_ledger.db"  # Submission status of every price sent by the oracle
+RECONCILE_CACHE_PATH = f"{DATA_DIR}/oracle_reconcile.db"  # Contract price indices already verified against the ledger
 
 # ML model settings
 TEST_SIZE = 0.2
 RANDOM_STATE = 42
 FEATURE_WINDOW_SIZE = 10  # Number of previous days to use as features
+FORECAST_MAX_DAYS = 90  # Longest horizon precomputed in the forecast table
 
 # API settings
 API_HOST = "0.0.0.0"
 API_PORT = 8000
+BATCH_MAX_SCENARIOS = 1000  # Upper bound on scenarios accepted by /predict/batch
+BATCH_MAX_DAYS_AHEAD = 365  # Longest horizon one /predict/batch scenario may request
+PRICES_DEFAULT_LIMIT = 500  # Rows per /prices page when no limit is given
+PRICES_MAX_LIMIT = 1000  # Largest page /prices returns
+CHART_DEFAULT_POINTS = 500  # Point budget for /prices/ohlc and /prices/downsample
+CHART_MAX_POINTS = 5000  # Largest point budget a chart may request
+STREAM_CHECK_INTERVAL = 2.0  # Seconds between checks for new prices and forecasts to push
+STREAM_HEARTBEAT = 15.0  # Seconds between keep-alive comments on idle /stream connections
+STREAM_FORECAST_DAYS = 7  # Forecast days included in each /stream update
+SHARED_PRICE_WINDOW = 30  # Price records published to the shared state
+SHARED_PRICES_MAX_AGE = 300  # Seconds before workers fetch prices themselves again
 
 # DeepSeek settings
-DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"  # Reemplazar con la URL correcta si es diferente
+DEEPSEEK_API_URL = os.environ.get("DEEPSEEK_API_URL", "https://api.deepseek.com/v1/chat/completions")  # Reemplazar con la URL correcta si es diferente
 DEEPSEEK_API_KEY = ""  # Set this via environment variable
-DEEPSEEK_MODEL = "deepseek-chat"  # Modelo por defecto
\ No newline at end of file
+DEEPSEEK_MODEL = "deepseek-chat"  # Modelo por defecto
+
+# Explanation cache settings
+EXPLANATION_CACHE_PATH = f"{DATA_DIR}/explanation_cache.db"
+EXPLANATION_CACHE_TTL = 6 * 60 * 60  # Seconds an explanation stays valid
+EXPLANATION_CACHE_MAX_ENTRIES = 1000  # Least recently used entries are evicted above this
+
+# Upstream timeout settings
+PREDICT_DEADLINE = 10.0  # Seconds a /predict request may spend in total
+GRAPHQL_TIMEOUT = 5.0  # Seconds per GraphQL request
+DEEPSEEK_TIMEOUT = 8.0  # Seconds per DeepSeek request
+CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failures that open an upstream's circuit
+CIRCUIT_RESET_TIMEOUT = 30.0  # Seconds before a trial call to an open upstream
+
+# Startup budget settings (cold import time per entry point, see startup_benchmark.py)
+STARTUP_BUDGET_MS = {
+    'main': 100,  # CLI before any pipeline step or oracle action runs
+    'price_oracle.test_oracle': 800,  # main.py --oracle test-connection / test-send
+    'price_oracle.run_oracle': 1200,  # main.py --oracle submit, needs pandas
+    'prediction_service.app': 450,  # One API worker, before serving its first request
+}
+
+# Price oracle settings
+ORACLE_SUBMIT_MODE = "sequential"  # 'sequential' waits for each inclusion, 'pipelined' submits back-to-back, 'batched' uses Utility.batch_all
+ORACLE_MAX_PENDING = 64  # Extrinsics submitted but not yet seen in a block
+ORACLE_INCLUSION_TIMEOUT = 120.0  # Seconds without a new inclusion before pending extrinsics count as failed
+ORACLE_POLL_INTERVAL = 2.0  # Seconds between checks for new blocks
+ORACLE_BATCH_ATOMIC = True  # Utility.batch_all (all or nothing) instead of Utility.batch
+ORACLE_BATCH_BLOCK_FRACTION = 0.5  # Share of an extrinsic's max weight and of block length one batch may use
+ORACLE_BATCH_MAX_CALLS = 500  # Upper bound on calls per batch extrinsic
+ORACLE_SIGNING_WORKERS = 0  # Pipelined mode: processes that build and sign extrinsics (0 signs in the main process)
+ORACLE_ENGINE = "sync"  # 'sync' uses PriceOracle.submit_prices_batch, 'async' the AsyncOracleEngine
+ORACLE_MAX_IN_FLIGHT = 16  # Async engine: extrinsics in flight at once, one node connection each
+ORACLE_SUBMISSION_TIMEOUT = 60.0  # Async engine: seconds for one extrinsic to be included
+ORACLE_MAX_RETRIES = 3  # Async engine: retries of a price rejected by the transaction pool
+ORACLE_RETRY_BACKOFF = 1.0  # Async engine: first retry delay in seconds, doubled on each retry
+ORACLE_DAEMON_POLL_INTERVAL = 1.0  # Daemon: seconds between checks for new price data
+ORACLE_DAEMON_HEALTH_INTERVAL = 30.0  # Daemon: seconds between node health checks while idle
+ORACLE_RECONNECT_BACKOFF = 1.0  # Daemon: first reconnect/retry delay in seconds, doubled on each failure
+ORACLE_RECONNECT_MAX_BACKOFF = 60.0  # Daemon: upper bound on the reconnect/retry delay
+ORACLE_PUBLISH_POLICY = "all"  # 'all' publishes every new price, 'deviation' only significant moves and heartbeats
+ORACLE_DEVIATION_BPS = 50  # Move from the last published price, in basis points, that triggers a publication
+ORACLE_HEARTBEAT_SECONDS = 3600  # Publish anyway once a price is this much newer than the last published one
+ORACLE_PRICE_STORAGE = "Prices"  # PriceFeed storage map (id -> timestamp, price) read back by the reconciler
+RECONCILE_PAGE_SIZE = 1000  # Storage keys per state_getKeysPaged page (nodes cap it at 1000)
+RECONCILE_BATCH_SIZE = 500  # eth_call requests per JSON-RPC batch when reading the CafeIndex contract
@@ -7,15 +7,16 @@ fetching coffee price data and storing it in structured formats.
 import subprocess
 import logging
 import os
-import pandas as pd
-import requests
-import sqlite3
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from data_indexing.price_store import PriceStore
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -48,12 +49,19 @@ def start_subquery_node() -> bool:
         return False
 
 
-def fetch_coffee_prices() -> List[Dict[str, Any]]:
+def fetch_coffee_prices(raise_errors: bool = False, timeout: Optional[float] = config.GRAPHQL_TIMEOUT) -> List[Dict[str, Any]]:
     """Fetch coffee price data from the SubQuery GraphQL endpoint.
     
+    Args:
+        raise_errors: Re-raise request and GraphQL errors instead of returning an empty list.
+        timeout: Seconds to wait for the connection and for each read.
+        
     Returns:
         List[Dict[str, Any]]: List of coffee price records with timestamp, block, and price fields.
     """
+    # Imported here so the prediction service does not pay for it until it queries GraphQL
+    import requests
+    
     logger.info(f"Fetching coffee prices from {config.SUBQL_GRAPHQL_ENDPOINT}")
     
     # GraphQL query to fetch coffee prices
@@ -73,7 +81,8 @@ def fetch_coffee_prices() -> List[Dict[str, Any]]:
     try:
         response = requests.post(
             config.SUBQL_GRAPHQL_ENDPOINT,
-            json={'query': query}
+            json={'query': query},
+            timeout=timeout
         )
         
         response.raise_for_status()
@@ -81,6 +90,8 @@ def fetch_coffee_prices() -> List[Dict[str, Any]]:
         
         if 'errors' in data:
             logger.error(f"GraphQL errors: {data['errors']}")
+            if raise_errors:
+                raise RuntimeError(f"GraphQL errors: {data['errors']}")
             return []
         
         coffee_prices = data.get('data', {}).get('coffeePrices', {}).get('nodes', [])
@@ -89,13 +100,17 @@ def fetch_coffee_prices() -> List[Dict[str, Any]]:
     
     except requests.RequestException as e:
         logger.error(f"Request error when fetching coffee prices: {e}")
+        if raise_errors:
+            raise
         return []
     except Exception as e:
         logger.error(f"Unexpected error when fetching coffee prices: {e}")
+        if raise_errors:
+            raise
         return []
 
 
-def save_to_dataframe(coffee_prices: List[Dict[str, Any]]) -> Optional[pd.DataFrame]:
+def save_to_dataframe(coffee_prices: List[Dict[str, Any]]) -> Optional['pd.DataFrame']:
     """Convert coffee price data to a pandas DataFrame and save to CSV.
     
     Args:
@@ -104,6 +119,8 @@ def save_to_dataframe(coffee_prices: List[Dict[str, Any]]) -> Optional[pd.DataFr
     Returns:
         Optional[pd.DataFrame]: DataFrame with the coffee price data, or None if an error occurs.
     """
+    import pandas as pd
+    
     try:
         if not coffee_prices:
             logger.warning("No coffee price data to save")
@@ -135,8 +152,10 @@ def save_to_dataframe(coffee_prices: List[Dict[str, Any]]) -> Optional[pd.DataFr
         return None
 
 
-def save_to_sqlite(df: pd.DataFrame, db_path: str = f"{config.DATA_DIR}/cafe_index.db") -> bool:
-    """Save the coffee price DataFrame to an SQLite database.
+def save_to_sqlite(df: 'pd.DataFrame', db_path: str = config.PRICE_STORE_PATH) -> bool:
+    """Save the coffee price DataFrame to the indexed SQLite price store.
+    
+    Rows are upserted by id, so re-indexing only touches prices that changed.
     
     Args:
         df: DataFrame with coffee price data.
@@ -146,17 +165,8 @@ def save_to_sqlite(df: pd.DataFrame, db_path: str = f"{config.DATA_DIR}/cafe_ind
         bool: True if the data was saved successfully, False otherwise.
     """
     try:
-        # Make sure the data directory exists
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        
-        # Connect to SQLite database
-        conn = sqlite3.connect(db_path)
-        
-        # Save DataFrame to database
-        df.to_sql('coffee_prices', conn, if_exists='replace', index=False)
-        
-        conn.close()
-        logger.info(f"Coffee price data saved to SQLite database at {db_path}")
+        changed = PriceStore(db_path).upsert(df.to_dict('records'))
+        logger.info(f"Coffee price data saved to SQLite database at {db_path} ({changed} rows changed)")
         return True
     
     except Exception as e:
@@ -164,8 +174,14 @@ def save_to_sqlite(df: pd.DataFrame, db_path: str = f"{config.DATA_DIR}/cafe_ind
         return False
 
 
-def main():
-    """Main function to run the indexing process."""
+def main(refresh_service: bool = False):
+    """Main function to run the indexing process.
+    
+    Args:
+        refresh_service: Whether to refresh the forecast table and the shared state of the
+            prediction service afterwards. main.run_pipeline does this itself once indexing
+            and training are done, so it is only needed for standalone runs.
+    """
     logger.info("Starting coffee price indexing process")
     
     # Start SubQuery node (optional, can be commented out if already running)
@@ -184,9 +200,19 @@ def main():
     if df is not None:
         # Optionally save to SQLite
         save_to_sqlite(df)
+        
+        # New prices change the forecasts served by the prediction service
+        if refresh_service:
+            try:
+                from prediction_service.forecast_table import refresh_forecast_table
+                from prediction_service.shared_state import publish_shared_state
+                refresh_forecast_table()
+                publish_shared_state()
+            except Exception as e:
+                logger.error(f"Error refreshing the prediction service: {e}")
     
     logger.info("Coffee price indexing process completed")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(refresh_service=True)
@@ -0,0 +1,403 @@
+"""Indexed local store of coffee prices for Cafu00e9Index AI.
+
+The indexer upserts every fetched price into a SQLite table indexed on
+(timestamp, id), so the prediction service can answer range queries with
+keyset pagination instead of going through GraphQL. A store version,
+bumped whenever a write changes rows, lets clients revalidate cached
+ranges with ETags. Hourly, daily, weekly and monthly OHLC rollups are kept
+in the same database and recomputed only for the buckets a write touches.
+"""
+
+import base64
+import csv
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple, Iterator
+
+import numpy as np
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from data_processing.features import parse_timestamps
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+HOUR_MS = 60 * 60 * 1000
+DAY_MS = 24 * HOUR_MS
+INTERVALS = ('hourly', 'daily', 'weekly', 'monthly')  # Finest first
+ROLLUP_COLUMNS = ('bucket_ms', 'open', 'high', 'low', 'close', 'mean', 'count')
+LOOKUP_CHUNK = 500  # Ids per IN (...) query, below SQLite's parameter limit
+
+
+def bucket_starts(timestamps_ms: np.ndarray, interval: str) -> np.ndarray:
+    """Return the start of the rollup bucket containing each timestamp.
+
+    Weeks start on Monday and months on the first day, both in UTC.
+
+    Args:
+        timestamps_ms: int64 array of milliseconds since the epoch.
+        interval: One of INTERVALS.
+
+    Returns:
+        np.ndarray: int64 array of bucket starts in milliseconds.
+    """
+    timestamps_ms = np.asarray(timestamps_ms, dtype=np.int64)
+    if interval == 'hourly':
+        return timestamps_ms - timestamps_ms % HOUR_MS
+    if interval == 'daily':
+        return timestamps_ms - timestamps_ms % DAY_MS
+    if interval == 'weekly':
+        days = timestamps_ms // DAY_MS
+        return (days - (days + 3) % 7) * DAY_MS  # 1970-01-01 was a Thursday
+    if interval == 'monthly':
+        return timestamps_ms.astype('datetime64[ms]').astype('datetime64[M]').astype('datetime64[ms]').astype(np.int64)
+    raise ValueError(f"Unknown rollup interval: {interval}")
+
+
+def bucket_end(start_ms: int, interval: str) -> int:
+    """Return the exclusive end of the bucket starting at start_ms."""
+    if interval == 'monthly':
+        month = np.datetime64(int(start_ms), 'ms').astype('datetime64[M]') + 1
+        return int(month.astype('datetime64[ms]').astype(np.int64))
+    return start_ms + {'hourly': HOUR_MS, 'daily': DAY_MS, 'weekly': 7 * DAY_MS}[interval]
+
+
+def compute_rollups(timestamps_ms: np.ndarray, prices: np.ndarray, interval: str) -> List[Tuple]:
+    """Aggregate a sorted price series into OHLC and mean buckets.
+
+    Args:
+        timestamps_ms: Sorted int64 array of milliseconds since the epoch.
+        prices: Float array of prices in the same order.
+        interval: One of INTERVALS.
+
+    Returns:
+        List[Tuple]: Rows in ROLLUP_COLUMNS order.
+    """
+    if len(prices) == 0:
+        return []
+    starts = bucket_starts(timestamps_ms, interval)
+    buckets, first = np.unique(starts, return_index=True)
+    last = np.r_[first[1:], len(prices)] - 1
+    counts = np.diff(np.r_[first, len(prices)])
+    return list(zip(
+        buckets.tolist(), prices[first].tolist(), np.maximum.reduceat(prices, first).tolist(),
+        np.minimum.reduceat(prices, first).tolist(), prices[last].tolist(),
+        (np.add.reduceat(prices, first) / counts).tolist(), counts.tolist(),
+    ))
+
+
+def _block(record: Dict[str, Any]) -> Optional[int]:
+    block = record.get('blockHeight', record.get('block'))
+    return int(float(block)) if block not in (None, '') else None
+
+
+def encode_cursor(timestamp_ms: int, record_id: str) -> str:
+    """Encode the position after a row as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(f"{timestamp_ms}:{record_id}".encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """Decode a cursor from encode_cursor.
+
+    Args:
+        cursor: Opaque cursor string.
+
+    Returns:
+        Tuple[int, str]: Timestamp in milliseconds and id of the last row returned.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        timestamp_ms, record_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split(":", 1)
+        return int(timestamp_ms), record_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class PriceStore:
+    """SQLite price table with a timestamp index and a change version."""
+
+    def __init__(self, db_path: str = config.PRICE_STORE_PATH):
+        """Open (and create if needed) the store database.
+
+        Args:
+            db_path: Path to the SQLite database file.
+        """
+        self.db_path = db_path
+        self._init_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one transaction (committed, or rolled back on error) and close it."""
+        # The indexer and several API workers may use the store at once
+        conn = sqlite3.connect(self.db_path, timeout=5.0)
+        try:
+            conn.execute("PRAGMA busy_timeout = 5000")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS prices (
+                    id TEXT PRIMARY KEY,
+                    timestamp_ms INTEGER NOT NULL,
+                    block INTEGER,
+                    price REAL NOT NULL,
+                    version INTEGER NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_prices_timestamp ON prices (timestamp_ms, id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('version', 0)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rollups (
+                    interval TEXT NOT NULL,
+                    bucket_ms INTEGER NOT NULL,
+                    open REAL NOT NULL,
+                    high REAL NOT NULL,
+                    low REAL NOT NULL,
+                    close REAL NOT NULL,
+                    mean REAL NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (interval, bucket_ms)
+                )
+                """
+            )
+            # Stores written before rollups existed get them built once
+            has_prices = conn.execute("SELECT 1 FROM prices LIMIT 1").fetchone() is not None
+            has_rollups = conn.execute("SELECT 1 FROM rollups LIMIT 1").fetchone() is not None
+            if has_prices and not has_rollups:
+                span = conn.execute("SELECT MIN(timestamp_ms), MAX(timestamp_ms) FROM prices").fetchone()
+                self._refresh_rollups(conn, span)
+
+    def version(self) -> int:
+        """Return the store version, which changes whenever stored rows change."""
+        with self._connect() as conn:
+            return conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0]
+
+    def count(self) -> int:
+        """Return the number of stored prices."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0]
+
+    def upsert(self, records: List[Dict[str, Any]]) -> int:
+        """Insert new prices and update changed ones.
+
+        Args:
+            records: Price records with id, timestamp, price and blockHeight or block fields.
+
+        Returns:
+            int: Number of rows inserted or changed.
+        """
+        if not records:
+            return 0
+
+        timestamps = parse_timestamps([record['timestamp'] for record in records]).astype('int64').tolist()
+        rows = {
+            str(record.get('id') or timestamp_ms): (timestamp_ms, _block(record), float(record['price']))
+            for record, timestamp_ms in zip(records, timestamps)
+        }
+        # Commits on return, rolls back if anything raises, and always closes
+        with self._connect() as conn:
+            # Take the write lock up front so concurrent writers serialize on the version
+            conn.execute("BEGIN IMMEDIATE")
+            existing = {}
+            ids = list(rows)
+            for i in range(0, len(ids), LOOKUP_CHUNK):
+                chunk = ids[i:i + LOOKUP_CHUNK]
+                existing.update(
+                    (record_id, (timestamp_ms, block, price))
+                    for record_id, timestamp_ms, block, price in conn.execute(
+                        f"SELECT id, timestamp_ms, block, price FROM prices WHERE id IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    )
+                )
+            changed = {record_id: row for record_id, row in rows.items() if existing.get(record_id) != row}
+            if not changed:
+                conn.rollback()
+                return 0
+
+            version = conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0] + 1
+            conn.executemany(
+                "INSERT OR REPLACE INTO prices (id, timestamp_ms, block, price, version) VALUES (?, ?, ?, ?, ?)",
+                [(record_id, *row, version) for record_id, row in changed.items()]
+            )
+            conn.execute("UPDATE store_meta SET value = ? WHERE key = 'version'", (version,))
+
+            # Rebuild only the buckets that gained, lost or changed a price
+            touched = [row[0] for row in changed.values()] + [
+                existing[record_id][0] for record_id in changed if record_id in existing
+            ]
+            self._refresh_rollups(conn, (min(touched), max(touched)))
+            return len(changed)
+
+    def _refresh_rollups(self, conn: sqlite3.Connection, span: Tuple[int, int]) -> None:
+        for interval in INTERVALS:
+            start = int(bucket_starts(np.array([span[0]]), interval)[0])
+            end = bucket_end(int(bucket_starts(np.array([span[1]]), interval)[0]), interval)
+            rows = conn.execute(
+                "SELECT timestamp_ms, price FROM prices WHERE timestamp_ms >= ? AND timestamp_ms < ? "
+                "ORDER BY timestamp_ms, id",
+                (start, end)
+            ).fetchall()
+            timestamps_ms = np.array([row[0] for row in rows], dtype=np.int64)
+            prices = np.array([row[1] for row in rows], dtype=np.float64)
+
+            conn.execute(
+                "DELETE FROM rollups WHERE interval = ? AND bucket_ms >= ? AND bucket_ms < ?", (interval, start, end)
+            )
+            conn.executemany(
+                f"INSERT INTO rollups (interval, {', '.join(ROLLUP_COLUMNS)}) VALUES (?, {', '.join('?' * len(ROLLUP_COLUMNS))})",
+                [(interval, *row) for row in compute_rollups(timestamps_ms, prices, interval)]
+            )
+
+    def rollups(self, interval: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None,
+                limit: int = config.CHART_MAX_POINTS) -> List[Tuple]:
+        """Return pre-aggregated buckets overlapping a time range, oldest first.
+
+        Args:
+            interval: One of INTERVALS.
+            start_ms: Inclusive lower bound in milliseconds since the epoch.
+            end_ms: Inclusive upper bound in milliseconds since the epoch.
+            limit: Maximum number of buckets to return.
+
+        Returns:
+            List[Tuple]: Rows in ROLLUP_COLUMNS order.
+        """
+        params = [interval]
+        where = "interval = ?"
+        if start_ms is not None:
+            where += " AND bucket_ms >= ?"
+            params.append(int(bucket_starts(np.array([start_ms]), interval)[0]))
+        if end_ms is not None:
+            where += " AND bucket_ms <= ?"
+            params.append(end_ms)
+        with self._connect() as conn:
+            return conn.execute(
+                f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM rollups WHERE {where} ORDER BY bucket_ms LIMIT ?",
+                params + [limit]
+            ).fetchall()
+
+    def count_rollups(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Dict[str, int]:
+        """Return the number of buckets per interval overlapping a time range."""
+        counts = {}
+        with self._connect() as conn:
+            for interval in INTERVALS:
+                start = int(bucket_starts(np.array([start_ms]), interval)[0]) if start_ms is not None else -2 ** 62
+                end = end_ms if end_ms is not None else 2 ** 62
+                counts[interval] = conn.execute(
+                    "SELECT COUNT(*) FROM rollups WHERE interval = ? AND bucket_ms >= ? AND bucket_ms <= ?",
+                    (interval, start, end)
+                ).fetchone()[0]
+        return counts
+
+    def latest(self, n: int = 1) -> List[Tuple[int, str, Optional[int], float]]:
+        """Return the n most recent prices, newest first, as (timestamp_ms, id, block, price) rows."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT timestamp_ms, id, block, price FROM prices ORDER BY timestamp_ms DESC, id DESC LIMIT ?", (n,)
+            ).fetchall()
+
+    def load_arrays(self, start_ms: Optional[int] = None,
+                    end_ms: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return every price in a time range as typed arrays, oldest first.
+
+        Args:
+            start_ms: Inclusive lower bound in milliseconds since the epoch.
+            end_ms: Inclusive upper bound in milliseconds since the epoch.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: int64 timestamps in ms, float64 prices and int64 blocks (-1 if unknown).
+        """
+        rows = self.query_range(start_ms, end_ms, limit=-1)
+        timestamps_ms = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        blocks = np.fromiter((-1 if row[2] is None else row[2] for row in rows), dtype=np.int64, count=len(rows))
+        prices = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+        return timestamps_ms, prices, blocks
+
+    def load_records(self, start_ms: Optional[int] = None,
+                     end_ms: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the ids, timestamps and prices in a time range as arrays, oldest first.
+
+        Args:
+            start_ms: Inclusive lower bound in milliseconds since the epoch.
+            end_ms: Inclusive upper bound in milliseconds since the epoch.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Object array of ids, int64 timestamps in ms and float64 prices.
+        """
+        rows = self.query_range(start_ms, end_ms, limit=-1)
+        ids = np.fromiter((row[1] for row in rows), dtype=object, count=len(rows))
+        timestamps_ms = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        prices = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+        return ids, timestamps_ms, prices
+
+    def query_range(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None,
+                    limit: int = config.PRICES_DEFAULT_LIMIT,
+                    after: Optional[Tuple[int, str]] = None) -> List[Tuple[int, str, Optional[int], float]]:
+        """Return prices in a time range, oldest first, using keyset pagination.
+
+        Args:
+            start_ms: Inclusive lower bound in milliseconds since the epoch.
+            end_ms: Inclusive upper bound in milliseconds since the epoch.
+            limit: Maximum number of rows to return (-1 for no limit).
+            after: (timestamp_ms, id) of the last row of the previous page.
+
+        Returns:
+            List[Tuple[int, str, Optional[int], float]]: Rows of (timestamp_ms, id, block, price).
+        """
+        clauses, params = [], []
+        if start_ms is not None:
+            clauses.append("timestamp_ms >= ?")
+            params.append(start_ms)
+        if end_ms is not None:
+            clauses.append("timestamp_ms <= ?")
+            params.append(end_ms)
+        if after is not None:
+            clauses.append("(timestamp_ms > ? OR (timestamp_ms = ? AND id > ?))")
+            params.extend([after[0], after[0], after[1]])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            return conn.execute(
+                f"SELECT timestamp_ms, id, block, price FROM prices {where} ORDER BY timestamp_ms, id LIMIT ?",
+                params + [limit]
+            ).fetchall()
+
+
+def import_csv(csv_path: str = config.RAW_DATA_PATH, db_path: str = config.PRICE_STORE_PATH) -> int:
+    """Load the raw price CSV file into the store.
+
+    Args:
+        csv_path: Path to the raw price CSV file.
+        db_path: Path to the store database.
+
+    Returns:
+        int: Number of rows inserted or changed.
+    """
+    with open(csv_path, newline='') as f:
+        records = list(csv.DictReader(f))
+
+    changed = PriceStore(db_path).upsert(records)
+    logger.info(f"Imported {csv_path} into {db_path}: {changed} rows changed")
+    return changed
+
+
+if __name__ == "__main__":
+    import_csv()
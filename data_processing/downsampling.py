@@ -0,0 +1,57 @@
+"""Chart downsampling for Cafu00e9Index AI.
+
+Largest-Triangle-Three-Buckets (LTTB) keeps the points that preserve the
+visual shape of a series, so long ranges can be drawn from a fixed number
+of points.
+"""
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Select the indices of the points LTTB keeps.
+
+    The first and last points are always kept. Every other output point is
+    the one in its bucket that forms the largest triangle with the previous
+    kept point and the average of the next bucket.
+
+    Args:
+        x: Sorted float array of x values (e.g. timestamps).
+        y: Float array of y values.
+        threshold: Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted int64 indices into x and y.
+
+    Raises:
+        ValueError: If threshold is below 3 and smaller than the series.
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n, dtype=np.int64)
+    if threshold < 3:
+        raise ValueError("LTTB needs a threshold of at least 3 points")
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket edges over the points between the first and the last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Twice the triangle area, for every candidate of this bucket at once
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        indices[i + 1] = previous
+    return indices
@@ -0,0 +1,192 @@
+"""Shared feature definitions for Cafu00e9Index AI.
+
+This module defines the model's feature set once and provides a NumPy-only
+extractor for serving, so the prediction service can build a feature row
+without pandas while staying consistent with `create_features` in training.
+"""
+
+import logging
+import os
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ROLLING_WINDOW = 7  # Days covered by the rolling mean and std features
+CALENDAR_FEATURES = ['day_of_week', 'month', 'year']
+ROLLING_FEATURES = [f'price_rolling_mean_{ROLLING_WINDOW}d', f'price_rolling_std_{ROLLING_WINDOW}d']
+
+
+def lag_feature(lag: int) -> str:
+    """Return the column name of a lag feature.
+
+    Args:
+        lag: Number of records back.
+
+    Returns:
+        str: Column name, e.g. 'price_lag_1'.
+    """
+    return f'price_lag_{lag}'
+
+
+def feature_columns(window_size: int = config.FEATURE_WINDOW_SIZE) -> List[str]:
+    """Return the model's feature columns in training order.
+
+    Args:
+        window_size: Number of lag features.
+
+    Returns:
+        List[str]: Ordered feature column names.
+    """
+    return ['blockHeight', 'price'] + CALENDAR_FEATURES + ROLLING_FEATURES + [
+        lag_feature(lag) for lag in range(1, window_size + 1)
+    ]
+
+
+def _strip_timezone(text: str) -> str:
+    """Drop a trailing 'Z' or '+HH:MM' offset, keeping the local wall time."""
+    text = text.strip().replace(' ', 'T')
+    if text.endswith('Z'):
+        return text[:-1]
+    if len(text) > 19 and text[-6] in '+-' and text[-3] == ':':
+        return text[:-6]
+    return text
+
+
+def parse_timestamps(values: Sequence[Any]) -> np.ndarray:
+    """Convert timestamps to a datetime64 array without pandas.
+
+    ISO strings, datetime objects and Unix epochs (seconds or milliseconds,
+    as accepted by utils.format_timestamp) are supported. Timezone suffixes
+    are dropped, matching the naive timestamps used during training.
+
+    Args:
+        values: Sequence of timestamps.
+
+    Returns:
+        np.ndarray: Array of dtype datetime64[ms].
+    """
+    # Fast path for plain ISO strings (numpy would read digit-only strings as years)
+    if all(isinstance(value, str) and '-' in value[1:] for value in values):
+        try:
+            return np.array([_strip_timezone(value) for value in values], dtype='datetime64[ms]')
+        except ValueError:
+            pass
+
+    parsed = np.empty(len(values), dtype='datetime64[ms]')
+    for i, value in enumerate(values):
+        if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+            value = int(value)
+        if isinstance(value, (int, float, np.integer, np.floating)):
+            epoch_ms = value if value > 1e10 else value * 1000
+            parsed[i] = np.datetime64(int(epoch_ms), 'ms')
+        elif isinstance(value, datetime):
+            parsed[i] = np.datetime64(value.replace(tzinfo=None), 'ms')
+        else:
+            parsed[i] = np.datetime64(_strip_timezone(str(value)), 'ms')
+    return parsed
+
+
+def calendar_features(dates: np.ndarray) -> np.ndarray:
+    """Compute day of week, month and year for an array of dates.
+
+    Args:
+        dates: datetime64 array.
+
+    Returns:
+        np.ndarray: Array with shape (len(dates), 3) in CALENDAR_FEATURES order.
+    """
+    days = dates.astype('datetime64[D]').astype('int64')
+    months = dates.astype('datetime64[M]').astype('int64')
+    return np.column_stack([
+        (days + 3) % 7,  # 1970-01-01 was a Thursday; Monday is 0 as in pandas
+        months % 12 + 1,
+        months // 12 + 1970,
+    ])
+
+
+def extract_latest_features(timestamps: np.ndarray, prices: np.ndarray, blocks: np.ndarray,
+                            window_size: int = config.FEATURE_WINDOW_SIZE) -> Optional[np.ndarray]:
+    """Build the feature row for the most recent record of a price series.
+
+    The series must already be sorted by timestamp. The result equals the last
+    row of `create_features` for the same series.
+
+    Args:
+        timestamps: datetime64 array of record timestamps.
+        prices: Float array of prices.
+        blocks: Array of block heights.
+        window_size: Number of lag features.
+
+    Returns:
+        Optional[np.ndarray]: Feature array with shape (1, n_features), or None if the series is too short.
+    """
+    if len(prices) < window_size + 1:
+        return None
+
+    recent = prices[-ROLLING_WINDOW:]
+    row = np.empty(len(CALENDAR_FEATURES) + len(ROLLING_FEATURES) + window_size + 2)
+    row[0] = blocks[-1]
+    row[1] = prices[-1]
+    row[2:5] = calendar_features(timestamps[-1:])[0]
+    row[5] = recent.mean()
+    row[6] = recent.std(ddof=1) if len(recent) > 1 else np.nan
+    row[7:] = prices[-2:-2 - window_size:-1]
+    return row.reshape(1, -1)
+
+
+def check_feature_parity(file_path: str = config.RAW_DATA_PATH,
+                         window_size: int = config.FEATURE_WINDOW_SIZE) -> bool:
+    """Verify that extract_latest_features reproduces create_features.
+
+    Every row produced by the training pipeline is compared with the serving
+    extractor applied to the history up to that row.
+
+    Args:
+        file_path: Path to the raw price CSV file.
+        window_size: Number of lag features.
+
+    Returns:
+        bool: True if all rows match, False otherwise.
+    """
+    from data_processing.preprocessor import load_data, clean_data, create_features
+
+    df = load_data(file_path)
+    if df is None:
+        return False
+
+    cleaned_df = clean_data(df)
+    feature_df = create_features(cleaned_df, window_size)
+    columns = feature_columns(window_size)
+
+    timestamps = parse_timestamps(cleaned_df['timestamp'].astype(str).tolist())
+    prices = cleaned_df['price'].to_numpy(dtype=float)
+    blocks = cleaned_df['blockHeight'].to_numpy(dtype=float)
+
+    mismatches = 0
+    for position, row in zip(cleaned_df.index.get_indexer(feature_df.index), feature_df[columns].to_numpy(dtype=float)):
+        served = extract_latest_features(
+            timestamps[:position + 1], prices[:position + 1], blocks[:position + 1], window_size
+        )
+        if served is None or not np.allclose(served[0], row):
+            mismatches += 1
+
+    if mismatches:
+        logger.error(f"Feature parity check failed for {mismatches} of {len(feature_df)} rows")
+        return False
+
+    logger.info(f"Feature parity check passed for {len(feature_df)} rows")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_feature_parity() else 1)
@@ -14,6 +14,7 @@ from typing import Tuple, Optional
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from data_processing.features import ROLLING_WINDOW, ROLLING_FEATURES, lag_feature
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -105,13 +106,14 @@ def create_features(df: pd.DataFrame, window_size: int = config.FEATURE_WINDOW_S
     feature_df['month'] = feature_df['timestamp'].dt.month
     feature_df['year'] = feature_df['timestamp'].dt.year
     
-    # Create rolling features
-    feature_df['price_rolling_mean_7d'] = feature_df['price'].rolling(window=7, min_periods=1).mean()
-    feature_df['price_rolling_std_7d'] = feature_df['price'].rolling(window=7, min_periods=1).std()
+    # Create rolling features (names and window shared with the serving extractor)
+    rolling_mean_col, rolling_std_col = ROLLING_FEATURES
+    feature_df[rolling_mean_col] = feature_df['price'].rolling(window=ROLLING_WINDOW, min_periods=1).mean()
+    feature_df[rolling_std_col] = feature_df['price'].rolling(window=ROLLING_WINDOW, min_periods=1).std()
     
     # Create lag features
     for lag in range(1, window_size + 1):
-        feature_df[f'price_lag_{lag}'] = feature_df['price'].shift(lag)
+        feature_df[lag_feature(lag)] = feature_df['price'].shift(lag)
     
     # Drop rows with NaN values created by lag features
     feature_df = feature_df.dropna()
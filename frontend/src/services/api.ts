@@ -42,6 +42,111 @@ export const getPrediction = async (request: PredictionRequest): Promise<Predict
   }
 };
 
+// Interface para una página del histórico de precios
+export interface PriceHistoryPage {
+  prices: { timestamp: string; date: string; price: number; block: number | null }[];
+  next_cursor: string | null;
+}
+
+// Parámetros del histórico: fechas ISO inclusivas, tamaño de página y cursor
+export interface PriceHistoryParams {
+  from?: string;
+  to?: string;
+  limit?: number;
+  cursor?: string;
+}
+
+// Servicio para obtener el histórico de precios sin pasar por el modelo
+export const getPriceHistory = async (params: PriceHistoryParams = {}): Promise<PriceHistoryPage> => {
+  try {
+    const response = await api.get<PriceHistoryPage>('/prices', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error al obtener histórico de precios:', error);
+    throw error;
+  }
+};
+
+// Velas OHLC pre-agregadas, en columnas
+export interface PriceOhlc {
+  interval: 'hourly' | 'daily' | 'weekly' | 'monthly';
+  buckets: {
+    start: string[];
+    open: number[];
+    high: number[];
+    low: number[];
+    close: number[];
+    mean: number[];
+    count: number[];
+  };
+}
+
+// Servicio para obtener velas OHLC con un número acotado de puntos
+export const getPriceOhlc = async (
+  params: { from?: string; to?: string; interval?: PriceOhlc['interval'] | 'auto'; points?: number } = {},
+): Promise<PriceOhlc> => {
+  try {
+    const response = await api.get<PriceOhlc>('/prices/ohlc', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error al obtener velas OHLC:', error);
+    throw error;
+  }
+};
+
+// Serie reducida con LTTB para gráficos de rangos largos
+export interface PriceDownsample {
+  timestamps: string[];
+  prices: number[];
+  source_points: number;
+}
+
+// Servicio para obtener la serie reducida a un máximo de puntos
+export const getPriceDownsample = async (
+  params: { from?: string; to?: string; points?: number } = {},
+): Promise<PriceDownsample> => {
+  try {
+    const response = await api.get<PriceDownsample>('/prices/downsample', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error al obtener la serie reducida:', error);
+    throw error;
+  }
+};
+
+// Actualización de precio enviada por /stream
+export interface PriceUpdate {
+  timestamp: string;
+  date: string;
+  price: number;
+  block: number | null;
+  change: number | null;
+}
+
+// Actualización de pronóstico enviada por /stream
+export interface ForecastUpdate {
+  start_date: string;
+  prices: number[];
+  generated_at: string;
+  model_timestamp: string | null;
+}
+
+// Suscripción a precios y pronósticos nuevos (Server-Sent Events) en lugar de consultar periódicamente.
+// EventSource se reconecta solo; devuelve una función para cerrar la conexión.
+export const subscribeToUpdates = (handlers: {
+  onPrice?: (update: PriceUpdate) => void;
+  onForecast?: (update: ForecastUpdate) => void;
+}): (() => void) => {
+  const source = new EventSource(`${API_URL}/stream`);
+  if (handlers.onPrice) {
+    source.addEventListener('price', (event) => handlers.onPrice!(JSON.parse((event as MessageEvent).data)));
+  }
+  if (handlers.onForecast) {
+    source.addEventListener('forecast', (event) => handlers.onForecast!(JSON.parse((event as MessageEvent).data)));
+  }
+  return () => source.close();
+};
+
 // Servicio para verificar el estado del backend
 export const checkHealth = async (): Promise<{ status: string }> => {
   try {
@@ -8,16 +8,12 @@ import os
 import logging
 import argparse
 from typing import Dict, Any
-from dotenv import load_dotenv
 
-from data_indexing.indexer import main as run_indexing
-from data_processing.preprocessor import preprocess_data
-from data_processing.model_trainer import train_and_save_model
 import utils
 import config
 
-# Importar el oru00e1culo de precios cuando se requiera
-price_oracle_module = None
+# Pipeline steps (pandas, scikit-learn) and the price oracle (substrate-interface)
+# are imported on first use, so `--oracle test-connection` never loads them
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -28,6 +24,7 @@ logger = logging.getLogger(__name__)
 def setup_environment() -> None:
     """Set up the environment for the project."""
     # Cargar variables de entorno
+    from dotenv import load_dotenv
     load_dotenv()
     
     # Create necessary directories
@@ -58,6 +55,7 @@ def run_pipeline(index: bool = True, process: bool = True, train: bool = True) -
     if index:
         logger.info("Starting indexing step")
         try:
+            from data_indexing.indexer import main as run_indexing
             run_indexing()
             status['indexing'] = "success"
         except Exception as e:
@@ -68,6 +66,7 @@ def run_pipeline(index: bool = True, process: bool = True, train: bool = True) -
     if process:
         logger.info("Starting processing step")
         try:
+            from data_processing.preprocessor import preprocess_data
             processed_data = preprocess_data()
             if processed_data is not None:
                 status['processing'] = "success"
@@ -81,6 +80,7 @@ def run_pipeline(index: bool = True, process: bool = True, train: bool = True) -
     if train:
         logger.info("Starting model training step")
         try:
+            from data_processing.model_trainer import train_and_save_model
             model_info = train_and_save_model()
             if model_info is not None:
                 status['training'] = "success"
@@ -90,43 +90,57 @@ def run_pipeline(index: bool = True, process: bool = True, train: bool = True) -
             logger.error(f"Error in model training step: {e}")
             status['training'] = f"failed: {str(e)}"
     
+    # Precompute forecasts for the service whenever new data or a new model is available
+    if any(status.get(step) == "success" for step in ('indexing', 'training')):
+        logger.info("Refreshing forecast table")
+        try:
+            from prediction_service.forecast_table import refresh_forecast_table
+            status['forecast_table'] = "success" if refresh_forecast_table() else "failed: no table written"
+        except Exception as e:
+            logger.error(f"Error refreshing forecast table: {e}")
+            status['forecast_table'] = f"failed: {str(e)}"
+        
+        logger.info("Publishing shared model and prices for the API workers")
+        try:
+            from prediction_service.shared_state import publish_shared_state
+            status['shared_state'] = "success" if publish_shared_state() is not None else "failed: nothing published"
+        except Exception as e:
+            logger.error(f"Error publishing shared state: {e}")
+            status['shared_state'] = f"failed: {str(e)}"
+    
     return status
 
 
-def run_oracle_operations(action: str, hours: int = 24) -> None:
+def run_oracle_operations(action: str, hours: int = 24, engine: str = config.ORACLE_ENGINE) -> None:
     """Ejecuta operaciones relacionadas con el oraculo de precios.
     
     Args:
         action: Acciun a realizar ('test-connection', 'test-send', 'submit').
         hours: Para 'submit', cuantas horas atras considerar para los precios.
+        engine: Para 'submit', motor de envio ('sync' o 'async').
     """
-    global price_oracle_module
-    
-    # Importar el mudulo de oraculo solo cuando sea necesario
-    if price_oracle_module is None:
-        try:
-            import price_oracle.test_oracle as test_oracle
-            import price_oracle.run_oracle as run_oracle
-            price_oracle_module = {
-                'test': test_oracle,
-                'run': run_oracle
-            }
-        except ImportError as e:
-            logger.error(f"Error importing price oracle module: {e}")
-            logger.error("Make sure substrate-interface is installed: pip install substrate-interface")
-            return
+    # Importar solo el mudulo de oraculo que requiere la accion
+    try:
+        if action == 'submit':
+            import price_oracle.run_oracle as oracle_module
+        else:
+            import price_oracle.test_oracle as oracle_module
+    except ImportError as e:
+        logger.error(f"Error importing price oracle module: {e}")
+        logger.error("Make sure substrate-interface is installed: pip install substrate-interface")
+        return
     
     # Ejecutar la acciun solicitada
     try:
         if action == 'test-connection':
             logger.info("Testing connection to Westend blockchain...")
-            price_oracle_module['test'].test_connection()
+            oracle_module.test_connection()
         elif action == 'test-send':
             logger.info("Sending test price to Westend blockchain...")
-            price_oracle_module['test'].send_test_price()
+            oracle_module.send_test_price()
         elif action == 'submit':
-            logger.info(f"Submitting prices from the last {hours} hours to Westend...")
-            price_oracle_module['run'].run_oracle('file', hours)
+            logger.info(f"Submitting prices from the last {hours} hours to Westend ({engine} engine)...")
+            oracle_module.run_oracle('file', hours, engine=engine)
         else:
             logger.error(f"Unknown oracle action: {action}")
     except Exception as e:
@@ -151,13 +165,15 @@ def main():
                            help="Run oracle operations instead of the pipeline")
     oracle_group.add_argument("--hours", type=int, default=24,
                            help="For 'submit' action, consider prices from the last N hours")
+    oracle_group.add_argument("--engine", choices=['sync', 'async'], default=config.ORACLE_ENGINE,
+                           help="For 'submit' action, use the synchronous PriceOracle or the asyncio engine")
     
     args = parser.parse_args()
     
     # Ejecutar operaciones de oraculo si se solicitaron
     if args.oracle:
         logger.info(f"Running oracle operation: {args.oracle}")
-        run_oracle_operations(args.oracle, args.hours)
+        run_oracle_operations(args.oracle, args.hours, args.engine)
         return
     
     # De lo contrario, ejecutar el pipeline
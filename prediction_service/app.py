@@ -4,24 +4,44 @@ This module provides a REST API endpoint for price predictions using trained mod
 optionally enhanced with explanations from DeepSeek AI models.
 """
 
+import asyncio
 import os
+import hashlib
 import logging
-import joblib
-import pandas as pd
+import time
 import numpy as np
-import requests
 import json
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
-from data_indexing.indexer import fetch_coffee_prices
+from data_indexing.price_store import INTERVALS, ROLLUP_COLUMNS, PriceStore, decode_cursor, encode_cursor, import_csv
+from data_processing.downsampling import lttb_indices
+from data_processing.features import parse_timestamps
+from prediction_service.data import (
+    get_block_step, load_fallback_prices, load_latest_prices, load_model, prepare_prediction_features,
+)
+from prediction_service.broadcast import HEARTBEAT, Broadcaster, ChangeWatcher
+from prediction_service.explanation_cache import ExplanationCache, make_cache_key
+from prediction_service.forecaster import RecursiveForecaster
+from prediction_service.forecast_table import ForecastTable, forecast_start_date
+from prediction_service.responses import (
+    FastJSONResponse, build_prediction_payload, compression_middleware, price_date,
+)
+from prediction_service.resilience import DEEPSEEK_BREAKER, CircuitOpenError, Deadline, DeadlineExceeded
+from prediction_service.shared_state import SharedState
+from prediction_service.singleflight import SingleFlight
+from prediction_service.metrics import (
+    CONTENT_TYPE, REGISTRY, REQUEST_LATENCY, REQUESTS_IN_FLIGHT, UPSTREAM_ERRORS,
+    record_cache_lookup, stage_timer,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -33,6 +53,7 @@ app = FastAPI(
     title="Cafu00e9Index AI",
     description="Coffee price prediction API using historical on-chain data",
     version="1.0.0",
+    default_response_class=FastJSONResponse,
 )
 
 # Add CORS middleware
@@ -44,15 +65,123 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (long histories, big batches), but never buffer the event stream
+compression_class, compression_options = compression_middleware(excluded_paths=["/stream"])
+app.add_middleware(compression_class, **compression_options)
+
+
+# Paths labelled in request metrics, filled at the end of this module once every route is registered
+tracked_paths = set()
+
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """Record in-flight requests and end-to-end latency per endpoint."""
+    # The event stream returns before its body is sent; open streams are counted by cafeindex_stream_subscribers
+    if request.url.path == "/stream":
+        return await call_next(request)
+    
+    # Only label known routes to keep metric cardinality bounded
+    path = request.url.path if request.url.path in tracked_paths else "other"
+    in_flight = REQUESTS_IN_FLIGHT.labels(path)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        return await call_next(request)
+    finally:
+        in_flight.dec()
+        REQUEST_LATENCY.labels(path).observe(time.perf_counter() - start)
+
+
 # Initialize DeepSeek API
 deepseek_api_key = os.environ.get("DEEPSEEK_API_KEY", config.DEEPSEEK_API_KEY)
 
+# Initialize the persistent explanation cache (shared by all workers through SQLite)
+try:
+    explanation_cache = ExplanationCache()
+except Exception as e:
+    logger.error(f"Could not initialize explanation cache: {e}")
+    explanation_cache = None
+
+# Indexed price history for /prices, seeded from the local CSV until the indexer has run
+try:
+    price_store = PriceStore()
+    if price_store.count() == 0 and os.path.exists(config.RAW_DATA_PATH):
+        import_csv(config.RAW_DATA_PATH, price_store.db_path)
+except Exception as e:
+    logger.error(f"Could not initialize price store: {e}")
+    price_store = None
+
+# Concurrent identical requests share one price fetch and one DeepSeek call
+price_flight = SingleFlight("prices")
+explanation_flight = SingleFlight("explanation")
+
+# Forecasts precomputed by the pipeline and the indexer
+forecast_table = ForecastTable()
+
+# Model and price arrays published by the pipeline, mapped read-only by every worker
+shared_state = SharedState()
+
+
+def latest_price_update() -> Optional[Dict[str, Any]]:
+    """Build the /stream payload for the most recent stored price."""
+    rows = price_store.latest(2)
+    if not rows:
+        return None
+    timestamp_ms, _, block, price = rows[0]
+    timestamp = format_timestamps([timestamp_ms])[0]
+    return {
+        "timestamp": timestamp,
+        "date": timestamp[:10],
+        "price": price,
+        "block": block,
+        "change": round(price - rows[1][3], 6) if len(rows) > 1 else None,
+    }
+
+
+def forecast_version() -> Optional[str]:
+    table = forecast_table.current()
+    return table and table["generated_at"]
+
+
+def forecast_update() -> Optional[Dict[str, Any]]:
+    """Build the /stream payload for the current precomputed forecast."""
+    table = forecast_table.current()
+    if table is None:
+        return None
+    return {
+        "start_date": table["start_date"],
+        "prices": table["prices"][:config.STREAM_FORECAST_DAYS],
+        "generated_at": table["generated_at"],
+        "model_timestamp": table["model_timestamp"],
+    }
+
+
+# One producer per worker pushes new prices and forecasts to every /stream client
+broadcaster = Broadcaster()
+update_watcher = ChangeWatcher(broadcaster, config.STREAM_CHECK_INTERVAL)
+if price_store is not None:
+    update_watcher.watch("price", price_store.version, latest_price_update)
+update_watcher.watch("forecast", forecast_version, forecast_update)
+
+
+@app.on_event("startup")
+async def start_update_watcher():
+    update_watcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_update_watcher():
+    await update_watcher.stop()
+
 
 # Pydantic models for request and response
 class PredictionRequest(BaseModel):
     prompt: str
     days_ahead: int = 7
     explanation_required: bool = True
+    # Return each series as parallel date and price lists instead of records
+    columnar: bool = False
 
 
 class PredictionResponse(BaseModel):
@@ -61,276 +190,166 @@ class PredictionResponse(BaseModel):
     explanation: Optional[str] = None
 
 
-def load_model(model_path: str = config.MODEL_PATH) -> Dict[str, Any]:
-    """Load the trained model from disk.
-    
-    Args:
-        model_path: Path to the saved model file.
-        
-    Returns:
-        Dict[str, Any]: Dictionary with model and metadata.
-    """
-    try:
-        if not os.path.exists(model_path):
-            logger.error(f"Model file not found: {model_path}")
-            raise FileNotFoundError(f"Model file not found: {model_path}")
-        
-        model_data = joblib.load(model_path)
-        logger.info(f"Loaded model: {model_data['model_name']}")
-        return model_data
-    
-    except Exception as e:
-        logger.error(f"Error loading model: {e}")
-        raise e
+class BatchScenario(BaseModel):
+    days_ahead: int = Field(7, ge=1, le=config.BATCH_MAX_DAYS_AHEAD)
+    # What-if prices replacing the most recent historical prices (oldest first)
+    price_overrides: Optional[List[float]] = None
 
 
-def get_latest_prices(num_days: int = 30) -> List[Dict[str, Any]]:
-    """Get the latest coffee prices from the SubQuery GraphQL endpoint.
+class BatchPredictionRequest(BaseModel):
+    scenarios: List[BatchScenario]
+
+
+class BatchPredictionResponse(BaseModel):
+    dates: List[str]
+    days_ahead: List[int]
+    prices: List[List[float]]
+
+
+def get_latest_prices(num_days: int = 30, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+    """Get the latest coffee prices, sharing one fetch between concurrent callers.
+    
+    The window published to the shared state is used while it is recent. When the
+    request budget runs out, stored prices are served instead of waiting for GraphQL.
     
     Args:
         num_days: Number of days of historical data to retrieve.
+        deadline: Request deadline bounding the fetch.
         
     Returns:
-        List[Dict[str, Any]]: List of recent coffee price records.
+        List[Dict[str, Any]]: List of recent coffee price records (shared, do not modify).
     """
-    try:
-        # Try to fetch prices from GraphQL endpoint
-        coffee_prices = fetch_coffee_prices()
-        
-        if not coffee_prices:
-            logger.warning("No coffee prices found from GraphQL, trying local CSV file")
-            # Try to load from the local CSV file instead
-            csv_path = config.RAW_DATA_PATH
-            if os.path.exists(csv_path):
-                logger.info(f"Loading coffee prices from local file: {csv_path}")
-                df = pd.read_csv(csv_path)
-                # Sort by timestamp
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                df = df.sort_values('timestamp', ascending=False).head(num_days)
-                df = df.sort_values('timestamp')
-                # Convert blockHeight to block if needed
-                if 'blockHeight' in df.columns and 'block' not in df.columns:
-                    df['block'] = df['blockHeight']
-                return df.to_dict('records')
-            else:
-                # Generate dummy data for demonstration purposes
-                logger.warning("Local CSV file not found, using dummy data for demonstration")
-                base_price = 3.5
-                today = datetime.now()
-                dummy_prices = []
-                for i in range(num_days, 0, -1):
-                    date = today - timedelta(days=i)
-                    # Add some random variation to the price
-                    price = base_price + (np.random.random() - 0.5) * 0.2
-                    base_price = price  # Update for next iteration
-                    dummy_prices.append({
-                        'timestamp': date.isoformat(),
-                        'price': round(price, 2),
-                        'block': 10000 + i
-                    })
-                return dummy_prices
-        
-        # Process and return only the most recent prices
-        prices_df = pd.DataFrame(coffee_prices)
-        prices_df['timestamp'] = pd.to_datetime(prices_df['timestamp'])
-        prices_df = prices_df.sort_values('timestamp', ascending=False).head(num_days)
-        prices_df = prices_df.sort_values('timestamp')
-        
-        # Convert to list of dictionaries
-        latest_prices = prices_df.to_dict('records')
-        return latest_prices
+    prices = shared_state.latest_prices(num_days)
+    record_cache_lookup("shared_prices", prices is not None)
+    if prices is not None:
+        return prices
     
-    except Exception as e:
-        logger.error(f"Error getting latest prices: {e}")
-        return []
+    deadline = deadline or Deadline(config.PREDICT_DEADLINE)
+    try:
+        return price_flight.do(
+            num_days, load_latest_prices, num_days, deadline.timeout(config.GRAPHQL_TIMEOUT),
+            wait_timeout=deadline.remaining()
+        )
+    except (DeadlineExceeded, TimeoutError) as e:
+        logger.warning(f"Price fetch out of request budget, serving stored prices: {e}")
+        return shared_state.latest_prices(num_days, allow_stale=True) or load_fallback_prices(num_days)
 
 
-def prepare_prediction_features(historical_prices: List[Dict[str, Any]], feature_window_size: int = config.FEATURE_WINDOW_SIZE) -> Optional[np.ndarray]:
-    """Prepare features for prediction using historical price data.
+def predict_prices(model_data: Dict[str, Any], X: np.ndarray, days_ahead: int = 7, last_date: Optional[date] = None, block_step: float = 0.0) -> List[Dict[str, Any]]:
+    """Generate price predictions for future days.
     
     Args:
-        historical_prices: List of historical price records.
-        feature_window_size: Number of previous days to use for features.
+        model_data: Dictionary with model and metadata.
+        X: Feature array for the initial prediction.
+        days_ahead: Number of days to predict ahead.
+        last_date: Date of the most recent price in X (defaults to today).
+        block_step: Blocks added per predicted day.
         
     Returns:
-        Optional[np.ndarray]: Feature array for prediction, or None if an error occurs.
+        List[Dict[str, Any]]: List of price predictions with dates.
     """
     try:
-        if len(historical_prices) < feature_window_size:
-            logger.warning(f"Not enough historical data for prediction. Need at least {feature_window_size} days.")
-            return None
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(historical_prices)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
-        # Make sure we have a block column
-        if 'blockHeight' in df.columns and 'block' not in df.columns:
-            df['block'] = df['blockHeight']
-        elif 'block' in df.columns and 'blockHeight' not in df.columns:
-            df['blockHeight'] = df['block']
-        
-        # Sort by timestamp
-        df = df.sort_values('timestamp')
-        
-        # Extract features (similar to what we did in preprocessing)
-        df['day_of_week'] = df['timestamp'].dt.dayofweek
-        df['month'] = df['timestamp'].dt.month
-        df['year'] = df['timestamp'].dt.year
-        
-        # Create rolling features
-        df['price_rolling_mean_7d'] = df['price'].rolling(window=7, min_periods=1).mean()
-        df['price_rolling_std_7d'] = df['price'].rolling(window=7, min_periods=1).std()
-        
-        # Create lag features
-        for lag in range(1, feature_window_size + 1):
-            df[f'price_lag_{lag}'] = df['price'].shift(lag)
-        
-        # Drop rows with NaN values created by lag features
-        df = df.dropna()
-        
-        if len(df) == 0:
-            logger.warning("No data left after feature creation and NaN removal")
-            return None
-            
-        # Select the most recent row for prediction
-        latest_row = df.iloc[-1:]
-        
-        # Expected features in order (this should match what the model was trained with)
-        expected_features = [
-            'blockHeight', 'price', 'day_of_week', 'month', 'year', 
-            'price_rolling_mean_7d', 'price_rolling_std_7d', 
-            'price_lag_1', 'price_lag_2', 'price_lag_3', 'price_lag_4', 'price_lag_5', 
-            'price_lag_6', 'price_lag_7', 'price_lag_8', 'price_lag_9', 'price_lag_10'
-        ]
-        
-        # Use block if blockHeight is missing
-        if 'blockHeight' not in latest_row.columns and 'block' in latest_row.columns:
-            latest_row['blockHeight'] = latest_row['block']
-        
-        # Check if all expected features are available
-        missing_features = [f for f in expected_features if f not in latest_row.columns]
-        if missing_features:
-            logger.warning(f"Missing expected features: {missing_features}")
-            # For missing features, create dummy values
-            for feature in missing_features:
-                if 'lag' in feature:
-                    # For missing lag features, use the last available price
-                    latest_row[feature] = latest_row['price']
-                elif feature == 'blockHeight' and 'block' in latest_row.columns:
-                    latest_row['blockHeight'] = latest_row['block']
-                elif feature == 'price_rolling_std_7d':
-                    latest_row[feature] = 0.1  # Default value
-                else:
-                    latest_row[feature] = 0  # Default value for other features
-            
-        # Convert to numpy array using only the expected features
-        X = latest_row[expected_features].values
+        if last_date is None:
+            last_date = datetime.now().date()
         
-        # Log the feature values for debugging
-        feature_values = dict(zip(expected_features, X[0]))
-        logger.info(f"Feature values for prediction: {feature_values}")
+        # Lag, rolling and calendar features are rebuilt exactly at every step
+        forecaster = RecursiveForecaster.from_features(model_data['model'], X, last_date, block_step)
+        prices = forecaster.forecast(days_ahead)[0]
         
-        logger.info(f"Prepared prediction features with shape {X.shape}")
-        return X
+        return [
+            {'date': (last_date + timedelta(days=day)).isoformat(), 'price': round(float(price), 2)}
+            for day, price in enumerate(prices, start=1)
+        ]
     
     except Exception as e:
-        logger.error(f"Error preparing prediction features: {e}")
-        return None
+        logger.error(f"Error making predictions: {e}")
+        return []
 
 
-def predict_prices(model_data: Dict[str, Any], X: np.ndarray, days_ahead: int = 7) -> List[Dict[str, Any]]:
-    """Generate price predictions for future days.
+def prepare_scenario_forecaster(model_data: Dict[str, Any], X: np.ndarray, overrides: List[Optional[List[float]]], last_date: date, block_step: float = 0.0) -> RecursiveForecaster:
+    """Build one forecast series per scenario from a single prepared feature row.
+    
+    Price overrides replace the tail of the price window (oldest first); every
+    feature is then derived from the resulting windows by the forecaster.
     
     Args:
         model_data: Dictionary with model and metadata.
-        X: Feature array for the initial prediction.
-        days_ahead: Number of days to predict ahead.
+        X: Feature array for the unmodified history, as returned by prepare_prediction_features.
+        overrides: Price overrides per scenario (None keeps the history unchanged).
+        last_date: Date of the most recent price in X.
+        block_step: Blocks added per predicted day.
         
     Returns:
-        List[Dict[str, Any]]: List of price predictions with dates.
+        RecursiveForecaster: Forecaster with one series per entry in overrides.
     """
-    try:
-        model = model_data['model']
-        predictions = []
-        current_features = X.copy()
-        
-        # Get the latest date from the features
-        today = datetime.now().date()
-        
-        for day in range(1, days_ahead + 1):
-            # Make prediction for the next day
-            price_pred = model.predict(current_features)[0]
-            
-            # Sanity check - if prediction is unrealistic, cap it to a reasonable value
-            # Assuming prices should be within 50% of the last price (which is typically X[0, 1])
-            last_price = X[0, 1]  # Assuming price is at index 1 in the feature array
-            if price_pred > last_price * 1.5 or price_pred < last_price * 0.5:
-                # Cap to a reasonable range
-                price_pred = min(max(price_pred, last_price * 0.5), last_price * 1.5)
-                logger.warning(f"Capped unrealistic prediction to {price_pred}")
-            
-            # Calculate the date for this prediction
-            pred_date = today + timedelta(days=day)
-            
-            # Store prediction
-            predictions.append({
-                'date': pred_date.isoformat(),
-                'price': round(float(price_pred), 2)
-            })
-            
-            # Update features for the next prediction
-            # We need to shift lagged prices and update rolling statistics
-            # Assuming the feature order matches what prepare_prediction_features creates
-            
-            # Shift lag features (assuming price_lag_1 through price_lag_N are after the initial features)
-            for i in range(config.FEATURE_WINDOW_SIZE, 1, -1):
-                # Move each lag price to the next position
-                lag_index = i + 6  # Offset of 6 assuming initial features pattern
-                if lag_index - 1 < current_features.shape[1]:
-                    current_features[0, lag_index] = current_features[0, lag_index - 1]
-            
-            # Set lag_1 to current price
-            if 7 < current_features.shape[1]:  # 7 is likely the price_lag_1 index
-                current_features[0, 7] = current_features[0, 1]  # current price becomes lag_1
-            
-            # Update current price
-            current_features[0, 1] = price_pred
-            
-            # Update rolling mean and std (simple approximation)
-            # Assuming indices 5 and 6 are price_rolling_mean_7d and price_rolling_std_7d
-            if 5 < current_features.shape[1]:
-                # Update rolling mean with a simple exponential smoothing
-                current_features[0, 5] = 0.8 * current_features[0, 5] + 0.2 * price_pred
-        
-        return predictions
+    base = RecursiveForecaster.from_features(model_data['model'], X, last_date, block_step)
+    price_windows = np.repeat(base.price_windows(), len(overrides), axis=0)
+    for row, override in enumerate(overrides):
+        if override:
+            tail = np.asarray(override[-base.window:], dtype=float)
+            price_windows[row, -len(tail):] = tail
     
-    except Exception as e:
-        logger.error(f"Error making predictions: {e}")
-        return []
+    return RecursiveForecaster(model_data['model'], price_windows, last_date, X[0, 0], block_step)
 
 
-def get_explanation_from_deepseek(historical_prices: List[Dict[str, Any]], predictions: List[Dict[str, Any]], prompt: str) -> Optional[str]:
+def get_explanation_from_deepseek(historical_prices: List[Dict[str, Any]], predictions: List[Dict[str, Any]], prompt: str, deadline: Optional[Deadline] = None) -> Optional[str]:
     """Get an explanation for the price prediction from DeepSeek AI.
     
     Args:
         historical_prices: List of historical price records.
         predictions: List of predicted price records.
         prompt: User prompt or question about the predictions.
+        deadline: Request deadline bounding the DeepSeek call.
         
     Returns:
-        Optional[str]: Explanation text, or None if an error occurs.
+        Optional[str]: Explanation text, or None if an error occurs or the request budget is spent.
     """
     if not deepseek_api_key:
         logger.warning("DeepSeek API key not set, skipping explanation generation")
         return None
     
+    # Serve repeated questions about the same forecast from the cache
+    cache_key = make_cache_key(prompt, historical_prices, predictions)
+    if explanation_cache is not None:
+        cached_explanation = explanation_cache.get(cache_key)
+        record_cache_lookup("explanation", cached_explanation is not None)
+        if cached_explanation is not None:
+            logger.info("Explanation served from cache")
+            return cached_explanation
+    
+    # Identical questions arriving together wait for the first DeepSeek call
+    deadline = deadline or Deadline(config.PREDICT_DEADLINE)
+    try:
+        return explanation_flight.do(
+            cache_key, request_explanation, historical_prices, predictions, prompt, cache_key,
+            deadline.timeout(config.DEEPSEEK_TIMEOUT, minimum=1.0), wait_timeout=deadline.remaining()
+        )
+    except (DeadlineExceeded, TimeoutError) as e:
+        logger.warning(f"No request budget left for an explanation, returning predictions only: {e}")
+        return None
+
+
+def request_explanation(historical_prices: List[Dict[str, Any]], predictions: List[Dict[str, Any]], prompt: str, cache_key: str, timeout: float = config.DEEPSEEK_TIMEOUT) -> Optional[str]:
+    """Call the DeepSeek API and cache the resulting explanation.
+    
+    Args:
+        historical_prices: List of historical price records.
+        predictions: List of predicted price records.
+        prompt: User prompt or question about the predictions.
+        cache_key: Key under which the explanation is cached.
+        timeout: Seconds to wait for the connection and for each read.
+        
+    Returns:
+        Optional[str]: Explanation text, or None if an error occurs.
+    """
+    # Only workers that actually call DeepSeek pay for importing requests
+    import requests
+    
     try:
         # Format historical prices
         historical_text = "\nHistorical prices:\n"
         for price in historical_prices[-5:]:  # Last 5 days
-            date = pd.to_datetime(price['timestamp']).date().isoformat()
-            historical_text += f"{date}: ${price['price']:.2f}\n"
+            historical_text += f"{price_date(price)}: ${price['price']:.2f}\n"
         
         # Format predictions
         prediction_text = "\nPredicted prices:\n"
@@ -367,35 +386,48 @@ def get_explanation_from_deepseek(historical_prices: List[Dict[str, Any]], predi
             "temperature": 0.7
         }
         
-        response = requests.post(
-            config.DEEPSEEK_API_URL,
-            headers=headers,
-            json=payload
-        )
+        def call_deepseek():
+            response = requests.post(
+                config.DEEPSEEK_API_URL,
+                headers=headers,
+                json=payload,
+                timeout=timeout
+            )
+            response.raise_for_status()  # Raise an error for bad responses
+            return response.json()
         
-        response.raise_for_status()  # Raise an error for bad responses
-        response_data = response.json()
+        response_data = DEEPSEEK_BREAKER.call(call_deepseek)
         
         # Extract the explanation from the response
         explanation = response_data.get("choices", [])[0].get("message", {}).get("content", "").strip()
         if not explanation:
             logger.warning("Empty response from DeepSeek API")
             return "No explanation available at this time."
+        
+        if explanation_cache is not None:
+            explanation_cache.set(cache_key, explanation)
             
         return explanation
     
+    except CircuitOpenError:
+        logger.warning("DeepSeek circuit is open, returning predictions only")
+        return None
     except requests.RequestException as e:
         logger.error(f"Request error from DeepSeek API: {e}")
+        UPSTREAM_ERRORS.labels("deepseek").inc()
         return None
     except Exception as e:
         logger.error(f"Error getting explanation from DeepSeek: {e}")
+        UPSTREAM_ERRORS.labels("deepseek").inc()
         return None
 
 
 # Dependency to get model
 def get_prediction_model() -> Dict[str, Any]:
     try:
-        return load_model()
+        with stage_timer("model_load"):
+            # The shared arrays avoid unpickling a model copy in every worker
+            return shared_state.model_data() or load_model()
     except Exception as e:
         logger.error(f"Could not load model: {e}")
         raise HTTPException(status_code=500, detail="Model not available")
@@ -407,64 +439,355 @@ def health_check():
     return {"status": "healthy", "service": "Cafu00e9Index AI Prediction Service"}
 
 
+@app.get("/metrics", tags=["Health"])
+def metrics():
+    """Prometheus metrics: per-stage latency, cache hit ratios, upstream errors and in-flight requests."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/stream", tags=["Prices"])
+async def stream(request: Request):
+    """Server-sent events with the latest price ('price') and forecast ('forecast').
+    
+    The current state is sent on connect, then every change as it is detected.
+    Idle connections receive a comment every STREAM_HEARTBEAT seconds.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    
+    async def events():
+        queue = broadcaster.subscribe()
+        try:
+            yield b"retry: 5000\n\n"
+            # A reconnecting client that saw the newest event does not need the snapshot again
+            if last_event_id == str(broadcaster.event_id):
+                while not queue.empty():
+                    queue.get_nowait()
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=config.STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield HEARTBEAT
+        finally:
+            broadcaster.unsubscribe(queue)
+    
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/predict", response_model=PredictionResponse, tags=["Prediction"])
 def predict(request: PredictionRequest, model_data: Dict[str, Any] = Depends(get_prediction_model)):
     """Generate coffee price predictions and explanations."""
+    # Every upstream call gets what is left of this budget
+    deadline = Deadline(config.PREDICT_DEADLINE)
     try:
         # Get historical prices
-        historical_prices = get_latest_prices()
+        with stage_timer("price_fetch"):
+            historical_prices = get_latest_prices(deadline=deadline)
         if not historical_prices:
             raise HTTPException(status_code=500, detail="Could not fetch historical price data")
         
-        # Prepare features for prediction
-        X = prepare_prediction_features(historical_prices)
-        if X is None:
-            raise HTTPException(status_code=500, detail="Could not prepare prediction features")
+        # Predictions start the day after the latest price, but never in the past
+        start_date = forecast_start_date(historical_prices)
+        
+        # Serve precomputed numbers when the table matches this model and history
+        with stage_timer("forecast_lookup"):
+            predictions = forecast_table.lookup(model_data, historical_prices, start_date, request.days_ahead)
+        record_cache_lookup("forecast_table", predictions is not None)
         
-        # Generate predictions
-        predictions = predict_prices(model_data, X, days_ahead=request.days_ahead)
+        if predictions is None:
+            # Prepare features for prediction
+            with stage_timer("feature_prep"):
+                X = prepare_prediction_features(historical_prices)
+            if X is None:
+                raise HTTPException(status_code=500, detail="Could not prepare prediction features")
+            
+            # Generate predictions
+            with stage_timer("inference"):
+                predictions = predict_prices(
+                    model_data, X, days_ahead=request.days_ahead,
+                    last_date=start_date - timedelta(days=1),
+                    block_step=get_block_step(historical_prices)
+                )
         if not predictions:
             raise HTTPException(status_code=500, detail="Could not generate predictions")
         
-        # Validate predictions - make sure dates are correct and sequential
-        last_historical_date = pd.to_datetime(historical_prices[-1]["timestamp"]).date()
-        today = datetime.now().date()
-        start_date = max(today, last_historical_date + timedelta(days=1))
-        
-        # Get the latest price as a reference
-        latest_price = historical_prices[-1]["price"]
+        with stage_timer("prediction_validation"):
+            # Get the latest price as a reference
+            latest_price = historical_prices[-1]["price"]
         
-        # Fix dates and validate prices
-        for i, pred in enumerate(predictions):
-            # Fix date
-            pred_date = start_date + timedelta(days=i)
-            predictions[i]["date"] = pred_date.isoformat()
+            # Fix dates and validate prices
+            for i, pred in enumerate(predictions):
+                # Fix date
+                pred_date = start_date + timedelta(days=i)
+                predictions[i]["date"] = pred_date.isoformat()
             
-            # Validate price (should be within a reasonable range of the latest price)
-            if pred["price"] > latest_price * 3 or pred["price"] < latest_price * 0.3:
-                logger.warning(f"Unrealistic prediction detected: {pred['price']}, fixing to be close to {latest_price}")
-                # Use a more reasonable prediction based on latest price plus a small random change
-                predictions[i]["price"] = round(latest_price * (1 + (np.random.random() * 0.1 - 0.05)), 2)
+                # Validate price (should be within a reasonable range of the latest price)
+                if pred["price"] > latest_price * 3 or pred["price"] < latest_price * 0.3:
+                    logger.warning(f"Unrealistic prediction detected: {pred['price']}, fixing to be close to {latest_price}")
+                    # Use a more reasonable prediction based on latest price plus a small random change
+                    predictions[i]["price"] = round(latest_price * (1 + (np.random.random() * 0.1 - 0.05)), 2)
         
         # Get explanation if required
         explanation = None
         if request.explanation_required:
-            explanation = get_explanation_from_deepseek(
-                historical_prices, predictions, request.prompt
+            with stage_timer("explanation"):
+                explanation = get_explanation_from_deepseek(
+                    historical_prices, predictions, request.prompt, deadline
+                )
+        
+        with stage_timer("response_encoding"):
+            # Dates were formatted when the prices were loaded; encode the body directly
+            response = FastJSONResponse(build_prediction_payload(
+                historical_prices, predictions, explanation, columnar=request.columnar
+            ))
+        return response
+    
+    except Exception as e:
+        logger.error(f"Error in predict endpoint: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse, tags=["Prediction"])
+def predict_batch(request: BatchPredictionRequest, model_data: Dict[str, Any] = Depends(get_prediction_model)):
+    """Generate forecasts for many horizons and what-if scenarios in one call.
+    
+    Prices are fetched and features prepared once; scenarios sharing the same
+    overrides share one forecast path since shorter horizons are prefixes of longer ones.
+    The response is columnar: one date axis and one price list per scenario.
+    """
+    if not request.scenarios:
+        raise HTTPException(status_code=422, detail="At least one scenario is required")
+    if len(request.scenarios) > config.BATCH_MAX_SCENARIOS:
+        raise HTTPException(status_code=422, detail=f"At most {config.BATCH_MAX_SCENARIOS} scenarios are allowed")
+    if any(scenario.price_overrides and not np.all(np.isfinite(scenario.price_overrides))
+           for scenario in request.scenarios):
+        raise HTTPException(status_code=422, detail="price_overrides must be finite numbers")
+    
+    deadline = Deadline(config.PREDICT_DEADLINE)
+    try:
+        with stage_timer("price_fetch"):
+            historical_prices = get_latest_prices(deadline=deadline)
+        if not historical_prices:
+            raise HTTPException(status_code=500, detail="Could not fetch historical price data")
+        
+        with stage_timer("feature_prep"):
+            X = prepare_prediction_features(historical_prices)
+        if X is None:
+            raise HTTPException(status_code=500, detail="Could not prepare prediction features")
+        
+        # One forecast path per distinct set of overrides
+        path_index = {}
+        path_overrides = []
+        scenario_paths = []
+        for scenario in request.scenarios:
+            key = tuple(scenario.price_overrides) if scenario.price_overrides else None
+            if key not in path_index:
+                path_index[key] = len(path_overrides)
+                path_overrides.append(scenario.price_overrides)
+            scenario_paths.append(path_index[key])
+        
+        # Same date and plausibility rules as /predict
+        start_date = forecast_start_date(historical_prices)
+        
+        max_days = max(scenario.days_ahead for scenario in request.scenarios)
+        with stage_timer("inference"):
+            forecaster = prepare_scenario_forecaster(
+                model_data, X, path_overrides,
+                last_date=start_date - timedelta(days=1),
+                block_step=get_block_step(historical_prices)
             )
+            paths = forecaster.forecast(max_days)
+        
+        latest_price = forecaster.last_price[:, None]
+        unrealistic = (paths > latest_price * 3) | (paths < latest_price * 0.3)
+        if unrealistic.any():
+            logger.warning(f"Fixing {int(unrealistic.sum())} unrealistic batch predictions")
+            noise = 1 + (np.random.random(paths.shape) * 0.1 - 0.05)
+            paths = np.where(unrealistic, latest_price * noise, paths)
+        paths = np.round(paths, 2)
+        
+        return FastJSONResponse({
+            'dates': [(start_date + timedelta(days=i)).isoformat() for i in range(max_days)],
+            'days_ahead': [scenario.days_ahead for scenario in request.scenarios],
+            'prices': [
+                paths[path, :scenario.days_ahead].tolist()
+                for scenario, path in zip(request.scenarios, scenario_paths)
+            ],
+        })
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in batch predict endpoint: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def range_etag(version: int, *params: Any) -> str:
+    """Build a weak ETag for a price range response.
+    
+    Args:
+        version: Price store version.
+        *params: Query parameters that shape the response.
         
-        # Format historical prices for response
-        formatted_historical = [
-            {"date": pd.to_datetime(p["timestamp"]).date().isoformat(), "price": p["price"]}
-            for p in historical_prices
-        ]
+    Returns:
+        str: ETag header value.
+    """
+    query = "|".join(str(param) for param in (version,) + params)
+    return f'W/"{hashlib.sha1(query.encode("utf-8")).hexdigest()[:20]}"'
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """Return whether the client already holds the response identified by etag."""
+    return etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+
+
+def format_timestamps(timestamps_ms: Any) -> List[str]:
+    """Format milliseconds since the epoch as ISO datetimes (second precision)."""
+    return np.asarray(timestamps_ms, dtype='datetime64[ms]').astype('datetime64[s]').astype(str).tolist()
+
+
+def parse_range_bound(value: Optional[str], end: bool = False) -> Optional[int]:
+    """Convert a /prices range bound to milliseconds since the epoch.
+    
+    Args:
+        value: ISO date or datetime, or Unix epoch in seconds or milliseconds.
+        end: Whether this is the upper bound; a date-only upper bound includes the whole day.
         
-        return PredictionResponse(
-            historical_prices=formatted_historical,
-            predictions=predictions,
-            explanation=explanation
+    Returns:
+        Optional[int]: Milliseconds since the epoch, or None if no bound was given.
+    """
+    if value is None:
+        return None
+    try:
+        bound = parse_timestamps([value])[0]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=422, detail=f"Invalid date: {value}")
+    if end and len(value.strip()) == 10 and '-' in value:
+        bound = bound.astype('datetime64[D]') + np.timedelta64(1, 'D') - np.timedelta64(1, 'ms')
+    return int(bound.astype('datetime64[ms]').astype('int64'))
+
+
+@app.get("/prices", tags=["Prices"])
+def get_prices(
+    request: Request,
+    start: Optional[str] = Query(None, alias="from", description="Inclusive start date or datetime"),
+    end: Optional[str] = Query(None, alias="to", description="Inclusive end date or datetime"),
+    limit: int = Query(config.PRICES_DEFAULT_LIMIT, ge=1, le=config.PRICES_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    """Return historical prices in a time range, oldest first, one page at a time.
+    
+    Reads the indexed local store without touching GraphQL or the model. The ETag
+    changes only when stored prices change, so clients can revalidate with If-None-Match.
+    """
+    if price_store is None:
+        raise HTTPException(status_code=503, detail="Price store not available")
+    
+    with stage_timer("price_range"):
+        etag = range_etag(price_store.version(), start, end, limit, cursor)
+        if not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        
+        # One extra row tells whether another page follows
+        rows = price_store.query_range(parse_range_bound(start), parse_range_bound(end, end=True), limit + 1, after)
+        next_cursor = encode_cursor(rows[limit - 1][0], rows[limit - 1][1]) if len(rows) > limit else None
+        rows = rows[:limit]
+        
+        timestamps = format_timestamps([row[0] for row in rows])
+        return FastJSONResponse(
+            {
+                "prices": [
+                    {"timestamp": timestamp, "date": timestamp[:10], "price": row[3], "block": row[2]}
+                    for timestamp, row in zip(timestamps, rows)
+                ],
+                "next_cursor": next_cursor,
+            },
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
         )
+
+
+@app.get("/prices/ohlc", tags=["Prices"])
+def get_price_ohlc(
+    request: Request,
+    start: Optional[str] = Query(None, alias="from", description="Inclusive start date or datetime"),
+    end: Optional[str] = Query(None, alias="to", description="Inclusive end date or datetime"),
+    interval: str = Query("auto", description="hourly, daily, weekly, monthly or auto"),
+    points: int = Query(config.CHART_DEFAULT_POINTS, ge=1, le=config.CHART_MAX_POINTS),
+):
+    """Return pre-aggregated OHLC and mean buckets for a time range.
     
-    except Exception as e:
-        logger.error(f"Error in predict endpoint: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    With interval=auto the finest interval with at most `points` buckets is used,
+    so the payload size does not grow with the range.
+    """
+    if price_store is None:
+        raise HTTPException(status_code=503, detail="Price store not available")
+    if interval != "auto" and interval not in INTERVALS:
+        raise HTTPException(status_code=422, detail=f"interval must be auto or one of {', '.join(INTERVALS)}")
+    
+    with stage_timer("price_ohlc"):
+        etag = range_etag(price_store.version(), "ohlc", start, end, interval, points)
+        if not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        start_ms, end_ms = parse_range_bound(start), parse_range_bound(end, end=True)
+        counts = price_store.count_rollups(start_ms, end_ms)
+        if interval == "auto":
+            interval = next((name for name in INTERVALS if counts[name] <= points), INTERVALS[-1])
+        elif counts[interval] > points:
+            raise HTTPException(
+                status_code=422,
+                detail=f"The range has {counts[interval]} {interval} buckets, more than points={points}; use a coarser interval or interval=auto"
+            )
+        
+        rows = price_store.rollups(interval, start_ms, end_ms, limit=points)
+        columns = dict(zip(ROLLUP_COLUMNS, zip(*rows))) if rows else {column: () for column in ROLLUP_COLUMNS}
+        return FastJSONResponse(
+            {
+                "interval": interval,
+                "buckets": {
+                    "start": format_timestamps(columns["bucket_ms"]),
+                    **{column: list(columns[column]) for column in ROLLUP_COLUMNS[1:]},
+                },
+            },
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
+        )
+
+
+@app.get("/prices/downsample", tags=["Prices"])
+def get_price_downsample(
+    request: Request,
+    start: Optional[str] = Query(None, alias="from", description="Inclusive start date or datetime"),
+    end: Optional[str] = Query(None, alias="to", description="Inclusive end date or datetime"),
+    points: int = Query(config.CHART_DEFAULT_POINTS, ge=3, le=config.CHART_MAX_POINTS),
+):
+    """Return at most `points` raw prices that preserve the shape of the range (LTTB)."""
+    if price_store is None:
+        raise HTTPException(status_code=503, detail="Price store not available")
+    
+    with stage_timer("price_downsample"):
+        etag = range_etag(price_store.version(), "downsample", start, end, points)
+        if not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        timestamps_ms, prices, _ = price_store.load_arrays(parse_range_bound(start), parse_range_bound(end, end=True))
+        keep = lttb_indices(timestamps_ms.astype(np.float64), prices, points)
+        return FastJSONResponse(
+            {
+                "timestamps": format_timestamps(timestamps_ms[keep]),
+                "prices": prices[keep].tolist(),
+                "source_points": len(prices),
+            },
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
+        )
+
+
+tracked_paths.update(route.path for route in app.routes)
@@ -0,0 +1,154 @@
+"""Server-sent event fan-out for the prediction service.
+
+One producer task per worker watches the price store version and the
+forecast table for changes, encodes each update once and hands the same
+bytes to every subscriber's queue. Clients keep a single `/stream`
+connection open instead of polling, and receive the latest state as soon
+as they connect.
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from prediction_service.metrics import Counter, Gauge
+from prediction_service.responses import encode_json
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+STREAM_SUBSCRIBERS = Gauge("cafeindex_stream_subscribers", "Open /stream connections.")
+STREAM_EVENTS = Counter("cafeindex_stream_events_total", "Events published to /stream subscribers.", ["event"])
+STREAM_DROPPED = Counter("cafeindex_stream_dropped_total", "Events dropped for subscribers that fell behind.")
+
+HEARTBEAT = b": ping\n\n"
+
+
+def format_event(event: str, event_id: int, data: Any) -> bytes:
+    """Encode one server-sent event.
+
+    Args:
+        event: Event name, e.g. 'price'.
+        event_id: Monotonic id clients send back as Last-Event-ID.
+        data: JSON-serializable payload.
+
+    Returns:
+        bytes: Event in the text/event-stream format.
+    """
+    return b"event: " + event.encode() + b"\nid: " + str(event_id).encode() + b"\ndata: " + encode_json(data) + b"\n\n"
+
+
+class Broadcaster:
+    """Fan out encoded events from one producer to many subscribers."""
+
+    def __init__(self, queue_size: int = 16):
+        """Create a broadcaster.
+
+        Args:
+            queue_size: Events buffered per subscriber before the oldest is dropped.
+        """
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._latest: Dict[str, bytes] = {}
+        self._event_id = 0
+        self._subscriber_gauge = STREAM_SUBSCRIBERS.labels()
+        self._dropped = STREAM_DROPPED.labels()
+
+    @property
+    def event_id(self) -> int:
+        return self._event_id
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber, pre-filled with the latest event of each kind."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        for message in self._latest.values():
+            queue.put_nowait(message)
+        self._subscribers.add(queue)
+        self._subscriber_gauge.set(len(self._subscribers))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        self._subscriber_gauge.set(len(self._subscribers))
+
+    def publish(self, event: str, data: Any) -> None:
+        """Encode an event once and queue it for every subscriber.
+
+        Must be called from the event loop thread.
+
+        Args:
+            event: Event name.
+            data: JSON-serializable payload.
+        """
+        self._event_id += 1
+        message = format_event(event, self._event_id, data)
+        self._latest[event] = message
+        STREAM_EVENTS.labels(event).inc()
+        for queue in list(self._subscribers):
+            if queue.full():
+                # A slow client only misses intermediate updates, never the newest one
+                queue.get_nowait()
+                self._dropped.inc()
+            queue.put_nowait(message)
+
+
+class ChangeWatcher:
+    """Producer that publishes an event whenever a watched source changes."""
+
+    def __init__(self, broadcaster: Broadcaster, interval: float):
+        """Create a watcher.
+
+        Args:
+            broadcaster: Destination of the events.
+            interval: Seconds between checks of the sources.
+        """
+        self.broadcaster = broadcaster
+        self.interval = interval
+        self._sources: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def watch(self, event: str, version: Callable[[], Any], payload: Callable[[], Optional[Dict[str, Any]]]) -> None:
+        """Publish `event` with payload() whenever version() returns a new value.
+
+        Args:
+            event: Event name.
+            version: Cheap function identifying the current state of the source.
+            payload: Function building the event payload, or returning None to skip it.
+        """
+        self._sources.append({'event': event, 'version': version, 'payload': payload, 'last': None})
+
+    async def check(self) -> None:
+        """Check every source once and publish the ones that changed."""
+        loop = asyncio.get_running_loop()
+        for source in self._sources:
+            try:
+                # Sources read files and SQLite; keep that off the event loop
+                version = await loop.run_in_executor(None, source['version'])
+                if version is None or version == source['last']:
+                    continue
+                payload = await loop.run_in_executor(None, source['payload'])
+                source['last'] = version
+                if payload is not None:
+                    self.broadcaster.publish(source['event'], payload)
+            except Exception as e:
+                logger.error(f"Error checking {source['event']} updates: {e}")
+
+    async def run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,237 @@
+"""Data access and feature preparation for the prediction service.
+
+This module loads the trained model and the latest coffee prices and turns
+them into feature rows. It has no web framework dependency, so the pipeline
+and background jobs can share it with the FastAPI app.
+"""
+
+import csv
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from data_indexing.indexer import fetch_coffee_prices
+from data_processing.features import extract_latest_features, parse_timestamps
+from prediction_service.metrics import UPSTREAM_ERRORS
+from prediction_service.resilience import GRAPHQL_BREAKER, CircuitOpenError
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def load_model(model_path: str = config.MODEL_PATH) -> Dict[str, Any]:
+    """Load the trained model from disk.
+    
+    Args:
+        model_path: Path to the saved model file.
+        
+    Returns:
+        Dict[str, Any]: Dictionary with model and metadata.
+    """
+    try:
+        if not os.path.exists(model_path):
+            logger.error(f"Model file not found: {model_path}")
+            raise FileNotFoundError(f"Model file not found: {model_path}")
+        
+        # joblib and the scikit-learn classes it unpickles load only when there is no shared model
+        import joblib
+        model_data = joblib.load(model_path)
+        logger.info(f"Loaded model: {model_data['model_name']}")
+        return model_data
+    
+    except Exception as e:
+        logger.error(f"Error loading model: {e}")
+        raise e
+
+
+def select_latest_records(records: List[Dict[str, Any]], num_days: int) -> List[Dict[str, Any]]:
+    """Sort price records by timestamp and keep the most recent ones.
+    
+    Timestamps are normalized to ISO strings, and response dates formatted, so later
+    stages do not parse them again.
+    
+    Args:
+        records: Price records in any order.
+        num_days: Number of records to keep.
+        
+    Returns:
+        List[Dict[str, Any]]: The most recent records in ascending timestamp order.
+    """
+    timestamps = parse_timestamps([record['timestamp'] for record in records])
+    latest = []
+    for i in np.argsort(timestamps, kind='stable')[-num_days:]:
+        record = dict(records[i])
+        record['timestamp'] = str(timestamps[i].astype('datetime64[s]'))
+        record['date'] = record['timestamp'][:10]
+        # Convert blockHeight to block if needed
+        if 'blockHeight' in record and 'block' not in record:
+            record['block'] = record['blockHeight']
+        latest.append(record)
+    return latest
+
+
+def read_price_csv(csv_path: str) -> List[Dict[str, Any]]:
+    """Read price records from a CSV file without pandas.
+    
+    Args:
+        csv_path: Path to the CSV file.
+        
+    Returns:
+        List[Dict[str, Any]]: Records with numeric price and block fields.
+    """
+    with open(csv_path, newline='') as f:
+        records = list(csv.DictReader(f))
+    for record in records:
+        record['price'] = float(record['price'])
+        for field in ('blockHeight', 'block'):
+            if record.get(field):
+                record[field] = int(float(record[field]))
+    return records
+
+
+def record_dates(historical_prices: List[Dict[str, Any]]) -> np.ndarray:
+    """Return the calendar date of each price record.
+    
+    Args:
+        historical_prices: List of historical price records.
+        
+    Returns:
+        np.ndarray: Array of dtype datetime64[D].
+    """
+    return parse_timestamps([p['timestamp'] for p in historical_prices]).astype('datetime64[D]')
+
+
+def load_fallback_prices(num_days: int = 30) -> List[Dict[str, Any]]:
+    """Load the latest coffee prices from the local CSV file, or dummy data if it is missing.
+    
+    Args:
+        num_days: Number of days of historical data to retrieve.
+        
+    Returns:
+        List[Dict[str, Any]]: List of recent coffee price records.
+    """
+    try:
+        csv_path = config.RAW_DATA_PATH
+        if os.path.exists(csv_path):
+            logger.info(f"Loading coffee prices from local file: {csv_path}")
+            return select_latest_records(read_price_csv(csv_path), num_days)
+        
+        # Generate dummy data for demonstration purposes
+        logger.warning("Local CSV file not found, using dummy data for demonstration")
+        base_price = 3.5
+        today = datetime.now()
+        dummy_prices = []
+        for i in range(num_days, 0, -1):
+            day = today - timedelta(days=i)
+            # Add some random variation to the price
+            price = base_price + (np.random.random() - 0.5) * 0.2
+            base_price = price  # Update for next iteration
+            dummy_prices.append({
+                'timestamp': day.isoformat(),
+                'date': day.date().isoformat(),
+                'price': round(price, 2),
+                'block': 10000 + i
+            })
+        return dummy_prices
+    
+    except Exception as e:
+        logger.error(f"Error loading fallback prices: {e}")
+        return []
+
+
+def load_latest_prices(num_days: int = 30, timeout: Optional[float] = config.GRAPHQL_TIMEOUT) -> List[Dict[str, Any]]:
+    """Load the latest coffee prices from the SubQuery GraphQL endpoint.
+    
+    Falls back to the local CSV file, then to dummy data, if GraphQL has no prices,
+    fails, or its circuit is open.
+    
+    Args:
+        num_days: Number of days of historical data to retrieve.
+        timeout: Seconds to wait for GraphQL.
+        
+    Returns:
+        List[Dict[str, Any]]: List of recent coffee price records.
+    """
+    try:
+        # Try to fetch prices from GraphQL endpoint
+        try:
+            coffee_prices = GRAPHQL_BREAKER.call(fetch_coffee_prices, raise_errors=True, timeout=timeout)
+        except CircuitOpenError:
+            logger.warning("GraphQL circuit is open, skipping the request")
+            coffee_prices = []
+        except Exception:
+            UPSTREAM_ERRORS.labels("graphql").inc()
+            coffee_prices = []
+        
+        if not coffee_prices:
+            logger.warning("No coffee prices found from GraphQL, trying local CSV file")
+            return load_fallback_prices(num_days)
+        
+        # Process and return only the most recent prices
+        return select_latest_records(coffee_prices, num_days)
+    
+    except Exception as e:
+        logger.error(f"Error getting latest prices: {e}")
+        return []
+
+
+def prepare_prediction_features(historical_prices: List[Dict[str, Any]], feature_window_size: int = config.FEATURE_WINDOW_SIZE) -> Optional[np.ndarray]:
+    """Prepare features for prediction using historical price data.
+    
+    Works directly on NumPy arrays through the shared feature definitions in
+    data_processing.features, so the result matches create_features in training.
+    
+    Args:
+        historical_prices: List of historical price records.
+        feature_window_size: Number of previous days to use for features.
+        
+    Returns:
+        Optional[np.ndarray]: Feature array for prediction, or None if an error occurs.
+    """
+    try:
+        timestamps = parse_timestamps([p['timestamp'] for p in historical_prices])
+        order = np.argsort(timestamps, kind='stable')
+        prices = np.array([float(historical_prices[i]['price']) for i in order])
+        # Use block if blockHeight is missing
+        blocks = np.array([
+            float(historical_prices[i].get('blockHeight', historical_prices[i].get('block', 0)))
+            for i in order
+        ])
+        
+        X = extract_latest_features(timestamps[order], prices, blocks, feature_window_size)
+        if X is None:
+            logger.warning(f"Not enough historical data for prediction. Need at least {feature_window_size + 1} days.")
+            return None
+        
+        logger.debug(f"Prepared prediction features with shape {X.shape}: {X[0].tolist()}")
+        return X
+    
+    except Exception as e:
+        logger.error(f"Error preparing prediction features: {e}")
+        return None
+
+
+def get_block_step(historical_prices: List[Dict[str, Any]]) -> float:
+    """Estimate how many blocks separate consecutive price records.
+    
+    Args:
+        historical_prices: List of historical price records.
+        
+    Returns:
+        float: Block delta between the two most recent records, or 0 if unknown.
+    """
+    if len(historical_prices) < 2:
+        return 0.0
+    previous, latest = historical_prices[-2], historical_prices[-1]
+    try:
+        return float(latest.get('blockHeight', latest.get('block'))) - float(previous.get('blockHeight', previous.get('block')))
+    except (TypeError, ValueError):
+        return 0.0
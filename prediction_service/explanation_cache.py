@@ -0,0 +1,179 @@
+"""Persistent cache for DeepSeek explanations.
+
+This module stores generated explanations in a small SQLite database so that
+repeated questions about the same forecast are answered without a new API call.
+The database lives on disk, which means entries survive restarts and are shared
+by every uvicorn worker pointing at the same file.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterator
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a user prompt so that trivially different questions share a key.
+
+    Args:
+        prompt: Raw user prompt.
+
+    Returns:
+        str: Lowercased prompt with collapsed whitespace and no trailing punctuation.
+    """
+    normalized = re.sub(r"\s+", " ", prompt or "").strip().lower()
+    return normalized.rstrip("?!.,;: ")
+
+
+def series_hash(historical_prices: List[Dict[str, Any]], predictions: List[Dict[str, Any]]) -> str:
+    """Hash the historical and predicted series an explanation was generated for.
+
+    Args:
+        historical_prices: List of historical price records.
+        predictions: List of predicted price records.
+
+    Returns:
+        str: Hex digest identifying both series.
+    """
+    payload = {
+        "historical": [[str(p.get("timestamp", p.get("date"))), round(float(p["price"]), 4)] for p in historical_prices],
+        "predictions": [[str(p["date"]), round(float(p["price"]), 4)] for p in predictions],
+    }
+    return hashlib.sha256(json.dumps(payload, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def make_cache_key(prompt: str, historical_prices: List[Dict[str, Any]], predictions: List[Dict[str, Any]]) -> str:
+    """Build the cache key for an explanation request.
+
+    Args:
+        prompt: User prompt or question about the predictions.
+        historical_prices: List of historical price records.
+        predictions: List of predicted price records.
+
+    Returns:
+        str: Cache key combining the normalized prompt and the series hash.
+    """
+    prompt_digest = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+    return f"{prompt_digest}:{series_hash(historical_prices, predictions)}"
+
+
+class ExplanationCache:
+    """SQLite-backed explanation cache with TTL expiry and LRU eviction."""
+
+    def __init__(self, db_path: str = config.EXPLANATION_CACHE_PATH,
+                 ttl_seconds: int = config.EXPLANATION_CACHE_TTL,
+                 max_entries: int = config.EXPLANATION_CACHE_MAX_ENTRIES):
+        """Open (and create if needed) the cache database.
+
+        Args:
+            db_path: Path to the SQLite database file.
+            ttl_seconds: Time after which an entry is considered stale.
+            max_entries: Maximum number of entries kept before evicting the least recently used.
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._init_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one transaction (committed, or rolled back on error) and close it."""
+        # Several workers may write at once; wait for the lock instead of failing
+        conn = sqlite3.connect(self.db_path, timeout=5.0)
+        try:
+            conn.execute("PRAGMA busy_timeout = 5000")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS explanations (
+                    key TEXT PRIMARY KEY,
+                    explanation TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_explanations_last_access ON explanations (last_access)"
+            )
+        logger.info(f"Explanation cache ready at {self.db_path}")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached explanation, or None if missing or expired.
+
+        Args:
+            key: Cache key from make_cache_key.
+
+        Returns:
+            Optional[str]: Cached explanation text.
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT explanation, created_at FROM explanations WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                explanation, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM explanations WHERE key = ?", (key,))
+                    return None
+
+                conn.execute("UPDATE explanations SET last_access = ? WHERE key = ?", (now, key))
+                return explanation
+
+        except sqlite3.Error as e:
+            logger.error(f"Error reading explanation cache: {e}")
+            return None
+
+    def set(self, key: str, explanation: str) -> None:
+        """Store an explanation and evict the least recently used entries over the limit.
+
+        Args:
+            key: Cache key from make_cache_key.
+            explanation: Explanation text to store.
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO explanations (key, explanation, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, explanation, now, now)
+                )
+                conn.execute("DELETE FROM explanations WHERE created_at < ?", (now - self.ttl_seconds,))
+                conn.execute(
+                    """
+                    DELETE FROM explanations WHERE key IN (
+                        SELECT key FROM explanations ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,)
+                )
+
+        except sqlite3.Error as e:
+            logger.error(f"Error writing explanation cache: {e}")
@@ -0,0 +1,174 @@
+"""Precomputed forecast table for the prediction service.
+
+Forecasts only change when a new price is indexed or a new model is trained,
+so the pipeline and the indexer write the forecast path for every horizon up
+to FORECAST_MAX_DAYS into a small JSON table. Recursive forecasts for shorter
+horizons are prefixes of the longest one, so a single path covers them all.
+The service keeps the table in memory and serves numbers straight from it
+while the table still matches its model, price history and start date.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from prediction_service.data import (
+    get_block_step, load_latest_prices, load_model, prepare_prediction_features, record_dates,
+)
+from prediction_service.forecaster import RecursiveForecaster
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def forecast_start_date(historical_prices: List[Dict[str, Any]]) -> date:
+    """Return the first forecast date: the day after the latest price, but never in the past.
+
+    Args:
+        historical_prices: List of historical price records.
+
+    Returns:
+        date: Date of the first predicted price.
+    """
+    last_historical_date = record_dates(historical_prices[-1:])[0].item()
+    return max(datetime.now().date(), last_historical_date + timedelta(days=1))
+
+
+def build_forecast_table(max_days: int = config.FORECAST_MAX_DAYS) -> Optional[Dict[str, Any]]:
+    """Compute the forecast path for every horizon up to max_days.
+
+    Args:
+        max_days: Longest horizon to precompute.
+
+    Returns:
+        Optional[Dict[str, Any]]: Forecast table, or None if an error occurs.
+    """
+    try:
+        model_data = load_model()
+        historical_prices = load_latest_prices()
+        if not historical_prices:
+            logger.warning("No price data available, forecast table not built")
+            return None
+
+        X = prepare_prediction_features(historical_prices)
+        if X is None:
+            logger.warning("Could not prepare features, forecast table not built")
+            return None
+
+        start_date = forecast_start_date(historical_prices)
+        forecaster = RecursiveForecaster.from_features(
+            model_data['model'], X, start_date - timedelta(days=1), get_block_step(historical_prices)
+        )
+        prices = forecaster.forecast(max_days)[0]
+
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'model_timestamp': model_data.get('timestamp'),
+            'last_timestamp': str(historical_prices[-1]['timestamp']),
+            'start_date': start_date.isoformat(),
+            'max_days': max_days,
+            'prices': [round(float(price), 2) for price in prices],
+        }
+
+    except Exception as e:
+        logger.error(f"Error building forecast table: {e}")
+        return None
+
+
+def refresh_forecast_table(table_path: str = config.FORECAST_TABLE_PATH,
+                           max_days: int = config.FORECAST_MAX_DAYS) -> bool:
+    """Rebuild the forecast table and atomically replace the file on disk.
+
+    Args:
+        table_path: Path of the forecast table file.
+        max_days: Longest horizon to precompute.
+
+    Returns:
+        bool: True if the table was written, False otherwise.
+    """
+    table = build_forecast_table(max_days)
+    if table is None:
+        return False
+
+    try:
+        os.makedirs(os.path.dirname(table_path) or ".", exist_ok=True)
+        tmp_path = f"{table_path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(table, f)
+        # Readers see either the old or the new table, never a partial file
+        os.replace(tmp_path, table_path)
+        logger.info(f"Forecast table with {max_days} days written to {table_path}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error writing forecast table to {table_path}: {e}")
+        return False
+
+
+class ForecastTable:
+    """In-memory view of the forecast table file, reloaded when the file changes."""
+
+    def __init__(self, table_path: str = config.FORECAST_TABLE_PATH):
+        self.table_path = table_path
+        self._table = None
+        self._mtime_ns = None
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[Dict[str, Any]]:
+        """Return the table on disk, reloading it if the file changed, or None if there is none."""
+        try:
+            mtime_ns = os.stat(self.table_path).st_mtime_ns
+        except OSError:
+            return None
+
+        if mtime_ns != self._mtime_ns:
+            with self._lock:
+                if mtime_ns != self._mtime_ns:
+                    try:
+                        with open(self.table_path) as f:
+                            self._table = json.load(f)
+                    except (OSError, ValueError) as e:
+                        logger.error(f"Error loading forecast table: {e}")
+                        self._table = None
+                    self._mtime_ns = mtime_ns
+        return self._table
+
+    def lookup(self, model_data: Dict[str, Any], historical_prices: List[Dict[str, Any]],
+               start_date: date, days_ahead: int) -> Optional[List[Dict[str, Any]]]:
+        """Return precomputed predictions if the table matches the current inputs.
+
+        Args:
+            model_data: Dictionary with model and metadata.
+            historical_prices: List of historical price records the request uses.
+            start_date: Date of the first predicted price.
+            days_ahead: Number of days to predict ahead.
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: Predictions with dates, or None if the table is missing or stale.
+        """
+        table = self.current()
+        if (
+            table is None
+            or days_ahead > table['max_days']
+            or table['model_timestamp'] != model_data.get('timestamp')
+            or table['last_timestamp'] != str(historical_prices[-1]['timestamp'])
+            or table['start_date'] != start_date.isoformat()
+        ):
+            return None
+
+        return [
+            {'date': (start_date + timedelta(days=i)).isoformat(), 'price': price}
+            for i, price in enumerate(table['prices'][:days_ahead])
+        ]
+
+
+if __name__ == "__main__":
+    refresh_forecast_table()
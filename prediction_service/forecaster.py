@@ -0,0 +1,155 @@
+"""Recursive multi-step forecaster for coffee prices.
+
+This module keeps the most recent prices of one or more independent series in a
+ring buffer and rebuilds the model's feature row exactly at every step, so lag,
+rolling and calendar features stay consistent with training for any horizon.
+All series advance in lockstep with a single batched model call per step.
+"""
+
+import logging
+import os
+from datetime import date
+from typing import Any, Sequence, Union
+
+import numpy as np
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from data_processing.features import ROLLING_WINDOW, calendar_features
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+MAX_STEP_CHANGE = 0.5  # Predictions are capped to within 50% of the last known price
+
+
+class RecursiveForecaster:
+    """Advance many independent price series step by step with exact features."""
+
+    def __init__(self, model: Any, price_windows: np.ndarray, last_dates: Union[date, Sequence[date], np.ndarray],
+                 block_heights: Union[float, np.ndarray], block_steps: Union[float, np.ndarray] = 0.0,
+                 feature_window_size: int = config.FEATURE_WINDOW_SIZE):
+        """Initialize the forecaster state.
+
+        Args:
+            model: Fitted regressor exposing predict(X).
+            price_windows: Most recent prices per series, oldest first, with shape (series, window).
+            last_dates: Date of the newest price, either shared or one per series.
+            block_heights: Block height of the newest price, shared or per series.
+            block_steps: Blocks added per forecast step, shared or per series.
+            feature_window_size: Number of lag features the model expects.
+        """
+        price_windows = np.atleast_2d(np.asarray(price_windows, dtype=float))
+        n_series, available = price_windows.shape
+
+        self.model = model
+        self.feature_window_size = feature_window_size
+        self.window = max(feature_window_size + 1, ROLLING_WINDOW)
+        if available < self.window:
+            raise ValueError(f"Need at least {self.window} prices per series, got {available}")
+
+        # Ring buffer holding the last `window` prices; `_head` points at the newest one
+        self._buffer = price_windows[:, -self.window:].copy()
+        self._head = self.window - 1
+        self._offsets = np.arange(self.window)
+
+        self._dates = np.broadcast_to(np.asarray(last_dates, dtype='datetime64[D]'), (n_series,)).copy()
+        self._blocks = np.broadcast_to(np.asarray(block_heights, dtype=float), (n_series,)).copy()
+        self._block_steps = np.broadcast_to(np.asarray(block_steps, dtype=float), (n_series,)).copy()
+
+        # Sanity caps are anchored on the last observed price, as in the original forecaster
+        self.last_price = self._buffer[:, -1].copy()
+
+    @classmethod
+    def from_features(cls, model: Any, X: np.ndarray, last_date: date, block_step: float = 0.0,
+                      feature_window_size: int = config.FEATURE_WINDOW_SIZE) -> 'RecursiveForecaster':
+        """Build a forecaster from feature rows produced by prepare_prediction_features.
+
+        The current price and its lags already describe the full price window.
+
+        Args:
+            model: Fitted regressor exposing predict(X).
+            X: Feature rows with shape (series, features).
+            last_date: Date of the newest price.
+            block_step: Blocks added per forecast step.
+            feature_window_size: Number of lag features in X.
+
+        Returns:
+            RecursiveForecaster: Forecaster positioned at the rows of X.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        lags = X[:, 7:7 + feature_window_size]
+        price_windows = np.column_stack([lags[:, ::-1], X[:, 1]])
+        return cls(model, price_windows, last_date, X[:, 0], block_step, feature_window_size)
+
+    @property
+    def n_series(self) -> int:
+        return self._buffer.shape[0]
+
+    def _ordered_prices(self) -> np.ndarray:
+        # Newest price first: column k holds the price k steps back
+        return self._buffer[:, (self._head - self._offsets) % self.window]
+
+    def price_windows(self) -> np.ndarray:
+        """Return the current price window of every series, oldest first.
+
+        Returns:
+            np.ndarray: Prices with shape (series, window).
+        """
+        return self._ordered_prices()[:, ::-1]
+
+    def features(self) -> np.ndarray:
+        """Build the feature matrix for the current state of every series.
+
+        Returns:
+            np.ndarray: Features in training order with shape (series, 7 + feature_window_size).
+        """
+        prices = self._ordered_prices()
+        recent = prices[:, :ROLLING_WINDOW]
+
+        return np.column_stack([
+            self._blocks,
+            prices[:, 0],
+            calendar_features(self._dates),
+            recent.mean(axis=1),
+            recent.std(axis=1, ddof=1),
+            prices[:, 1:self.feature_window_size + 1],
+        ])
+
+    def step(self) -> np.ndarray:
+        """Predict the next price of every series and push it into the state.
+
+        Returns:
+            np.ndarray: Predicted prices with shape (series,).
+        """
+        price_pred = np.asarray(self.model.predict(self.features()), dtype=float)
+
+        lower = self.last_price * (1 - MAX_STEP_CHANGE)
+        upper = self.last_price * (1 + MAX_STEP_CHANGE)
+        capped = (price_pred < lower) | (price_pred > upper)
+        if capped.any():
+            logger.warning(f"Capped {int(capped.sum())} unrealistic predictions")
+            price_pred = np.clip(price_pred, lower, upper)
+
+        self._head = (self._head + 1) % self.window
+        self._buffer[:, self._head] = price_pred
+        self._dates += np.timedelta64(1, 'D')
+        self._blocks += self._block_steps
+        return price_pred
+
+    def forecast(self, days_ahead: int) -> np.ndarray:
+        """Advance every series a number of steps.
+
+        Args:
+            days_ahead: Number of steps to predict.
+
+        Returns:
+            np.ndarray: Predicted prices with shape (series, days_ahead).
+        """
+        predictions = np.empty((self.n_series, days_ahead))
+        for day in range(days_ahead):
+            predictions[:, day] = self.step()
+        return predictions
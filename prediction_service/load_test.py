@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+"""Load test for the prediction service with local upstream stand-ins.
+
+This script starts stub servers for the SubQuery GraphQL endpoint and the
+DeepSeek API (with configurable latency), launches `prediction_service.app`
+under uvicorn pointed at them, drives it at a configurable concurrency and
+writes latency percentiles and throughput to a JSON results file. Passing
+`--baseline` compares the run against a previous results file and exits with
+a non-zero status when latency or throughput regress beyond a tolerance.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import socket
+import subprocess
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+import numpy as np
+import requests
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RESULTS_PATH = os.path.join(config.DATA_DIR, "load_test_results.json")
+
+
+def load_stub_prices(csv_path: str = config.RAW_DATA_PATH) -> List[Dict[str, Any]]:
+    """Build GraphQL coffee price nodes from the raw CSV file.
+
+    Args:
+        csv_path: Path to the raw price CSV file.
+
+    Returns:
+        List[Dict[str, Any]]: Nodes shaped like the SubQuery response (timestamps in ms).
+    """
+    with open(os.path.join(PROJECT_ROOT, csv_path), newline='') as f:
+        rows = list(csv.DictReader(f))
+    return [
+        {
+            'id': row['id'],
+            'timestamp': str(int(datetime.fromisoformat(row['timestamp']).timestamp() * 1000)),
+            'blockHeight': int(row['blockHeight']),
+            'price': float(row['price']),
+        }
+        for row in rows
+    ]
+
+
+def make_stub_handler(latency: float, body: bytes):
+    """Create a request handler that answers every POST with a fixed body after a delay."""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def start_stub_server(latency: float, payload: Dict[str, Any]) -> ThreadingHTTPServer:
+    """Start a stub upstream on a free local port in a background thread.
+
+    Args:
+        latency: Seconds to wait before answering each request.
+        payload: JSON response body.
+
+    Returns:
+        ThreadingHTTPServer: Running server (call shutdown() to stop it).
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_stub_handler(latency, json.dumps(payload).encode()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_service(port: int, workers: int, graphql_url: str, deepseek_url: str) -> subprocess.Popen:
+    """Launch the prediction service under uvicorn and wait until it answers.
+
+    Args:
+        port: Port to bind.
+        workers: Number of uvicorn worker processes.
+        graphql_url: URL of the GraphQL stub.
+        deepseek_url: URL of the DeepSeek stub.
+
+    Returns:
+        subprocess.Popen: Running service process.
+    """
+    env = dict(os.environ)
+    env.update({
+        'SUBQL_GRAPHQL_ENDPOINT': graphql_url,
+        'DEEPSEEK_API_URL': deepseek_url,
+        'DEEPSEEK_API_KEY': 'load-test',
+    })
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'prediction_service.app:app',
+         '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers), '--log-level', 'warning'],
+        cwd=PROJECT_ROOT, env=env
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Prediction service exited during startup")
+        try:
+            if requests.get(f"{base_url}/", timeout=1).ok:
+                return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Prediction service did not become ready in time")
+
+
+def drive_load(base_url: str, endpoint: str, payloads: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    """Send every payload to the service using a fixed number of concurrent clients.
+
+    Args:
+        base_url: Service base URL.
+        endpoint: Path to call, e.g. '/predict'.
+        payloads: Request bodies, consumed in order.
+        concurrency: Number of concurrent client threads.
+
+    Returns:
+        Dict[str, Any]: Latencies in seconds, error count and wall-clock duration.
+    """
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    next_index = iter(range(len(payloads)))
+
+    def client():
+        nonlocal errors
+        session = requests.Session()
+        while True:
+            with lock:
+                index = next(next_index, None)
+            if index is None:
+                return
+            start = time.perf_counter()
+            try:
+                ok = session.post(f"{base_url}{endpoint}", json=payloads[index], timeout=120).ok
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors += 0 if ok else 1
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {'latencies': latencies, 'errors': errors, 'duration': time.perf_counter() - start}
+
+
+def build_payloads(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    if args.endpoint == '/predict/batch':
+        scenarios = [{'days_ahead': days} for days in range(1, args.days_ahead + 1)]
+        return [{'scenarios': scenarios} for _ in range(args.requests)]
+    return [
+        {
+            # Distinct prompts bypass the explanation cache and request coalescing
+            'prompt': f"How will coffee prices change? #{i}" if args.unique_prompts else "How will coffee prices change?",
+            'days_ahead': args.days_ahead,
+            'explanation_required': args.explanation,
+        }
+        for i in range(args.requests)
+    ]
+
+
+def summarize(run: Dict[str, Any]) -> Dict[str, float]:
+    latencies_ms = np.array(run['latencies']) * 1000
+    return {
+        'requests': len(latencies_ms),
+        'errors': run['errors'],
+        'duration_s': round(run['duration'], 3),
+        'requests_per_s': round(len(latencies_ms) / run['duration'], 2) if run['duration'] else 0.0,
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies_ms, 95)), 2),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 2),
+        'max_ms': round(float(latencies_ms.max()), 2),
+    }
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline_path: str, tolerance: float) -> bool:
+    """Check a run against a baseline results file.
+
+    Args:
+        results: Results of the current run.
+        baseline_path: Path to a previous results file.
+        tolerance: Allowed relative regression, e.g. 0.1 for 10%.
+
+    Returns:
+        bool: True if no metric regressed beyond the tolerance.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)['summary']
+    summary = results['summary']
+
+    ok = True
+    for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+        if summary[metric] > baseline[metric] * (1 + tolerance):
+            logger.error(f"{metric} regressed: {summary[metric]} ms vs baseline {baseline[metric]} ms")
+            ok = False
+    if summary['requests_per_s'] < baseline['requests_per_s'] * (1 - tolerance):
+        logger.error(f"Throughput regressed: {summary['requests_per_s']} req/s vs baseline {baseline['requests_per_s']} req/s")
+        ok = False
+    if summary['errors'] > baseline['errors']:
+        logger.error(f"More errors than baseline: {summary['errors']} vs {baseline['errors']}")
+        ok = False
+    return ok
+
+
+def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    """Start the stubs and the service, run the load and collect results."""
+    graphql = start_stub_server(args.graphql_latency_ms / 1000,
+                                {'data': {'coffeePrices': {'nodes': load_stub_prices()}}})
+    deepseek = start_stub_server(args.deepseek_latency_ms / 1000,
+                                 {'choices': [{'message': {'content': "Stub explanation for load testing."}}]})
+    port = args.port or free_port()
+    service = start_service(
+        port, args.workers,
+        f"http://127.0.0.1:{graphql.server_address[1]}/graphql",
+        f"http://127.0.0.1:{deepseek.server_address[1]}/v1/chat/completions"
+    )
+
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        payloads = build_payloads(args)
+        if args.warmup:
+            drive_load(base_url, args.endpoint, payloads[:args.warmup], min(args.concurrency, args.warmup))
+        run = drive_load(base_url, args.endpoint, payloads, args.concurrency)
+    finally:
+        service.terminate()
+        service.wait(timeout=30)
+        graphql.shutdown()
+        deepseek.shutdown()
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'config': {
+            'endpoint': args.endpoint,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'workers': args.workers,
+            'days_ahead': args.days_ahead,
+            'explanation': args.explanation,
+            'unique_prompts': args.unique_prompts,
+            'graphql_latency_ms': args.graphql_latency_ms,
+            'deepseek_latency_ms': args.deepseek_latency_ms,
+        },
+        'summary': summarize(run),
+    }
+
+
+def main():
+    """Parse arguments, run the load test and write the results file."""
+    parser = argparse.ArgumentParser(description='Load test the Cafu00e9Index AI prediction service')
+    parser.add_argument('--endpoint', choices=['/predict', '/predict/batch'], default='/predict')
+    parser.add_argument('--requests', type=int, default=500, help='Total number of requests to send')
+    parser.add_argument('--concurrency', type=int, default=16, help='Number of concurrent clients')
+    parser.add_argument('--warmup', type=int, default=20, help='Requests sent before measuring')
+    parser.add_argument('--workers', type=int, default=1, help='Number of uvicorn workers')
+    parser.add_argument('--port', type=int, default=0, help='Service port (random free port by default)')
+    parser.add_argument('--days-ahead', type=int, default=7)
+    parser.add_argument('--explanation', action=argparse.BooleanOptionalAction, default=True,
+                        help='Request DeepSeek explanations')
+    parser.add_argument('--unique-prompts', action='store_true',
+                        help='Use a different prompt per request so explanations are never cached')
+    parser.add_argument('--graphql-latency-ms', type=float, default=50.0, help='Latency of the GraphQL stub')
+    parser.add_argument('--deepseek-latency-ms', type=float, default=1500.0, help='Latency of the DeepSeek stub')
+    parser.add_argument('--output', default=DEFAULT_RESULTS_PATH, help='Results file to write')
+    parser.add_argument('--baseline', help='Results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Allowed relative regression against the baseline')
+    args = parser.parse_args()
+
+    results = run_load_test(args)
+    summary = results['summary']
+    logger.info(
+        f"{summary['requests']} requests, {summary['errors']} errors, {summary['requests_per_s']} req/s, "
+        f"p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms, p99 {summary['p99_ms']} ms"
+    )
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    logger.info(f"Results saved to {args.output}")
+
+    if args.baseline and not compare_to_baseline(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
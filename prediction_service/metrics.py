@@ -0,0 +1,308 @@
+"""Lightweight Prometheus metrics for the prediction service.
+
+This module provides counters, gauges and histograms with a minimal hot-path
+cost (a perf_counter call, a bisect and a short lock) and renders them in the
+Prometheus text exposition format for the /metrics endpoint.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+# Latency buckets in seconds, from sub-millisecond feature prep to multi-second DeepSeek calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class holding one child per label combination."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *labelvalues: str):
+        """Return the child metric for a label combination, creating it if needed."""
+        key = tuple(str(value) for value in labelvalues)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Compute the gauge value when metrics are rendered."""
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function is not None else self.value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed on scrape."""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: "_HistogramChild"):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        """Context manager observing the duration of its block."""
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional["Registry"] = None):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(self.upper_bounds + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+# Service metrics
+STAGE_LATENCY = Histogram(
+    "cafeindex_stage_latency_seconds", "Latency of each prediction pipeline stage.", ["stage"]
+)
+REQUEST_LATENCY = Histogram(
+    "cafeindex_request_latency_seconds", "End-to-end request latency per endpoint.", ["path"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "cafeindex_requests_in_flight", "Requests currently being processed per endpoint.", ["path"]
+)
+UPSTREAM_ERRORS = Counter(
+    "cafeindex_upstream_errors_total", "Errors returned by upstream services.", ["upstream"]
+)
+CACHE_REQUESTS = Counter(
+    "cafeindex_cache_requests_total", "Cache lookups by cache and result (hit or miss).", ["cache", "result"]
+)
+CACHE_HIT_RATIO = Gauge(
+    "cafeindex_cache_hit_ratio", "Fraction of cache lookups that were hits.", ["cache"]
+)
+
+
+def stage_timer(stage: str) -> _Timer:
+    """Time a prediction pipeline stage.
+
+    Args:
+        stage: Stage name, e.g. 'price_fetch' or 'inference'.
+
+    Returns:
+        Context manager recording the stage latency.
+    """
+    return STAGE_LATENCY.labels(stage).time()
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache lookup and keep the hit ratio gauge up to date.
+
+    Args:
+        cache: Cache name, e.g. 'explanation'.
+        hit: Whether the lookup was a hit.
+    """
+    hits = CACHE_REQUESTS.labels(cache, "hit")
+    misses = CACHE_REQUESTS.labels(cache, "miss")
+    (hits if hit else misses).inc()
+
+    ratio = CACHE_HIT_RATIO.labels(cache)
+    if ratio.function is None:
+        ratio.set_function(lambda: hits.value / ((hits.value + misses.value) or 1))
+
+
+def benchmark_overhead(iterations: int = 200000) -> Dict[str, float]:
+    """Measure the cost of the instrumentation primitives.
+
+    Args:
+        iterations: Number of operations to time.
+
+    Returns:
+        Dict[str, float]: Nanoseconds per operation for each primitive.
+    """
+    registry = Registry()
+    histogram = Histogram("benchmark_latency_seconds", "Benchmark histogram.", ["stage"], registry=registry)
+    counter = Counter("benchmark_total", "Benchmark counter.", ["result"], registry=registry)
+
+    def measure(operation: Callable[[], None]) -> float:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        return (time.perf_counter() - start) / iterations * 1e9
+
+    def timed_block():
+        with histogram.labels("benchmark").time():
+            pass
+
+    baseline = measure(lambda: None)
+    results = {
+        "stage_timer_ns": measure(timed_block) - baseline,
+        "observe_ns": measure(lambda: histogram.labels("benchmark").observe(0.01)) - baseline,
+        "counter_inc_ns": measure(lambda: counter.labels("hit").inc()) - baseline,
+    }
+    return results
+
+
+if __name__ == "__main__":
+    for operation, nanoseconds in benchmark_overhead().items():
+        logger.info(f"{operation}: {nanoseconds:.0f} ns")
@@ -0,0 +1,168 @@
+"""Deadlines and circuit breakers for upstream calls.
+
+Every /predict request gets a `Deadline`; each upstream call receives the
+smaller of its own timeout and the time left in the request budget. A
+`CircuitBreaker` per upstream stops calling a service after repeated
+failures, so requests fail fast to the cached or numeric-only response
+until a trial call succeeds again.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from prediction_service.metrics import Counter, Gauge
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CIRCUIT_STATE = Gauge(
+    "cafeindex_circuit_state", "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open).", ["upstream"]
+)
+CIRCUIT_REJECTIONS = Counter(
+    "cafeindex_circuit_rejections_total", "Upstream calls skipped because the circuit was open.", ["upstream"]
+)
+
+CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request has no time budget left for another step."""
+
+
+class CircuitOpenError(Exception):
+    """Raised when an upstream call is skipped because its circuit is open."""
+
+
+class Deadline:
+    """Time budget of a single request."""
+
+    def __init__(self, budget: float):
+        """Start a deadline.
+
+        Args:
+            budget: Seconds the request may take in total.
+        """
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        """Return the seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def timeout(self, cap: Optional[float] = None, minimum: float = 0.05) -> float:
+        """Return the timeout for the next step.
+
+        Args:
+            cap: Upper bound for this step, e.g. the upstream's own timeout.
+            minimum: Smallest budget worth starting a step with.
+
+        Returns:
+            float: Seconds the step may take.
+
+        Raises:
+            DeadlineExceeded: If less than minimum seconds are left.
+        """
+        remaining = self.remaining()
+        if remaining < minimum:
+            raise DeadlineExceeded(f"{remaining:.3f}s left in request budget")
+        return remaining if cap is None else min(cap, remaining)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one upstream."""
+
+    def __init__(self, name: str, failure_threshold: int = config.CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = config.CIRCUIT_RESET_TIMEOUT):
+        """Create a closed circuit.
+
+        Args:
+            name: Upstream name used in logs and metrics, e.g. 'graphql'.
+            failure_threshold: Consecutive failures that open the circuit.
+            reset_timeout: Seconds the circuit stays open before a trial call.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._state = CLOSED
+        self._gauge = CIRCUIT_STATE.labels(name)
+        self._gauge.set(CLOSED)
+        self._rejections = CIRCUIT_REJECTIONS.labels(name)
+
+    @property
+    def state(self) -> int:
+        return self._state
+
+    def _set_state(self, state: int) -> None:
+        self._state = state
+        self._gauge.set(state)
+
+    def allow(self) -> bool:
+        """Return whether a call may go through now (one trial call when half-open)."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self._failures = 0
+            self._trial_in_flight = False
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"Circuit for {self.name} opened after {self._failures} consecutive failures")
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn through the breaker.
+
+        Args:
+            fn: Upstream call; any exception counts as a failure.
+            *args: Positional arguments for fn.
+            **kwargs: Keyword arguments for fn.
+
+        Returns:
+            Any: Result of fn.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+        """
+        if not self.allow():
+            self._rejections.inc()
+            raise CircuitOpenError(f"Circuit for {self.name} is open")
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+# One breaker per upstream, shared by all requests of a worker
+GRAPHQL_BREAKER = CircuitBreaker("graphql")
+DEEPSEEK_BREAKER = CircuitBreaker("deepseek")
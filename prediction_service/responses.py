@@ -0,0 +1,175 @@
+"""Response encoding for the prediction service.
+
+Prediction payloads are built as plain dicts from dates that are formatted
+once when prices are loaded, then encoded with orjson when it is installed,
+skipping the pydantic validation and `jsonable_encoder` pass FastAPI would
+otherwise run over every record. Large responses are compressed by the
+middleware returned by `compression_middleware` (brotli when the optional
+`brotli-asgi` package is installed, gzip otherwise).
+"""
+
+import json
+import logging
+import time
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+    FastJSONResponse = JSONResponse
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+COMPRESSION_MIN_SIZE = 1024  # Bytes below which compressing costs more than it saves
+
+
+class SelectiveCompressionMiddleware:
+    """Compress responses except on excluded paths, e.g. event streams that must not be buffered."""
+
+    def __init__(self, app, compressor: type, options: Dict[str, Any], excluded_paths: Iterable[str] = ()):
+        self.app = app
+        self.compressed_app = compressor(app, **options)
+        self.excluded_paths = set(excluded_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+        else:
+            await self.compressed_app(scope, receive, send)
+
+
+def compression_middleware(excluded_paths: Iterable[str] = ()) -> Tuple[type, Dict[str, Any]]:
+    """Return the compression middleware class and its options.
+
+    Args:
+        excluded_paths: Paths whose responses are sent uncompressed.
+
+    Returns:
+        Tuple[type, Dict[str, Any]]: Middleware class and keyword arguments for app.add_middleware.
+    """
+    try:
+        from brotli_asgi import BrotliMiddleware
+        compressor, options = BrotliMiddleware, {'minimum_size': COMPRESSION_MIN_SIZE, 'gzip_fallback': True}
+    except ImportError:
+        from fastapi.middleware.gzip import GZipMiddleware
+        compressor, options = GZipMiddleware, {'minimum_size': COMPRESSION_MIN_SIZE}
+    return SelectiveCompressionMiddleware, {
+        'compressor': compressor, 'options': options, 'excluded_paths': tuple(excluded_paths),
+    }
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode content the same way FastJSONResponse does."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def price_date(record: Dict[str, Any]) -> str:
+    """Return the pre-formatted date of a price record, formatting it if missing."""
+    date = record.get('date')
+    if date is None:
+        date = str(record['timestamp'])[:10]
+    return date
+
+
+def build_prediction_payload(historical_prices: List[Dict[str, Any]], predictions: List[Dict[str, Any]],
+                             explanation: Optional[str], columnar: bool = False) -> Dict[str, Any]:
+    """Build the /predict response body.
+
+    Args:
+        historical_prices: List of historical price records.
+        predictions: List of predictions with dates.
+        explanation: Explanation text, if any.
+        columnar: Return one list of dates and one list of prices per series instead of records.
+
+    Returns:
+        Dict[str, Any]: Response body.
+    """
+    if columnar:
+        return {
+            'historical_prices': {
+                'dates': [price_date(p) for p in historical_prices],
+                'prices': [p['price'] for p in historical_prices],
+            },
+            'predictions': {
+                'dates': [p['date'] for p in predictions],
+                'prices': [p['price'] for p in predictions],
+            },
+            'explanation': explanation,
+        }
+
+    return {
+        'historical_prices': [{'date': price_date(p), 'price': p['price']} for p in historical_prices],
+        'predictions': [{'date': p['date'], 'price': p['price']} for p in predictions],
+        'explanation': explanation,
+    }
+
+
+def benchmark_serialization(history_days: int = 365, days_ahead: int = 90,
+                            iterations: int = 2000) -> Dict[str, float]:
+    """Compare the previous response path with the current ones.
+
+    Args:
+        history_days: Number of historical records in the response.
+        days_ahead: Number of predictions in the response.
+        iterations: Number of responses to encode per path.
+
+    Returns:
+        Dict[str, float]: Microseconds per response for each path, and encoded sizes in bytes.
+    """
+    import numpy as np
+    from fastapi.encoders import jsonable_encoder
+    from prediction_service.app import PredictionResponse
+    from data_processing.features import parse_timestamps
+
+    start = np.datetime64('2024-01-01T00:00:00')
+    historical_prices = [
+        {'timestamp': str(start + np.timedelta64(i, 'D')), 'date': str(start + np.timedelta64(i, 'D'))[:10],
+         'price': round(3.5 + 0.01 * i, 2), 'blockHeight': 1000 + i}
+        for i in range(history_days)
+    ]
+    predictions = [
+        {'date': str(np.datetime64('2025-01-01') + np.timedelta64(i, 'D')), 'price': round(4.0 + 0.01 * i, 2)}
+        for i in range(days_ahead)
+    ]
+
+    def previous_path() -> bytes:
+        # Dates parsed per request, pydantic validation, jsonable_encoder and json.dumps
+        dates = parse_timestamps([p['timestamp'] for p in historical_prices]).astype('datetime64[D]').astype(str).tolist()
+        response = PredictionResponse(
+            historical_prices=[{'date': d, 'price': p['price']} for p, d in zip(historical_prices, dates)],
+            predictions=predictions, explanation="Explanation text.",
+        )
+        return JSONResponse(jsonable_encoder(response)).body
+
+    def records_path() -> bytes:
+        return encode_json(build_prediction_payload(historical_prices, predictions, "Explanation text."))
+
+    def columnar_path() -> bytes:
+        return encode_json(build_prediction_payload(historical_prices, predictions, "Explanation text.", columnar=True))
+
+    def measure(path: Callable[[], bytes]) -> float:
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            path()
+        return (time.perf_counter() - start_time) / iterations * 1e6
+
+    results = {}
+    for name, path in (('previous', previous_path), ('records', records_path), ('columnar', columnar_path)):
+        results[f"{name}_us"] = measure(path)
+        results[f"{name}_bytes"] = len(path())
+    return results
+
+
+if __name__ == "__main__":
+    logger.info(f"JSON encoder: {'orjson' if orjson is not None else 'json'}")
+    for name, value in benchmark_serialization().items():
+        logger.info(f"{name}: {value:.1f}")
@@ -0,0 +1,404 @@
+"""Model and price window shared by all prediction service workers.
+
+The pipeline and the indexer publish the trained model as flat NumPy arrays
+(one node table for all trees of a random forest, or the coefficients of a
+linear model) together with the latest price window. Each publication is a
+numbered generation directory of `.npy` files; a `CURRENT` file names the
+active generation and is swapped with `os.replace`, so readers always see a
+complete generation. Workers map the arrays read-only with `mmap_mode='r'`,
+so every worker shares the same page-cache copy and none needs to unpickle
+scikit-learn objects.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from data_processing.features import parse_timestamps
+from prediction_service.data import load_latest_prices, load_model, prepare_prediction_features
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+META_FILE = "meta.json"
+KEEP_GENERATIONS = 2  # Workers may still be remapping the previous generation
+
+
+class SharedForest:
+    """Random forest regressor evaluated on flat node arrays.
+
+    Node indices of all trees live in one table; child indices are global,
+    and `roots` holds the first node of each tree.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], max_depth: int):
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.missing_left = arrays['missing_left']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.max_depth = max_depth
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predict by walking every tree for every row at once.
+
+        Args:
+            X: Feature array with shape (n_samples, n_features).
+
+        Returns:
+            np.ndarray: Mean of the tree predictions for each row.
+        """
+        # scikit-learn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.tile(self.roots, (X.shape[0], 1))
+
+        for _ in range(self.max_depth):
+            left = self.left[nodes]
+            is_leaf = left < 0
+            if is_leaf.all():
+                break
+            values = X[rows, np.maximum(self.feature[nodes], 0)]
+            go_left = np.where(np.isnan(values), self.missing_left[nodes], values <= self.threshold[nodes])
+            nodes = np.where(is_leaf, nodes, np.where(go_left, left, self.right[nodes]))
+
+        return self.value[nodes].mean(axis=1)
+
+
+class SharedLinear:
+    """Linear regressor evaluated on shared coefficient arrays."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.coef = arrays['coef']
+        self.intercept = float(arrays['intercept'][0])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+
+def export_model_arrays(model) -> Optional[Dict[str, Any]]:
+    """Convert a fitted model into flat arrays.
+
+    Args:
+        model: Fitted RandomForestRegressor or LinearRegression.
+
+    Returns:
+        Optional[Dict[str, Any]]: Model kind, arrays and metadata, or None if the model type is not supported.
+    """
+    if hasattr(model, 'estimators_') and all(hasattr(tree, 'tree_') for tree in model.estimators_):
+        trees = [tree.tree_ for tree in model.estimators_]
+        if any(tree.n_outputs != 1 for tree in trees):
+            return None
+
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        shift = lambda children, offset: np.where(children < 0, -1, children + offset)
+        return {
+            'kind': 'forest',
+            'max_depth': max(tree.max_depth for tree in trees) + 1,
+            'arrays': {
+                'left': np.concatenate([shift(t.children_left, o) for t, o in zip(trees, offsets)]).astype(np.int32),
+                'right': np.concatenate([shift(t.children_right, o) for t, o in zip(trees, offsets)]).astype(np.int32),
+                'feature': np.concatenate([t.feature for t in trees]).astype(np.int32),
+                'threshold': np.concatenate([t.threshold for t in trees]).astype(np.float64),
+                'missing_left': np.concatenate([
+                    np.asarray(t.missing_go_to_left, dtype=bool) if hasattr(t, 'missing_go_to_left')
+                    else np.zeros(t.node_count, dtype=bool)
+                    for t in trees
+                ]),
+                'value': np.concatenate([t.value[:, 0, 0] for t in trees]).astype(np.float64),
+                'roots': offsets[:-1].astype(np.int32),
+            },
+        }
+
+    if hasattr(model, 'coef_') and np.ndim(model.coef_) == 1:
+        return {
+            'kind': 'linear',
+            'arrays': {
+                'coef': np.asarray(model.coef_, dtype=np.float64),
+                'intercept': np.array([model.intercept_], dtype=np.float64),
+            },
+        }
+
+    return None
+
+
+def shared_model(exported: Dict[str, Any]):
+    """Build the shared model for the output of export_model_arrays."""
+    if exported['kind'] == 'forest':
+        return SharedForest(exported['arrays'], exported['max_depth'])
+    return SharedLinear(exported['arrays'])
+
+
+def model_parity(model, exported: Dict[str, Any], historical_prices: Optional[List[Dict[str, Any]]] = None,
+                 rows: int = 500) -> bool:
+    """Compare the shared model with the scikit-learn predictions on random feature rows.
+
+    Args:
+        model: Fitted scikit-learn model.
+        exported: Output of export_model_arrays for the model.
+        historical_prices: Recent prices; random rows are scaled around their feature row.
+        rows: Number of random feature rows to compare.
+
+    Returns:
+        bool: True if the predictions match, False otherwise.
+    """
+    rng = np.random.default_rng(config.RANDOM_STATE)
+    X = rng.normal(size=(rows, model.n_features_in_))
+    if historical_prices:
+        # Scale random rows around a realistic feature row
+        base = prepare_prediction_features(historical_prices)
+        if base is not None:
+            X = base * (1 + 0.1 * X)
+
+    expected = model.predict(X)
+    actual = shared_model(exported).predict(X)
+    if not np.allclose(expected, actual):
+        logger.error(f"Shared model differs from scikit-learn by up to {np.abs(expected - actual).max()}")
+        return False
+    return True
+
+
+def withdraw_shared_state(state_dir: str = config.SHARED_STATE_DIR) -> None:
+    """Remove the CURRENT file so workers stop using the published model and load it themselves."""
+    try:
+        os.remove(os.path.join(state_dir, CURRENT_FILE))
+        logger.warning(f"Withdrew the shared state in {state_dir}")
+    except FileNotFoundError:
+        pass
+
+
+def read_generation(state_dir: str = config.SHARED_STATE_DIR) -> Optional[int]:
+    """Return the active generation number, or None if nothing has been published."""
+    try:
+        with open(os.path.join(state_dir, CURRENT_FILE)) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def generation_dir(state_dir: str, generation: int) -> str:
+    return os.path.join(state_dir, f"gen-{generation:06d}")
+
+
+def publish_shared_state(state_dir: str = config.SHARED_STATE_DIR,
+                         num_days: int = config.SHARED_PRICE_WINDOW) -> Optional[int]:
+    """Publish the current model and price window as a new generation.
+
+    Args:
+        state_dir: Directory holding the generations and the CURRENT file.
+        num_days: Number of recent price records to publish.
+
+    Returns:
+        Optional[int]: The new generation number, or None if nothing was published.
+    """
+    try:
+        model_data = load_model()
+        exported = export_model_arrays(model_data['model'])
+        if exported is None:
+            logger.warning(f"Model type {type(model_data['model']).__name__} cannot be shared, workers will load it themselves")
+            return None
+
+        historical_prices = load_latest_prices(num_days)
+        if not historical_prices:
+            logger.warning("No price data available, shared state not published")
+            return None
+
+        # The arrays are read from scikit-learn internals, so verify them before any worker uses them
+        if not model_parity(model_data['model'], exported, historical_prices):
+            logger.error("Shared model does not reproduce scikit-learn, workers will load the model themselves")
+            withdraw_shared_state(state_dir)
+            return None
+
+        arrays = dict(exported['arrays'])
+        arrays['timestamps'] = parse_timestamps([p['timestamp'] for p in historical_prices]).astype('datetime64[s]')
+        arrays['prices'] = np.array([float(p['price']) for p in historical_prices])
+        arrays['blocks'] = np.array([
+            int(float(p.get('blockHeight', p.get('block', 0)))) for p in historical_prices
+        ], dtype=np.int64)
+
+        generation = (read_generation(state_dir) or 0) + 1
+        meta = {
+            'generation': generation,
+            'published_at': time.time(),
+            'kind': exported['kind'],
+            'max_depth': exported.get('max_depth', 0),
+            'model_name': model_data.get('model_name'),
+            'model_timestamp': model_data.get('timestamp'),
+            'arrays': sorted(arrays),
+        }
+
+        # Build the generation under a temporary name, then make it visible atomically
+        os.makedirs(state_dir, exist_ok=True)
+        tmp_dir = f"{generation_dir(state_dir, generation)}.tmp.{os.getpid()}"
+        os.makedirs(tmp_dir)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+            json.dump(meta, f)
+        os.rename(tmp_dir, generation_dir(state_dir, generation))
+
+        current_tmp = os.path.join(state_dir, f"{CURRENT_FILE}.tmp.{os.getpid()}")
+        with open(current_tmp, 'w') as f:
+            f.write(str(generation))
+        os.replace(current_tmp, os.path.join(state_dir, CURRENT_FILE))
+
+        # Mapped files stay readable after unlinking, so old generations can go
+        for old in range(generation - KEEP_GENERATIONS, 0, -1):
+            old_dir = generation_dir(state_dir, old)
+            if not os.path.isdir(old_dir):
+                break
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+        logger.info(f"Published shared state generation {generation} to {state_dir}")
+        return generation
+
+    except Exception as e:
+        logger.error(f"Error publishing shared state: {e}")
+        return None
+
+
+class SharedState:
+    """Read-only view of the latest published generation, remapped when it changes."""
+
+    def __init__(self, state_dir: str = config.SHARED_STATE_DIR,
+                 max_price_age: float = config.SHARED_PRICES_MAX_AGE):
+        self.state_dir = state_dir
+        self.max_price_age = max_price_age
+        self._current = os.path.join(state_dir, CURRENT_FILE)
+        self._mtime_ns = None
+        self._generation = None
+        self._model_data = None
+        self._prices = None
+        self._published_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        try:
+            mtime_ns = os.stat(self._current).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        if mtime_ns == self._mtime_ns:
+            return
+
+        with self._lock:
+            if mtime_ns == self._mtime_ns:
+                return
+            if mtime_ns is None:
+                # The publisher withdrew the generation: fall back to loading the model and prices
+                self._model_data = self._prices = self._generation = self._mtime_ns = None
+                logger.info("Shared state withdrawn")
+                return
+            generation = read_generation(self.state_dir)
+            if generation is not None and generation != self._generation:
+                try:
+                    self._map(generation)
+                except Exception as e:
+                    logger.error(f"Error mapping shared state generation {generation}: {e}")
+                    return
+            self._mtime_ns = mtime_ns
+
+    def _map(self, generation: int) -> None:
+        path = generation_dir(self.state_dir, generation)
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in meta['arrays']}
+
+        model = shared_model({'kind': meta['kind'], 'arrays': arrays, 'max_depth': meta['max_depth']})
+        dates = arrays['timestamps'].astype(str).tolist()
+        prices = [
+            {'timestamp': timestamp, 'date': timestamp[:10], 'price': float(price),
+             'blockHeight': int(block), 'block': int(block)}
+            for timestamp, price, block in zip(dates, arrays['prices'], arrays['blocks'])
+        ]
+
+        # Swap everything at once so requests never mix two generations
+        self._model_data = {
+            'model': model, 'model_name': meta['model_name'], 'timestamp': meta['model_timestamp'],
+        }
+        self._prices = prices
+        self._published_at = meta['published_at']
+        self._generation = generation
+        logger.info(f"Mapped shared state generation {generation}")
+
+    @property
+    def generation(self) -> Optional[int]:
+        self._refresh()
+        return self._generation
+
+    def model_data(self, model_path: str = config.MODEL_PATH) -> Optional[Dict[str, Any]]:
+        """Return the shared model in the same shape as load_model.
+
+        Args:
+            model_path: Path to the saved model file.
+
+        Returns:
+            Optional[Dict[str, Any]]: Model data, or None if nothing is published or the model file was retrained since.
+        """
+        self._refresh()
+        try:
+            if os.stat(model_path).st_mtime > self._published_at:
+                return None
+        except OSError:
+            pass
+        return self._model_data
+
+    def latest_prices(self, num_days: int, allow_stale: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """Return the shared price window if it is recent and long enough.
+
+        Args:
+            num_days: Number of recent price records requested.
+            allow_stale: Ignore the window's age, e.g. while GraphQL is unavailable.
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: Price records, or None if the caller should fetch them.
+        """
+        self._refresh()
+        prices = self._prices
+        if prices is None or len(prices) < num_days:
+            return None
+        if not allow_stale and time.time() - self._published_at > self.max_price_age:
+            return None
+        return prices[-num_days:]
+
+
+def check_model_parity(model_path: str = config.MODEL_PATH, rows: int = 500) -> bool:
+    """Verify that the exported arrays reproduce the scikit-learn predictions.
+
+    Args:
+        model_path: Path to the saved model file.
+        rows: Number of random feature rows to compare.
+
+    Returns:
+        bool: True if the predictions match, False otherwise.
+    """
+    model = load_model(model_path)['model']
+    exported = export_model_arrays(model)
+    if exported is None:
+        logger.error(f"Model type {type(model).__name__} is not supported")
+        return False
+
+    if not model_parity(model, exported, load_latest_prices(), rows):
+        return False
+
+    logger.info(f"Shared model matches scikit-learn on {rows} rows")
+    return True
+
+
+if __name__ == "__main__":
+    if '--check' in sys.argv:
+        sys.exit(0 if check_model_parity() else 1)
+    sys.exit(0 if publish_shared_state() is not None else 1)
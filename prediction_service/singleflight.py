@@ -0,0 +1,99 @@
+"""Request coalescing for the prediction service.
+
+Concurrent callers asking for the same key share one in-progress computation:
+the first caller runs it and every caller that arrives while it is running
+waits for, and receives, the same result (or exception). When callers pass a
+wait_timeout the computation runs on a worker thread, so the first caller is
+bounded by its timeout too; a call that outlives it still finishes and is
+delivered to whoever is waiting then.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from prediction_service.metrics import Counter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+COALESCED_CALLS = Counter(
+    "cafeindex_coalesced_calls_total", "Calls served by joining an in-progress computation.", ["group"]
+)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key."""
+
+    def __init__(self, name: str):
+        """Create a coalescing group.
+
+        Args:
+            name: Group name used in logs and metrics, e.g. 'prices'.
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._coalesced = COALESCED_CALLS.labels(name)
+        self._executor = ThreadPoolExecutor(thread_name_prefix=f"singleflight-{name}")
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args,
+           wait_timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Identifies equivalent computations.
+            fn: Function to run.
+            *args: Positional arguments for fn.
+            wait_timeout: Seconds any caller waits for the result, or None to wait indefinitely.
+            **kwargs: Keyword arguments for fn.
+
+        Returns:
+            Any: Result of fn, shared by every caller that joined the flight.
+
+        Raises:
+            TimeoutError: If the result was not ready within wait_timeout.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if leader:
+            if wait_timeout is None:
+                self._run(key, call, fn, args, kwargs)
+            else:
+                self._executor.submit(self._run, key, call, fn, args, kwargs)
+        else:
+            self._coalesced.inc()
+            logger.debug(f"Joining in-progress {self.name} call")
+
+        if not call.done.wait(wait_timeout):
+            raise TimeoutError(f"Timed out waiting for in-progress {self.name} call")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _run(self, key: Hashable, call: _Call, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> None:
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+        finally:
+            # Later callers start a fresh computation
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
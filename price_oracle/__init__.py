@@ -4,6 +4,12 @@ Este paquete proporciona funcionalidades para enviar precios de cafu00e9 a la bl
 Westend de Polkadot como un oru00e1culo descentralizado.
 """
 
-from .oracle import PriceOracle
+__all__ = ['PriceOracle']
 
-__all__ = ['PriceOracle']
\ No newline at end of file
+
+def __getattr__(name):
+    # substrate-interface solo se importa al usar PriceOracle, no al importar el ledger
+    if name == 'PriceOracle':
+        from .oracle import PriceOracle
+        return PriceOracle
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,218 @@
+"""Motor asincrono del oru00e1culo de precios.
+
+`AsyncOracleEngine` envia precios con varias extrinsecas en vuelo a la vez, sin
+reemplazar la API sincrona de `PriceOracle`. substrate-interface es sincrono y
+una conexiu00f3n websocket no puede compartirse entre hilos, asi que el motor
+mantiene un conjunto de conexiones (una por envio en vuelo) y ejecuta cada
+submit-and-watch en un hilo con su propio timeout. Los nonces se asignan en el
+bucle de eventos, y los rechazos del pool de transacciones (pool lleno, nonce
+repetido o caducado) se reintentan con espera exponencial; mientras el pool
+esta lleno se reduce el numero de envios en vuelo.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from substrateinterface.exceptions import SubstrateRequestException
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from price_oracle.oracle import PriceOracle, create_substrate
+from price_oracle.price_batch import PriceRecords
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Codigos de error del pool de transacciones que indican contrapresion del nodo
+POOL_INVALID = 1010  # Invalid Transaction, p. ej. nonce caducado (Stale) o futuro
+POOL_PRIORITY_TOO_LOW = 1014  # Ya hay una transaccion con el mismo nonce en el pool
+POOL_IMMEDIATELY_DROPPED = 1016  # El pool esta lleno
+RETRYABLE_CODES = (POOL_INVALID, POOL_PRIORITY_TOO_LOW, POOL_IMMEDIATELY_DROPPED)
+
+
+def pool_error_code(error: Exception) -> Optional[int]:
+    """Devuelve el codigo de error JSON-RPC de un rechazo del nodo, si lo hay."""
+    if isinstance(error, SubstrateRequestException) and error.args and isinstance(error.args[0], dict):
+        return error.args[0].get('code')
+    return None
+
+
+class AsyncOracleEngine:
+    """Envia precios con un numero limitado de extrinsecas en vuelo."""
+
+    def __init__(self, oracle: PriceOracle, max_in_flight: int = config.ORACLE_MAX_IN_FLIGHT,
+                 submission_timeout: float = config.ORACLE_SUBMISSION_TIMEOUT,
+                 max_retries: int = config.ORACLE_MAX_RETRIES, backoff: float = config.ORACLE_RETRY_BACKOFF,
+                 connection_factory: Callable[[], Any] = create_substrate):
+        """Crea el motor.
+
+        Args:
+            oracle: Oru00e1culo conectado; aporta el firmante y la creacion de llamadas.
+            max_in_flight: Extrinsecas enviadas a la vez, cada una con su conexiu00f3n.
+            submission_timeout: Segundos para que una extrinseca se incluya en un bloque.
+            max_retries: Reintentos de un precio rechazado por el pool.
+            backoff: Espera inicial en segundos entre reintentos; se duplica en cada uno.
+            connection_factory: Funcion que abre la conexiu00f3n de cada hueco (por defecto con Westend).
+        """
+        self.oracle = oracle
+        self.max_in_flight = max_in_flight
+        self.submission_timeout = submission_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.connection_factory = connection_factory
+        self._nonce: Optional[int] = None
+        self._nonce_lock: Optional[asyncio.Lock] = None
+        # Una conexiu00f3n por envio en vuelo; se abren al usarse y siguen abiertas entre lotes
+        self._connections: List[Dict[str, Any]] = [{'substrate': None} for _ in range(max_in_flight)]
+        self._slots: Optional[asyncio.Queue] = None
+        # Huecos retirados mientras el pool del nodo esta lleno
+        self._parked: List[Dict[str, Any]] = []
+        # Bloque en el que se incluyo cada id, para el ledger
+        self.block_hashes: Dict[str, str] = {}
+        # Hilos de sobra para los envios que siguen bloqueados tras un timeout
+        self._executor = ThreadPoolExecutor(max_workers=2 * max_in_flight, thread_name_prefix='oracle-submit')
+
+    def _connection(self, slot: Dict[str, Any]):
+        """Devuelve la conexiu00f3n de un hueco, abriendola si hace falta (se ejecuta en un hilo)."""
+        if slot['substrate'] is None:
+            slot['substrate'] = self.connection_factory()
+        return slot['substrate']
+
+    async def _next_nonce(self, slot: Dict[str, Any]) -> int:
+        """Asigna el siguiente nonce; lo lee de la cadena tras arrancar o tras un error."""
+        async with self._nonce_lock:
+            if self._nonce is None:
+                loop = asyncio.get_running_loop()
+                address = self.oracle.signer.ss58_address
+                self._nonce = await loop.run_in_executor(
+                    self._executor, lambda: self._connection(slot).get_account_nonce(address)
+                )
+                logger.info(f"Nonce sincronizado con la cadena: {self._nonce}")
+            nonce = self._nonce
+            self._nonce += 1
+            return nonce
+
+    def _submit_blocking(self, slot: Dict[str, Any], call_params: Dict[str, int],
+                         nonce: int) -> Tuple[bool, Optional[str]]:
+        """Firma, envia y espera la inclusion de un precio (se ejecuta en un hilo).
+
+        Returns:
+            Tuple[bool, Optional[str]]: Exito y hash del bloque que incluye la extrinseca.
+        """
+        substrate = self._connection(slot)
+        call = self.oracle.compose_submit_call(call_params, substrate=substrate)
+        extrinsic = substrate.create_signed_extrinsic(call=call, keypair=self.oracle.signer, nonce=nonce)
+        receipt = substrate.submit_extrinsic(extrinsic, wait_for_inclusion=True)
+        if not receipt.is_success:
+            logger.error(f"Error en la transacciu00f3n {call_params['id']}: {receipt.error_message}")
+        return receipt.is_success, receipt.block_hash
+
+    def _discard_connection(self, slot: Dict[str, Any]) -> None:
+        """Cierra la conexiu00f3n de un hueco para liberar el hilo bloqueado en ella."""
+        substrate, slot['substrate'] = slot['substrate'], None
+        if substrate is not None:
+            try:
+                substrate.close()
+            except Exception as e:
+                logger.warning(f"Error al cerrar la conexiu00f3n: {e}")
+
+    async def _submit_one(self, record_id: str, call_params: Dict[str, int]) -> bool:
+        """Envia un precio ocupando un hueco de conexiu00f3n, con timeout y reintentos."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            slot = await self._slots.get()
+            pool_full = False
+            try:
+                nonce = await self._next_nonce(slot)
+                success, block_hash = await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, self._submit_blocking, slot, call_params, nonce),
+                    timeout=self.submission_timeout
+                )
+                self.block_hashes[record_id] = block_hash
+                if success:
+                    logger.info(f"Precio {record_id} incluido en el bloque {block_hash}")
+                    # El nodo vuelve a aceptar envios: recuperar un hueco aparcado
+                    if self._parked:
+                        self._slots.put_nowait(self._parked.pop())
+                return success
+            except asyncio.TimeoutError:
+                # La extrinseca puede incluirse mas tarde; no se reintenta para no duplicarla
+                logger.error(f"Timeout de {self.submission_timeout}s al enviar {record_id}")
+                self._discard_connection(slot)
+                self._nonce = None
+                return False
+            except Exception as e:
+                code = pool_error_code(e)
+                self._nonce = None
+                if code not in RETRYABLE_CODES or attempt == self.max_retries:
+                    logger.error(f"Error al enviar el precio {record_id}: {e}")
+                    if code is None:
+                        self._discard_connection(slot)
+                    return False
+                pool_full = code == POOL_IMMEDIATELY_DROPPED
+                delay = self.backoff * 2 ** attempt
+                logger.warning(f"Nodo rechazo {record_id} ({e}), reintento en {delay:.1f}s")
+            finally:
+                # Contrapresion: con el pool lleno se reduce el numero de envios en vuelo
+                if pool_full and len(self._parked) < self.max_in_flight - 1:
+                    self._parked.append(slot)
+                else:
+                    self._slots.put_nowait(slot)
+            # Esperar fuera del hueco para que otros envios sigan avanzando
+            await asyncio.sleep(delay)
+        return False
+
+    async def submit_prices(self, price_records: PriceRecords) -> Dict[str, bool]:
+        """Envia un lote de precios con hasta max_in_flight extrinsecas en vuelo.
+
+        Args:
+            price_records: `PriceBatch` o DataFrame con columnas 'id', 'timestamp', 'price'.
+
+        Returns:
+            Dict[str, bool]: Resultados de las transacciones {id: u00e9xito}.
+        """
+        results: Dict[str, bool] = {}
+        if not self.oracle.is_connected or not self.oracle.signer:
+            logger.error("No hay conexiu00f3n con la blockchain")
+            return results
+
+        self._nonce = None
+        self._nonce_lock = asyncio.Lock()
+        # Cada hueco abre su propia conexiu00f3n al usarse por primera vez
+        self._slots = asyncio.Queue()
+        self._parked = []
+        self.block_hashes = {}
+        for slot in self._connections:
+            self._slots.put_nowait(slot)
+
+        record_ids: List[str] = []
+        tasks = []
+        for record_id, call_params in self.oracle.iter_price_records(price_records, results):
+            record_ids.append(record_id)
+            tasks.append(self._submit_one(record_id, call_params))
+
+        logger.info(f"Enviando {len(tasks)} precios con hasta {self.max_in_flight} en vuelo")
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        for record_id, outcome in zip(record_ids, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Error inesperado al enviar {record_id}: {outcome}")
+            results[record_id] = outcome is True
+
+        self._parked = []
+        return results
+
+    def run(self, price_records: PriceRecords) -> Dict[str, bool]:
+        """Version sincrona de `submit_prices`, para run_oracle."""
+        return asyncio.run(self.submit_prices(price_records))
+
+    def close(self) -> None:
+        """Cierra las conexiones de los huecos y libera los hilos del motor."""
+        for slot in self._connections:
+            self._discard_connection(slot)
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,173 @@
+"""Benchmark de rendimiento del oru00e1culo contra un nodo local.
+
+Envia el mismo lote de precios con cada modo de envio ('sequential',
+'pipelined', 'batched' y el motor 'async') a un `LocalNode` nuevo y mide
+precios publicados por segundo y la latencia de extremo a extremo de cada
+precio: desde que empieza el envio del lote hasta que el precio se incluye en
+un bloque. No necesita Westend ni una cuenta con fondos.
+
+    python -m price_oracle.benchmark --prices 200 --block-time 6
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from price_oracle.local_node import LocalKeypair, LocalNode, LocalNodeFactory
+from price_oracle.oracle import PriceOracle
+from price_oracle.price_batch import PriceBatch
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+MODES = ('sequential', 'pipelined', 'batched', 'async')
+
+
+def make_price_records(count: int, start: str = '2025-01-01T00:00:00') -> pd.DataFrame:
+    """Genera precios de prueba, uno cada 15 minutos.
+
+    Args:
+        count: Numero de precios.
+        start: Marca de tiempo del primero.
+
+    Returns:
+        pd.DataFrame: DataFrame con columnas 'id', 'timestamp', 'price'.
+    """
+    timestamps = pd.date_range(start, periods=count, freq='15min')
+    return pd.DataFrame({
+        'id': [f"bench-{i}" for i in range(count)],
+        'timestamp': timestamps.strftime('%Y-%m-%dT%H:%M:%S'),
+        'price': np.round(3.5 + 0.25 * np.sin(np.arange(count) / 20), 2),
+    })
+
+
+def run_mode(mode: str, count: int, block_time: float, poll_interval: Optional[float] = None,
+             signing_workers: int = 0, **node_options: Any) -> Dict[str, float]:
+    """Envia `count` precios con un modo de envio contra un nodo local nuevo.
+
+    Args:
+        mode: 'sequential', 'pipelined', 'batched' o 'async'.
+        count: Numero de precios.
+        block_time: Segundos entre bloques del nodo local.
+        poll_interval: Segundos entre consultas de bloques nuevos (por defecto ORACLE_POLL_INTERVAL).
+        signing_workers: Procesos que firman las extrinsecas en modo pipelined (0 firma en este proceso).
+        **node_options: Opciones de `LocalNode`, p. ej. failure_rate, drop_rate o sign_cost.
+
+    Returns:
+        Dict[str, float]: Precios enviados y publicados, segundos, precios/s, latencias p50/p95/max,
+        bloques producidos y llamadas RPC.
+    """
+    poll_interval = config.ORACLE_POLL_INTERVAL if poll_interval is None else poll_interval
+    node = LocalNode(block_time=block_time, **node_options)
+    # Los procesos de firma crean su propio nodo, que solo usan para crear extrinsecas
+    oracle = PriceOracle(substrate=node, signer=LocalKeypair(), connection_factory=LocalNodeFactory(node))
+    records = PriceBatch.from_frame(make_price_records(count))
+    first_block = len(node.blocks)
+
+    start = time.perf_counter()
+    try:
+        if mode == 'sequential':
+            results = oracle.submit_prices_batch(records, mode='sequential')
+        elif mode == 'pipelined':
+            results = oracle.submit_prices_pipelined(records, poll_interval=poll_interval,
+                                                     signing_workers=signing_workers)
+        elif mode == 'batched':
+            results = oracle.submit_prices_batched(records, poll_interval=poll_interval)
+        elif mode == 'async':
+            from price_oracle.async_engine import AsyncOracleEngine
+            engine = AsyncOracleEngine(oracle, connection_factory=oracle.connection_factory)
+            try:
+                results = engine.run(records)
+            finally:
+                engine.close()
+        else:
+            raise ValueError(f"Modo de envio no valido: {mode}")
+        elapsed = time.perf_counter() - start
+    finally:
+        node.stop()
+
+    published = [record_id for record_id, success in results.items() if success]
+    latencies = np.array([node.included_at[record_id] - start for record_id in published
+                          if record_id in node.included_at])
+    return {
+        'prices': count,
+        'published': len(published),
+        'seconds': elapsed,
+        'prices_per_sec': len(published) / elapsed if elapsed > 0 else 0.0,
+        'latency_p50': float(np.percentile(latencies, 50)) if latencies.size else float('nan'),
+        'latency_p95': float(np.percentile(latencies, 95)) if latencies.size else float('nan'),
+        'latency_max': float(latencies.max()) if latencies.size else float('nan'),
+        'blocks': len(node.blocks) - first_block,
+        'rpc_calls': node.rpc_calls,
+    }
+
+
+def benchmark_oracle(modes: List[str], count: int, block_time: float, sequential_count: Optional[int] = None,
+                     poll_interval: Optional[float] = None, signing_workers: int = 0,
+                     **node_options: Any) -> Dict[str, Dict[str, float]]:
+    """Ejecuta `run_mode` para cada modo.
+
+    Args:
+        modes: Modos a medir.
+        count: Precios por modo.
+        block_time: Segundos entre bloques del nodo local.
+        sequential_count: Precios del modo 'sequential', que tarda un bloque y 2 s por precio (por defecto `count`).
+        poll_interval: Segundos entre consultas de bloques nuevos.
+        signing_workers: Procesos que firman las extrinsecas en modo pipelined.
+        **node_options: Opciones de `LocalNode`.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Resultados de cada modo.
+    """
+    # Los registros por precio del oru00e1culo ocultarian el informe
+    logging.getLogger('price_oracle').setLevel(logging.WARNING)
+    results = {}
+    for mode in modes:
+        mode_count = sequential_count if mode == 'sequential' and sequential_count else count
+        logger.info(f"Midiendo {mode} con {mode_count} precios...")
+        results[mode] = run_mode(mode, mode_count, block_time, poll_interval, signing_workers, **node_options)
+    return results
+
+
+def main() -> None:
+    """Ejecuta el benchmark desde la lu00ednea de comandos."""
+    parser = argparse.ArgumentParser(description='Rendimiento de los modos de envio del oru00e1culo contra un nodo local')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES), help='Modos a medir')
+    parser.add_argument('--prices', type=int, default=200, help='Precios por modo')
+    parser.add_argument('--sequential-prices', type=int, default=5,
+                        help='Precios del modo sequential (un bloque y 2 s por precio)')
+    parser.add_argument('--block-time', type=float, default=6.0, help='Segundos entre bloques (Westend: 6)')
+    parser.add_argument('--poll-interval', type=float, default=config.ORACLE_POLL_INTERVAL,
+                        help='Segundos entre consultas de bloques nuevos en los modos pipelined y batched')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help='Probabilidad de que una llamada falle al ejecutarse')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='Probabilidad de que el pool rechace un envio')
+    parser.add_argument('--sign-cost', type=float, default=0.0,
+                        help='Segundos de CPU por extrinseca firmada (substrate-interface: unos milisegundos)')
+    parser.add_argument('--sign-workers', type=int, default=config.ORACLE_SIGNING_WORKERS,
+                        help='Procesos que firman las extrinsecas en modo pipelined (0 firma en el proceso principal)')
+    parser.add_argument('--seed', type=int, default=0, help='Semilla de los fallos aleatorios')
+    args = parser.parse_args()
+
+    results = benchmark_oracle(args.modes, args.prices, args.block_time, args.sequential_prices, args.poll_interval,
+                               args.sign_workers, failure_rate=args.failure_rate, drop_rate=args.drop_rate,
+                               sign_cost=args.sign_cost, seed=args.seed)
+    for mode, result in results.items():
+        logger.info(f"{mode}: {result['published']}/{result['prices']} precios en {result['seconds']:.1f}s, "
+                    f"{result['prices_per_sec']:.1f} precios/s, latencia p50 {result['latency_p50']:.1f}s "
+                    f"p95 {result['latency_p95']:.1f}s max {result['latency_max']:.1f}s, "
+                    f"{result['blocks']} bloques, {result['rpc_calls']} llamadas RPC")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Modo daemon del oru00e1culo de precios.
+
+`OracleDaemon` sustituye al cron job de 15 minutos: mantiene abierta una
+conexiu00f3n con el nodo (y las del motor async), de modo que el firmante, el saldo
+y la metadata del runtime se obtienen una sola vez, y envia los precios en
+cuanto cambian los datos en lugar de esperar a la siguiente ejecucion. Si el
+nodo deja de responder se reconecta con espera exponencial; la metadata ya
+descargada se reutiliza (ver `create_substrate`).
+"""
+
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Any, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from price_oracle.oracle import PriceOracle
+from price_oracle.run_oracle import price_data_path, run_oracle
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def data_version(source: str = 'file') -> Optional[Any]:
+    """Identifica el estado actual de los datos de precios, sin leerlos.
+
+    Args:
+        source: Fuente de los datos ('file' o 'db').
+
+    Returns:
+        Optional[Any]: Valor que cambia cuando cambian los datos, o None si no estan disponibles.
+    """
+    if source == 'db':
+        # La version del PriceStore cambia con cada escritura que modifica precios
+        from data_indexing.price_store import PriceStore
+        try:
+            return PriceStore().version()
+        except Exception as e:
+            logger.warning(f"No se pudo leer la version del PriceStore: {e}")
+            return None
+    if source != 'file':
+        return None
+    file_path = price_data_path()
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return file_path, stat.st_mtime_ns, stat.st_size
+
+
+class OracleDaemon:
+    """Envia precios de forma continua sobre una conexiu00f3n persistente."""
+
+    def __init__(self, data_source: str = 'file', time_filter: int = 24, mode: str = config.ORACLE_SUBMIT_MODE,
+                 engine: str = config.ORACLE_ENGINE, poll_interval: float = config.ORACLE_DAEMON_POLL_INTERVAL,
+                 health_interval: float = config.ORACLE_DAEMON_HEALTH_INTERVAL,
+                 backoff: float = config.ORACLE_RECONNECT_BACKOFF,
+                 max_backoff: float = config.ORACLE_RECONNECT_MAX_BACKOFF,
+                 policy: str = config.ORACLE_PUBLISH_POLICY,
+                 signing_workers: int = config.ORACLE_SIGNING_WORKERS):
+        """Crea el daemon.
+
+        Args:
+            data_source: Fuente de los datos ('file' o 'db').
+            time_filter: Filtrar precios de las u00faltimas N horas.
+            mode: Modo de envio del motor sincrono.
+            engine: Motor de envio ('sync' o 'async').
+            poll_interval: Segundos entre comprobaciones de datos nuevos.
+            health_interval: Segundos entre comprobaciones del nodo cuando no hay envios.
+            backoff: Espera inicial en segundos antes de reconectar o reintentar un envio fallido.
+            max_backoff: Espera maxima en segundos; la espera se duplica en cada fallo.
+            policy: Politica de publicacion ('all' o 'deviation').
+            signing_workers: Procesos que firman las extrinsecas en modo pipelined (0 firma en este proceso).
+        """
+        self.data_source = data_source
+        self.time_filter = time_filter
+        self.mode = mode
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self.health_interval = health_interval
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.policy = policy
+        self.signing_workers = signing_workers
+        self.oracle: Optional[PriceOracle] = None
+        self.async_engine = None
+        self._delay = backoff
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Pide al daemon que termine tras el envio en curso."""
+        self._stop.set()
+
+    def _next_delay(self) -> float:
+        """Devuelve la espera actual y duplica la siguiente, hasta max_backoff."""
+        delay = self._delay
+        self._delay = min(self._delay * 2, self.max_backoff)
+        return delay
+
+    def ensure_connected(self) -> bool:
+        """Conecta (o reconecta) con el nodo, con espera exponencial entre intentos.
+
+        Returns:
+            bool: True si hay conexiu00f3n, False si se pidio parar antes de conseguirla.
+        """
+        while not self._stop.is_set():
+            if self.oracle is None:
+                self.oracle = PriceOracle()
+            elif not self.oracle.is_connected:
+                self.oracle.connect()
+            if self.oracle.is_connected:
+                if self.engine == 'async' and self.async_engine is None:
+                    from price_oracle.async_engine import AsyncOracleEngine
+                    self.async_engine = AsyncOracleEngine(self.oracle)
+                return True
+            delay = self._next_delay()
+            logger.warning(f"Sin conexiu00f3n con el nodo, reintento en {delay:.1f}s")
+            self._stop.wait(delay)
+        return False
+
+    def run(self) -> None:
+        """Bucle principal: envia los precios cada vez que cambian los datos, hasta recibir SIGTERM o Ctrl+C."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        logger.info(f"Oru00e1culo en modo daemon (fuente: {self.data_source}, motor: {self.engine})")
+
+        seen = processed = None
+        retry_at: Optional[float] = None
+        next_health = time.monotonic() + self.health_interval
+        try:
+            while not self._stop.is_set():
+                if not self.ensure_connected():
+                    break
+                version = data_version(self.data_source)
+                # Se espera a que los datos no cambien durante un intervalo para no leer un archivo a medio escribir
+                stable = version is not None and version == seen
+                seen = version
+                now = time.monotonic()
+                if stable and (version != processed or (retry_at is not None and now >= retry_at)):
+                    results = run_oracle(self.data_source, self.time_filter, self.mode, self.engine,
+                                         oracle=self.oracle, async_engine=self.async_engine, policy=self.policy,
+                                         signing_workers=self.signing_workers)
+                    processed = version
+                    if results is not None and all(results.values()):
+                        self._delay = self.backoff
+                        retry_at = None
+                    else:
+                        # El ledger conserva los precios no confirmados para el reintento
+                        delay = self._next_delay()
+                        logger.warning(f"Envio incompleto, reintento en {delay:.1f}s")
+                        retry_at = now + delay
+                        self.oracle.ping()
+                    next_health = time.monotonic() + self.health_interval
+                elif now >= next_health:
+                    # Mantiene viva la conexiu00f3n y detecta caidas del nodo sin esperar al siguiente envio
+                    if self.oracle.ping():
+                        self._delay = self.backoff
+                    next_health = now + self.health_interval
+                self._stop.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+        logger.info("Oru00e1culo detenido")
+
+    def close(self) -> None:
+        """Cierra las conexiones del oru00e1culo y del motor async."""
+        if self.async_engine is not None:
+            self.async_engine.close()
+            self.async_engine = None
+        if self.oracle is not None:
+            self.oracle.close()
@@ -0,0 +1,217 @@
+"""Ledger idempotente de los precios enviados por el oru00e1culo.
+
+Cada precio se identifica por su id de registro y un hash de lo que se publica
+on-chain (id, timestamp en ms y precio en centavos). `run_oracle` consulta el
+ledger antes de conectarse a la cadena y solo envia los precios que aun no estan
+confirmados, de modo que las ventanas de 24 horas solapadas de cada ejecucion no
+vuelven a publicar lo ya publicado. La comprobacion es una busqueda en un indice
+de SQLite.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PENDING, CONFIRMED, FAILED = 'pending', 'confirmed', 'failed'
+LOOKUP_CHUNK = 500  # Claves por consulta, por debajo del limite de parametros de SQLite
+
+# (id del registro, timestamp en ms, precio en centavos)
+PriceKey = Tuple[str, int, int]
+
+
+def price_hash(record_id: str, timestamp_ms: int, price_cents: int) -> str:
+    """Hash del contenido publicado para un precio.
+
+    Args:
+        record_id: Identificador del registro de precio.
+        timestamp_ms: Marca de tiempo en milisegundos.
+        price_cents: Precio en centavos.
+
+    Returns:
+        str: Digest hexadecimal; cambia si cambia el precio o el timestamp de un mismo id.
+    """
+    return hashlib.sha256(f"{record_id}:{int(timestamp_ms)}:{int(price_cents)}".encode("utf-8")).hexdigest()
+
+
+class SubmissionLedger:
+    """Registro en SQLite del estado de publicacion de cada precio."""
+
+    def __init__(self, db_path: str = config.ORACLE_LEDGER_PATH):
+        """Abre (y crea si hace falta) el ledger.
+
+        Args:
+            db_path: Ruta del fichero SQLite.
+        """
+        self.db_path = db_path
+        self._init_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Abre una conexion para una transaccion (confirmada, o revertida si falla) y la cierra."""
+        # El daemon y las ejecuciones por cron pueden escribir a la vez
+        conn = sqlite3.connect(self.db_path, timeout=5.0)
+        try:
+            conn.execute("PRAGMA busy_timeout = 5000")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS submissions (
+                    record_id TEXT NOT NULL,
+                    price_hash TEXT NOT NULL,
+                    timestamp_ms INTEGER NOT NULL,
+                    price_cents INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    block_hash TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (record_id, price_hash)
+                ) WITHOUT ROWID
+                """
+            )
+            # Prefijo redundante de idx_submissions_status_time, creado por versiones anteriores
+            conn.execute("DROP INDEX IF EXISTS idx_submissions_status")
+            # Ultimo precio confirmado, para la politica de publicacion
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_status_time ON submissions (status, timestamp_ms)")
+
+    def unconfirmed(self, keys: Sequence[PriceKey]) -> List[bool]:
+        """Indica que precios aun no estan confirmados on-chain.
+
+        Args:
+            keys: (id, timestamp en ms, precio en centavos) de cada precio candidato.
+
+        Returns:
+            List[bool]: True para los precios que hay que enviar, en el orden de `keys`.
+        """
+        hashes = [price_hash(*key) for key in keys]
+        confirmed = set()
+        try:
+            with self._connect() as conn:
+                for start in range(0, len(keys), LOOKUP_CHUNK):
+                    record_ids = list({key[0] for key in keys[start:start + LOOKUP_CHUNK]})
+                    placeholders = ",".join("?" for _ in record_ids)
+                    # Busqueda por clave primaria (record_id, ...) y filtro del estado en esas filas; '+status'
+                    # evita que SQLite recorra todos los confirmados por idx_submissions_status_time
+                    rows = conn.execute(
+                        f"SELECT record_id, price_hash FROM submissions "
+                        f"WHERE +status = ? AND record_id IN ({placeholders})",
+                        [CONFIRMED] + record_ids
+                    ).fetchall()
+                    confirmed.update(rows)
+        except sqlite3.Error as e:
+            # Sin ledger se envia todo: un duplicado es preferible a perder un precio
+            logger.error(f"Error al leer el ledger: {e}")
+        return [(key[0], digest) not in confirmed for key, digest in zip(keys, hashes)]
+
+    def mark_pending(self, keys: Sequence[PriceKey]) -> None:
+        """Registra que se van a enviar estos precios.
+
+        Args:
+            keys: (id, timestamp en ms, precio en centavos) de cada precio enviado.
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    """
+                    INSERT INTO submissions (record_id, price_hash, timestamp_ms, price_cents, status,
+                                             attempts, updated_at)
+                    VALUES (?, ?, ?, ?, ?, 1, ?)
+                    ON CONFLICT (record_id, price_hash) DO UPDATE SET
+                        status = excluded.status, attempts = attempts + 1, updated_at = excluded.updated_at
+                    WHERE status != 'confirmed'
+                    """,
+                    [(key[0], price_hash(*key), int(key[1]), int(key[2]), PENDING, now) for key in keys]
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error al escribir en el ledger: {e}")
+
+    def record_results(self, keys: Sequence[PriceKey], results: Dict[str, bool],
+                       block_hashes: Optional[Dict[str, str]] = None) -> None:
+        """Guarda el resultado de un envio.
+
+        Los precios sin resultado quedan pendientes y se volveran a enviar.
+
+        Args:
+            keys: (id, timestamp en ms, precio en centavos) de cada precio enviado.
+            results: Resultados {id: u00e9xito} del oru00e1culo.
+            block_hashes: Bloque que incluyo cada id, si se conoce.
+        """
+        block_hashes = block_hashes or {}
+        now = time.time()
+        rows = [
+            (CONFIRMED if results[key[0]] else FAILED, block_hashes.get(key[0]), now, key[0], price_hash(*key))
+            for key in keys if key[0] in results
+        ]
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "UPDATE submissions SET status = ?, block_hash = ?, updated_at = ? "
+                    "WHERE record_id = ? AND price_hash = ? AND status != 'confirmed'",
+                    rows
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error al escribir en el ledger: {e}")
+
+    def last_confirmed(self) -> Optional[Tuple[int, int]]:
+        """Devuelve el ultimo precio publicado on-chain, sin consultar la cadena.
+
+        Returns:
+            Optional[Tuple[int, int]]: (timestamp en ms, precio en centavos) del precio confirmado
+            mas reciente, o None si aun no se ha confirmado ninguno.
+        """
+        try:
+            with self._connect() as conn:
+                return conn.execute(
+                    "SELECT timestamp_ms, price_cents FROM submissions WHERE status = ? "
+                    "ORDER BY timestamp_ms DESC LIMIT 1",
+                    (CONFIRMED,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error al leer el ledger: {e}")
+            return None
+
+    def entries(self) -> List[Tuple[str, int, int, str, float]]:
+        """Devuelve todas las entradas del ledger, para conciliarlas con lo publicado on-chain.
+
+        Returns:
+            List[Tuple[str, int, int, str, float]]: (id, timestamp en ms, precio en centavos, estado,
+            ultima actualizacion) de cada precio enviado.
+        """
+        try:
+            with self._connect() as conn:
+                return conn.execute(
+                    "SELECT record_id, timestamp_ms, price_cents, status, updated_at FROM submissions"
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error al leer el ledger: {e}")
+            return []
+
+    def summary(self) -> Dict[str, int]:
+        """Devuelve el numero de precios por estado."""
+        try:
+            with self._connect() as conn:
+                return dict(conn.execute("SELECT status, COUNT(*) FROM submissions GROUP BY status").fetchall())
+        except sqlite3.Error as e:
+            logger.error(f"Error al leer el ledger: {e}")
+            return {}
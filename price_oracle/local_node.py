@@ -0,0 +1,444 @@
+"""Nodo Substrate local para pruebas y benchmarks del oru00e1culo.
+
+`LocalNode` imita la parte de la API de `SubstrateInterface` que usan
+`PriceOracle` y `AsyncOracleEngine` (compose_call, create_signed_extrinsic,
+submit_extrinsic, System.Account, nonces, bloques y eventos, constantes y
+payment_queryInfo) y la lectura paginada de PriceFeed.Prices que usa la
+conciliacion, sin red ni runtime real: las extrinsecas van a un pool en
+memoria y un hilo produce un bloque cada `block_time` segundos. Permite medir
+el rendimiento de los modos de envio y reproducir fallos: llamadas que fallan al
+ejecutarse, rechazos del pool y un pool de tamau00f1o limitado.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from substrateinterface.exceptions import SubstrateRequestException
+
+LOCAL_ADDRESS = '5LocalOracleSigner'
+EXISTENTIAL_BALANCE = 10 ** 16  # Saldo inicial de cualquier cuenta (1 000 000 WND)
+
+# Pesos y longitudes del runtime simulado, del orden de los de Westend
+BLOCK_WEIGHTS = {
+    'base_block': {'ref_time': 390_584_000, 'proof_size': 0},
+    'max_block': {'ref_time': 2_000_000_000_000, 'proof_size': 5_242_880},
+    'per_class': {'normal': {'max_extrinsic': {'ref_time': 1_479_873_955_000, 'proof_size': 3_932_160}}},
+}
+BLOCK_LENGTH = {'max': {'normal': 3_932_160, 'operational': 5_242_880, 'mandatory': 5_242_880}}
+CALL_WEIGHT = {'ref_time': 300_000_000, 'proof_size': 3_593}
+
+
+@dataclass
+class LocalKeypair:
+    """Cuenta firmante del nodo local; no firma nada, solo identifica al emisor."""
+    ss58_address: str = LOCAL_ADDRESS
+
+
+@dataclass
+class LocalCall:
+    """Llamada compuesta, con el tamau00f1o aproximado de su codificacion SCALE."""
+    call_module: str
+    call_function: str
+    call_args: Dict[str, Any]
+
+    @property
+    def value(self) -> Dict[str, Any]:
+        return {'call_module': self.call_module, 'call_function': self.call_function, 'call_args': self.call_args}
+
+    @property
+    def data(self) -> SimpleNamespace:
+        return SimpleNamespace(length=self.encoded_length())
+
+    def encoded_length(self) -> int:
+        # Indices de pallet y llamada, y cada argumento como compacto o entero de 8 bytes
+        length = 2
+        for arg in self.call_args.values():
+            if isinstance(arg, list):
+                length += 4 + sum(call.encoded_length() for call in arg)
+            elif isinstance(arg, str):
+                length += 1 + len(arg.encode('utf-8'))
+            else:
+                length += 8
+        return length
+
+    def to_dict(self) -> Dict[str, Any]:
+        args = {name: [call.to_dict() for call in arg] if isinstance(arg, list) else arg
+                for name, arg in self.call_args.items()}
+        return {'call_module': self.call_module, 'call_function': self.call_function, 'call_args': args}
+
+    @classmethod
+    def from_dict(cls, value: Dict[str, Any]) -> 'LocalCall':
+        args = {name: [cls.from_dict(call) for call in arg] if isinstance(arg, list) else arg
+                for name, arg in value['call_args'].items()}
+        return cls(value['call_module'], value['call_function'], args)
+
+    def price_ids(self) -> List[str]:
+        """Ids de los precios de la llamada, en orden (varios si es un lote)."""
+        if self.call_module == 'Utility':
+            return [record_id for call in self.call_args['calls'] for record_id in call.price_ids()]
+        return [str(self.call_args.get('id'))]
+
+
+@dataclass(eq=False)
+class LocalExtrinsic:
+    """Extrinseca firmada por una cuenta con un nonce."""
+    call: LocalCall
+    address: str
+    nonce: int
+    extrinsic_hash: bytes = b''
+    submitted_at: Optional[float] = None
+
+    def __post_init__(self):
+        self.extrinsic_hash = hashlib.blake2b(bytes.fromhex(self.data[2:]), digest_size=32).digest()
+
+    @property
+    def data(self) -> str:
+        """Codificacion en hex, la que se envia con author_submitExtrinsic."""
+        payload = {'address': self.address, 'nonce': self.nonce, 'call': self.call.to_dict()}
+        return '0x' + json.dumps(payload, sort_keys=True).encode('utf-8').hex()
+
+    @classmethod
+    def decode(cls, data: str) -> 'LocalExtrinsic':
+        payload = json.loads(bytes.fromhex(data[2:]))
+        return cls(LocalCall.from_dict(payload['call']), payload['address'], payload['nonce'])
+
+
+@dataclass
+class LocalReceipt:
+    """Recibo de envio, con los atributos de `ExtrinsicReceipt` que usa el oru00e1culo."""
+    extrinsic_hash: str
+    block_hash: Optional[str] = None
+    is_success: Optional[bool] = None
+    error_message: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class LocalEvent:
+    """Evento de un bloque, con el indice de la extrinseca que lo emitio."""
+    extrinsic_idx: int
+    value: Dict[str, Any]
+
+
+@dataclass
+class LocalBlock:
+    number: int
+    hash: str
+    produced_at: float
+    extrinsics: List[LocalExtrinsic] = field(default_factory=list)
+    events: List[LocalEvent] = field(default_factory=list)
+
+
+def pool_error(code: int, message: str, data: str = '') -> SubstrateRequestException:
+    """Crea el error JSON-RPC con el que el nodo rechaza una extrinseca."""
+    return SubstrateRequestException({'code': code, 'message': message, 'data': data})
+
+
+class LocalNode:
+    """Nodo Substrate en memoria con tiempo de bloque y fallos configurables."""
+
+    def __init__(self, block_time: float = 6.0, block_capacity: int = 1000, pool_limit: int = 8192,
+                 failure_rate: float = 0.0, drop_rate: float = 0.0, fail_ids: Optional[Set[str]] = None,
+                 sign_cost: float = 0.0, seed: Optional[int] = None, produce_blocks: bool = True):
+        """Crea el nodo y empieza a producir bloques.
+
+        Args:
+            block_time: Segundos entre bloques.
+            block_capacity: Extrinsecas que caben en un bloque.
+            pool_limit: Extrinsecas en el pool a partir de las cuales se rechazan envios (error 1016).
+            failure_rate: Probabilidad de que una llamada falle al ejecutarse (ExtrinsicFailed o BatchInterrupted).
+            drop_rate: Probabilidad de que el pool rechace un envio (error 1016).
+            fail_ids: Ids de precio cuya llamada siempre falla al ejecutarse.
+            sign_cost: Segundos de CPU que cuesta crear y firmar una extrinseca, para simular la
+                codificacion SCALE y la firma sr25519 de substrate-interface.
+            seed: Semilla de los fallos aleatorios.
+            produce_blocks: Si es False no se producen bloques; el nodo solo sirve para crear extrinsecas.
+        """
+        self.block_time = block_time
+        self.block_capacity = block_capacity
+        self.pool_limit = pool_limit
+        self.failure_rate = failure_rate
+        self.drop_rate = drop_rate
+        self.fail_ids = set(fail_ids or ())
+        self.sign_cost = sign_cost
+        self.random = random.Random(seed)
+        self.blocks: List[LocalBlock] = [LocalBlock(0, self._block_hash(0), time.perf_counter())]
+        self.nonces: Dict[str, int] = {}
+        self.pool: List[LocalExtrinsic] = []
+        # Id de precio -> instante en que se incluyo con exito, para medir latencias
+        self.included_at: Dict[str, float] = {}
+        # Almacenamiento PriceFeed.Prices: id -> {'timestamp', 'price'} del ultimo precio publicado
+        self.prices: Dict[str, Dict[str, int]] = {}
+        self.rpc_calls = 0
+        self._cond = threading.Condition()
+        self._stopped = threading.Event()
+        self._producer = threading.Thread(target=self._produce_blocks, name='local-node', daemon=True)
+        if produce_blocks:
+            self._producer.start()
+
+    @staticmethod
+    def _block_hash(number: int) -> str:
+        return '0x' + hashlib.blake2b(f"block:{number}".encode('utf-8'), digest_size=32).hexdigest()
+
+    def _rpc(self) -> None:
+        if self._stopped.is_set():
+            raise ConnectionError("Nodo local detenido")
+        self.rpc_calls += 1
+
+    def stop(self) -> None:
+        """Detiene la produccion de bloques."""
+        self._stopped.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._producer.is_alive():
+            self._producer.join()
+
+    def close(self) -> None:
+        """Cierre de conexiu00f3n; el nodo sigue produciendo bloques para otros clientes."""
+
+    # Produccion de bloques
+
+    def _produce_blocks(self) -> None:
+        while not self._stopped.wait(self.block_time):
+            with self._cond:
+                self._produce_block()
+                self._cond.notify_all()
+
+    def _ready(self) -> List[LocalExtrinsic]:
+        """Extrinsecas del pool cuyo nonce es el siguiente de su cuenta, en orden."""
+        by_account: Dict[str, Dict[int, LocalExtrinsic]] = {}
+        for extrinsic in self.pool:
+            by_account.setdefault(extrinsic.address, {})[extrinsic.nonce] = extrinsic
+        ready = []
+        for address, pending in by_account.items():
+            nonce = self.nonces.get(address, 0)
+            while nonce in pending:
+                ready.append(pending[nonce])
+                nonce += 1
+        return ready
+
+    def _produce_block(self) -> None:
+        number = len(self.blocks)
+        block = LocalBlock(number, self._block_hash(number), time.perf_counter())
+        for extrinsic in self._ready()[:self.block_capacity]:
+            self.pool.remove(extrinsic)
+            self.nonces[extrinsic.address] = extrinsic.nonce + 1
+            idx = len(block.extrinsics)
+            block.extrinsics.append(extrinsic)
+            block.events.extend(self._dispatch(idx, extrinsic.call, block.produced_at))
+        self.blocks.append(block)
+
+    def _call_fails(self, record_id: str) -> bool:
+        return record_id in self.fail_ids or (self.failure_rate > 0 and self.random.random() < self.failure_rate)
+
+    def _dispatch(self, idx: int, call: LocalCall, produced_at: float) -> List[LocalEvent]:
+        """Ejecuta una llamada y devuelve sus eventos, como lo haria el runtime."""
+        def event(module_id: str, event_id: str, attributes: Any = None) -> LocalEvent:
+            return LocalEvent(idx, {'module_id': module_id, 'event_id': event_id, 'attributes': attributes})
+
+        dispatch_error = {'Module': {'index': 0, 'error': '0x00000000'}}
+        if call.call_module != 'Utility':
+            record_id = call.price_ids()[0]
+            if self._call_fails(record_id):
+                return [event('System', 'ExtrinsicFailed', {'dispatch_error': dispatch_error})]
+            self._store_price(call)
+            self.included_at[record_id] = produced_at
+            return [event('System', 'ExtrinsicSuccess')]
+
+        record_ids = call.price_ids()
+        failed_index = next((index for index, record_id in enumerate(record_ids) if self._call_fails(record_id)), None)
+        if failed_index is not None and call.call_function == 'batch_all':
+            # batch_all revierte todas las llamadas del lote
+            return [event('System', 'ExtrinsicFailed', {'dispatch_error': dispatch_error})]
+        events = []
+        completed = record_ids if failed_index is None else record_ids[:failed_index]
+        for record_id, price_call in zip(completed, call.call_args['calls']):
+            self._store_price(price_call)
+            self.included_at[record_id] = produced_at
+            events.append(event('Utility', 'ItemCompleted'))
+        if failed_index is None:
+            events.append(event('Utility', 'BatchCompleted'))
+        else:
+            events.append(event('Utility', 'BatchInterrupted', {'index': failed_index, 'error': dispatch_error}))
+        events.append(event('System', 'ExtrinsicSuccess'))
+        return events
+
+    def _store_price(self, call: LocalCall) -> None:
+        self.prices[str(call.call_args['id'])] = {'timestamp': call.call_args['timestamp'],
+                                                  'price': call.call_args['price']}
+
+    @staticmethod
+    def storage_key(record_id: str) -> str:
+        """Clave de almacenamiento de un id, con hasher Blake2_128Concat como en un mapa de FRAME."""
+        encoded = record_id.encode('utf-8')
+        return '0x' + hashlib.blake2b(encoded, digest_size=16).hexdigest() + encoded.hex()
+
+    # API de SubstrateInterface
+
+    def compose_call(self, call_module: str, call_function: str, call_params: Dict[str, Any] = None) -> LocalCall:
+        return LocalCall(call_module, call_function, dict(call_params or {}))
+
+    def get_account_nonce(self, account_address: str) -> int:
+        """Siguiente nonce de la cuenta contando las extrinsecas listas en el pool (system_accountNextIndex)."""
+        self._rpc()
+        with self._cond:
+            nonce = self.nonces.get(account_address, 0)
+            pooled = {extrinsic.nonce for extrinsic in self.pool if extrinsic.address == account_address}
+            while nonce in pooled:
+                nonce += 1
+            return nonce
+
+    def query(self, module: str, storage_function: str, params: Optional[List[Any]] = None) -> SimpleNamespace:
+        self._rpc()
+        if (module, storage_function) != ('System', 'Account'):
+            raise ValueError(f"Almacenamiento no soportado por el nodo local: {module}.{storage_function}")
+        address = params[0]
+        with self._cond:
+            nonce = self.nonces.get(address, 0)
+        return SimpleNamespace(value={
+            'nonce': nonce, 'consumers': 0, 'providers': 1, 'sufficients': 0,
+            'data': {'free': EXISTENTIAL_BALANCE, 'reserved': 0, 'frozen': 0, 'flags': 0},
+        })
+
+    def query_map(self, module: str, storage_function: str, params: Optional[List[Any]] = None,
+                  block_hash: Optional[str] = None, max_results: Optional[int] = None,
+                  start_key: Optional[str] = None, page_size: int = 100,
+                  ignore_decoding_errors: bool = True) -> Iterator[Tuple[SimpleNamespace, SimpleNamespace]]:
+        """Recorre PriceFeed.Prices por paginas de `page_size` claves, en orden de clave de almacenamiento.
+
+        Cada pagina cuesta dos llamadas RPC (state_getKeysPaged y state_queryStorageAt). Se lee
+        el estado actual; `block_hash` se ignora.
+        """
+        if (module, storage_function) != ('PriceFeed', 'Prices'):
+            raise ValueError(f"Almacenamiento no soportado por el nodo local: {module}.{storage_function}")
+        returned = 0
+        while max_results is None or returned < max_results:
+            self._rpc()
+            with self._cond:
+                keys = sorted((self.storage_key(record_id), record_id) for record_id in self.prices)
+                page = [(key, record_id) for key, record_id in keys if start_key is None or key > start_key]
+                page = page[:page_size]
+                values = [dict(self.prices[record_id]) for _, record_id in page]
+            if not page:
+                return
+            self._rpc()
+            for (_, record_id), value in zip(page, values):
+                if max_results is not None and returned >= max_results:
+                    return
+                yield SimpleNamespace(value=record_id), SimpleNamespace(value=value)
+                returned += 1
+            start_key = page[-1][0]
+
+    def create_signed_extrinsic(self, call: LocalCall, keypair: Any, era: Any = None, nonce: Optional[int] = None,
+                                tip: int = 0, tip_asset_id: Any = None, signature: Any = None) -> LocalExtrinsic:
+        if nonce is None:
+            nonce = self.get_account_nonce(keypair.ss58_address)
+        extrinsic = LocalExtrinsic(call, keypair.ss58_address, nonce)
+        deadline = time.process_time() + self.sign_cost
+        digest = extrinsic.extrinsic_hash
+        while time.process_time() < deadline:
+            digest = hashlib.blake2b(digest).digest()
+        return extrinsic
+
+    def rpc_request(self, method: str, params: List[Any]) -> Dict[str, Any]:
+        """Peticion JSON-RPC; solo se admite author_submitExtrinsic con una extrinseca codificada."""
+        if method != 'author_submitExtrinsic':
+            raise ValueError(f"Metodo RPC no soportado por el nodo local: {method}")
+        try:
+            receipt = self.submit_extrinsic(LocalExtrinsic.decode(params[0]))
+        except SubstrateRequestException as e:
+            return {'jsonrpc': '2.0', 'error': e.args[0]}
+        return {'jsonrpc': '2.0', 'result': receipt.extrinsic_hash}
+
+    def submit_extrinsic(self, extrinsic: LocalExtrinsic, wait_for_inclusion: bool = False,
+                         wait_for_finalization: bool = False) -> LocalReceipt:
+        """Valida la extrinseca contra el pool y la cuenta; opcionalmente espera a que se incluya."""
+        self._rpc()
+        extrinsic_hash = '0x' + extrinsic.extrinsic_hash.hex()
+        with self._cond:
+            if extrinsic.nonce < self.nonces.get(extrinsic.address, 0):
+                raise pool_error(1010, 'Invalid Transaction', 'Transaction is outdated')
+            if any(pooled.address == extrinsic.address and pooled.nonce == extrinsic.nonce for pooled in self.pool):
+                raise pool_error(1014, 'Priority is too low')
+            if len(self.pool) >= self.pool_limit or (self.drop_rate > 0 and self.random.random() < self.drop_rate):
+                raise pool_error(1016, 'Immediately Dropped', 'The transaction could not enter the pool')
+            extrinsic.submitted_at = time.perf_counter()
+            self.pool.append(extrinsic)
+            if not (wait_for_inclusion or wait_for_finalization):
+                return LocalReceipt(extrinsic_hash)
+
+            searched = len(self.blocks)
+            while True:
+                for block in self.blocks[searched:]:
+                    if extrinsic in block.extrinsics:
+                        idx = block.extrinsics.index(extrinsic)
+                        failed = [e.value['attributes'] for e in block.events
+                                  if e.extrinsic_idx == idx and e.value['event_id'] == 'ExtrinsicFailed']
+                        return LocalReceipt(extrinsic_hash, block.hash, not failed,
+                                            failed[0]['dispatch_error'] if failed else None)
+                searched = len(self.blocks)
+                if self._stopped.is_set():
+                    raise ConnectionError("Nodo local detenido")
+                self._cond.wait()
+
+    def get_chain_head(self) -> str:
+        self._rpc()
+        with self._cond:
+            return self.blocks[-1].hash
+
+    def _find_block(self, block_hash: str) -> LocalBlock:
+        for block in reversed(self.blocks):
+            if block.hash == block_hash:
+                return block
+        raise SubstrateRequestException(f"Bloque no encontrado: {block_hash}")
+
+    def get_block_number(self, block_hash: str) -> int:
+        self._rpc()
+        with self._cond:
+            return self._find_block(block_hash).number
+
+    def get_block(self, block_hash: Optional[str] = None, block_number: Optional[int] = None) -> Dict[str, Any]:
+        self._rpc()
+        with self._cond:
+            block = self._find_block(block_hash) if block_number is None else self.blocks[block_number]
+            return {'header': {'hash': block.hash, 'number': block.number}, 'extrinsics': list(block.extrinsics)}
+
+    def get_events(self, block_hash: Optional[str] = None) -> List[LocalEvent]:
+        self._rpc()
+        with self._cond:
+            return list(self._find_block(block_hash).events)
+
+    def get_constant(self, module_name: str, constant_name: str, block_hash: Optional[str] = None) -> SimpleNamespace:
+        constants = {('System', 'BlockWeights'): BLOCK_WEIGHTS, ('System', 'BlockLength'): BLOCK_LENGTH}
+        return SimpleNamespace(value=constants[(module_name, constant_name)])
+
+    def get_payment_info(self, call: LocalCall, keypair: Any) -> Dict[str, Any]:
+        self._rpc()
+        return {'weight': dict(CALL_WEIGHT), 'class': 'normal', 'partialFee': 1_000_000_000}
+
+
+class LocalNodeFactory:
+    """Fabrica de conexiones con un `LocalNode`, que puede pasarse a los procesos de firma.
+
+    En el proceso que creo el nodo devuelve siempre ese nodo, de modo que el oru00e1culo
+    y los huecos de `AsyncOracleEngine` envian al mismo pool. Al copiarse a otro proceso
+    (con fork o con spawn) solo viaja el coste de firma: alli crea un nodo propio sin
+    produccion de bloques, que los procesos de `ParallelSigner` usan para crear extrinsecas.
+    """
+
+    def __init__(self, node: LocalNode):
+        self.node: Optional[LocalNode] = node
+        self.sign_cost = node.sign_cost
+
+    def __call__(self) -> LocalNode:
+        if self.node is None:
+            self.node = LocalNode(sign_cost=self.sign_cost, produce_blocks=False)
+        return self.node
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {'node': None, 'sign_cost': self.sign_cost}
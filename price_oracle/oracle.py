@@ -5,15 +5,20 @@ y enviar transacciones de precios como un oru00e1culo descentralizado.
 """
 
 import os
+import sys
 import logging
 import time
 from datetime import datetime
-import pandas as pd
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 from dotenv import load_dotenv
 from substrateinterface import SubstrateInterface
 from substrateinterface.keypair import Keypair
 from substrateinterface.exceptions import SubstrateRequestException
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from price_oracle.price_batch import PriceRecords, as_price_batch
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -27,15 +32,80 @@ WESTEND_WS_URL = os.getenv('WESTEND_WS_URL', 'wss://westend-rpc.polkadot.io')
 SIGNER_SEED = os.getenv('SIGNER_SEED')
 
 
+def timestamp_to_ms(timestamp: Union[str, datetime]) -> int:
+    """Convierte una marca de tiempo ISO (o datetime) a milisegundos, como se publica on-chain.
+
+    Sin zona horaria se interpreta en la zona horaria local, como en `timestamps_to_ms`.
+    """
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+    return int(timestamp.timestamp() * 1000)
+
+
+def price_to_cents(price: float) -> int:
+    """Convierte un precio en USD a un entero en centavos (multiplicando por 100 y redondeando)."""
+    return int(round(price * 100))
+
+
+def price_call_params(record_id: str, timestamp: Union[str, datetime], price: float) -> Dict[str, Any]:
+    """Parametros de PriceFeed.submitPrice para un precio (timestamp en ms y precio en centavos)."""
+    return {'id': record_id, 'timestamp': timestamp_to_ms(timestamp), 'price': price_to_cents(price)}
+
+
+class SignedExtrinsic(NamedTuple):
+    """Extrinseca submitPrice firmada fuera de la conexiu00f3n del oru00e1culo (ver price_oracle/signing.py)."""
+    data: Optional[str]  # Extrinseca codificada en hex, o None si no se pudo firmar
+    extrinsic_hash: Optional[str]
+    nonce: int
+    call_params: Dict[str, Any]
+    error: Optional[str] = None
+
+
+# Metadata del runtime por specVersion, compartida por todas las conexiones del proceso:
+# una reconexion o una conexion nueva del motor async no vuelve a descargarla, y tras
+# una actualizacion del runtime solo se descarga la version nueva
+_metadata_cache: Dict[int, object] = {}
+
+
+def create_substrate() -> SubstrateInterface:
+    """Abre una conexiu00f3n websocket con el nodo de Westend."""
+    substrate = SubstrateInterface(
+        url=WESTEND_WS_URL,
+        ss58_format=42,  # Formato de direcciu00f3n para Westend
+        type_registry_preset='westend'
+    )
+    substrate.metadata_cache = _metadata_cache
+    return substrate
+
+
 class PriceOracle:
     """Oru00e1culo de precios para enviar datos a la blockchain Westend de Polkadot."""
 
-    def __init__(self):
-        """Inicializa la conexiu00f3n con la blockchain y configura la cuenta firmante."""
+    def __init__(self, substrate: Optional[SubstrateInterface] = None, signer: Optional[Keypair] = None,
+                 connection_factory: Callable[[], SubstrateInterface] = create_substrate):
+        """Inicializa la conexiu00f3n con la blockchain y configura la cuenta firmante.
+        
+        Args:
+            substrate: Conexiu00f3n ya abierta (p. ej. un `LocalNode`); por defecto se conecta a WESTEND_WS_URL.
+            signer: Cuenta firmante para `substrate`; por defecto se deriva de SIGNER_SEED al conectar.
+            connection_factory: Funcion que abre una conexiu00f3n; la usan `connect` y los procesos de firma.
+        """
         self.substrate = None
         self.signer = None
         self.is_connected = False
-        self.connect()
+        # Siguiente nonce del firmante, gestionado localmente en modo pipelined
+        self._nonce = None
+        # Llamadas por lote Utility.batch_all, calculado una vez por conexion
+        self._batch_chunk_size = None
+        # Bloque en el que se incluyo cada id del ultimo envio, para el ledger
+        self.block_hashes: Dict[str, str] = {}
+        self.connection_factory = connection_factory
+        if substrate is not None:
+            self.substrate = substrate
+            self.signer = signer
+            self.is_connected = signer is not None
+        else:
+            self.connect()
 
     def connect(self) -> bool:
         """Establece conexiu00f3n con la blockchain Westend y configura la cuenta firmante.
@@ -45,30 +115,31 @@ class PriceOracle:
         """
         try:
             logger.info(f"Conectando a Westend en {WESTEND_WS_URL}")
-            self.substrate = SubstrateInterface(
-                url=WESTEND_WS_URL,
-                ss58_format=42,  # Formato de direcciu00f3n para Westend
-                type_registry_preset='westend'
-            )
-            
-            # Verificar si tenemos la semilla para el firmante
-            if not SIGNER_SEED:
-                logger.error("No se ha proporcionado SIGNER_SEED en .env")
-                return False
-            
-            # Configurar la cuenta firmante
-            self.signer = Keypair.create_from_mnemonic(SIGNER_SEED)
-            logger.info(f"Cuenta firmante configurada: {self.signer.ss58_address}")
-            
-            # Verificar saldo de la cuenta
-            account_info = self.substrate.query(
-                'System', 'Account', [self.signer.ss58_address]
-            )
-            balance = account_info.value['data']['free']
-            logger.info(f"Saldo disponible: {balance / 10**10} WND")
+            self.close()
+            self.substrate = self.connection_factory()
+            self._nonce = None
+            self._batch_chunk_size = None
             
-            if balance == 0:
-                logger.warning("La cuenta no tiene saldo para enviar transacciones")
+            # En una reconexion se conservan el firmante y la comprobacion de saldo
+            if self.signer is None:
+                # Verificar si tenemos la semilla para el firmante
+                if not SIGNER_SEED:
+                    logger.error("No se ha proporcionado SIGNER_SEED en .env")
+                    return False
+                
+                # Configurar la cuenta firmante
+                self.signer = Keypair.create_from_mnemonic(SIGNER_SEED)
+                logger.info(f"Cuenta firmante configurada: {self.signer.ss58_address}")
+                
+                # Verificar saldo de la cuenta
+                account_info = self.substrate.query(
+                    'System', 'Account', [self.signer.ss58_address]
+                )
+                balance = account_info.value['data']['free']
+                logger.info(f"Saldo disponible: {balance / 10**10} WND")
+                
+                if balance == 0:
+                    logger.warning("La cuenta no tiene saldo para enviar transacciones")
                 
             self.is_connected = True
             return True
@@ -78,6 +149,64 @@ class PriceOracle:
             self.is_connected = False
             return False
 
+    def ping(self) -> bool:
+        """Comprueba que la conexiu00f3n con el nodo sigue activa.
+        
+        Returns:
+            bool: True si el nodo responde.
+        """
+        try:
+            self.substrate.get_chain_head()
+            return True
+        except Exception as e:
+            logger.warning(f"El nodo no responde: {e}")
+            self.is_connected = False
+            return False
+
+    def close(self) -> None:
+        """Cierra la conexiu00f3n con el nodo, si hay una abierta."""
+        substrate, self.substrate = self.substrate, None
+        self.is_connected = False
+        if substrate is not None:
+            try:
+                substrate.close()
+            except Exception as e:
+                logger.warning(f"Error al cerrar la conexiu00f3n: {e}")
+
+    def compose_price_call(self, record_id: str, timestamp: str, price: float,
+                           substrate: Optional[SubstrateInterface] = None):
+        """Crea la llamada PriceFeed.submitPrice para un precio.
+        
+        Args:
+            record_id: Identificador del registro de precio.
+            timestamp: Marca de tiempo en formato ISO.
+            price: Precio del cafu00e9 en USD.
+            substrate: Conexiu00f3n con la que crear la llamada (por defecto la del oru00e1culo).
+            
+        Returns:
+            GenericCall: Llamada lista para firmar.
+        """
+        return self.compose_submit_call(price_call_params(record_id, timestamp, price), substrate)
+
+    def compose_submit_call(self, call_params: Dict[str, Any], substrate: Optional[SubstrateInterface] = None):
+        """Crea la llamada PriceFeed.submitPrice a partir de sus parametros ya convertidos.
+        
+        Args:
+            call_params: Parametros de la llamada (id, timestamp en ms y precio en centavos).
+            substrate: Conexiu00f3n con la que crear la llamada (por defecto la del oru00e1culo).
+            
+        Returns:
+            GenericCall: Llamada lista para firmar.
+        """
+        logger.info(f"Enviando precio a Westend - ID: {call_params['id']}, Timestamp: {call_params['timestamp']}, "
+                    f"Precio: {call_params['price']}")
+        
+        return (substrate or self.substrate).compose_call(
+            call_module='PriceFeed',
+            call_function='submitPrice',
+            call_params=call_params
+        )
+
     def submit_price(self, record_id: str, timestamp: str, price: float) -> bool:
         """Envu00eda un precio a la blockchain Westend.
         
@@ -86,6 +215,22 @@ class PriceOracle:
             timestamp: Marca de tiempo en formato ISO.
             price: Precio del cafu00e9 en USD.
             
+        Returns:
+            bool: True si la transacciu00f3n fue exitosa, False en caso contrario.
+        """
+        try:
+            call_params = price_call_params(record_id, timestamp, price)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Datos invu00e1lidos para {record_id}: {e}")
+            return False
+        return self.submit_price_params(call_params)
+
+    def submit_price_params(self, call_params: Dict[str, Any]) -> bool:
+        """Envu00eda un precio ya convertido y espera su inclusion.
+        
+        Args:
+            call_params: Parametros de PriceFeed.submitPrice (id, timestamp en ms y precio en centavos).
+            
         Returns:
             bool: True si la transacciu00f3n fue exitosa, False en caso contrario.
         """
@@ -93,38 +238,26 @@ class PriceOracle:
             logger.error("No hay conexiu00f3n con la blockchain")
             return False
         
+        record_id = call_params['id']
         try:
-            # Convertir timestamp a milisegundos
-            timestamp_ms = int(datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp() * 1000)
-            
-            # Convertir precio a un entero (multiplicando por 100 y redondeando)
-            price_uint = int(round(price * 100))
-            
-            logger.info(f"Enviando precio a Westend - ID: {record_id}, Timestamp: {timestamp_ms}, Precio: {price_uint}")
-            
-            # Crear la llamada
-            call = self.substrate.compose_call(
-                call_module='PriceFeed',
-                call_function='submitPrice',
-                call_params={
-                    'id': record_id,
-                    'timestamp': timestamp_ms,
-                    'price': price_uint
-                }
-            )
+            call = self.compose_submit_call(call_params)
             
-            # Crear la extru00ednseca
+            # Crear la extru00ednseca (con el nonce on-chain, que incluye las pendientes)
             extrinsic = self.substrate.create_signed_extrinsic(
                 call=call, keypair=self.signer
             )
+            self.resync_nonce()
             
             # Enviar la extru00ednseca y esperar el resultado
             receipt = self.substrate.submit_extrinsic(extrinsic, wait_for_inclusion=True)
             logger.info(f"Transacciu00f3n incluida en el bloque {receipt.block_hash}")
             
+            self.block_hashes[record_id] = receipt.block_hash
+            
             # Esperar confirmaciu00f3n
             if receipt.is_success:
-                logger.info(f"Transacciu00f3n exitosa para el precio {price} USD (ID: {record_id})")
+                logger.info(f"Transacciu00f3n exitosa para el precio {call_params['price'] / 100} USD "
+                            f"(ID: {record_id})")
                 return True
             else:
                 logger.error(f"Error en la transacciu00f3n: {receipt.error_message}")
@@ -137,37 +270,452 @@ class PriceOracle:
             logger.error(f"Error inesperado al enviar precio: {e}")
             return False
 
-    def submit_prices_batch(self, price_records: pd.DataFrame) -> dict:
+    def next_nonce(self) -> int:
+        """Devuelve el siguiente nonce del firmante sin consultar la cadena.
+        
+        La primera llamada (o la siguiente a `resync_nonce`) lo lee con
+        system_accountNextIndex, que ya cuenta las extrinsecas en el pool.
+        
+        Returns:
+            int: Nonce para la siguiente extrinseca.
+        """
+        if self._nonce is None:
+            self._nonce = self.substrate.get_account_nonce(self.signer.ss58_address)
+            logger.info(f"Nonce sincronizado con la cadena: {self._nonce}")
+        nonce = self._nonce
+        self._nonce += 1
+        return nonce
+
+    def resync_nonce(self) -> None:
+        """Descarta el nonce local para volver a leerlo de la cadena en el siguiente envio."""
+        self._nonce = None
+
+    def iter_price_records(self, price_records: PriceRecords,
+                           results: dict) -> Iterator[Tuple[str, Dict[str, int]]]:
+        """Recorre los registros validos como (id, parametros de submitPrice).
+        
+        La conversion y la validacion se hacen por columnas en `PriceBatch`; los
+        registros invalidos se marcan como fallidos en `results`. La usan todos los
+        modos de envio, tambien `AsyncOracleEngine`.
+
+        Args:
+            price_records: `PriceBatch` o DataFrame con columnas 'id', 'timestamp', 'price'.
+            results: Resultados por id, donde se anotan los registros invalidos.
+
+        Yields:
+            Tuple[str, Dict[str, int]]: Id del registro y parametros de submitPrice.
+        """
+        for record_id, call_params, valid in as_price_batch(price_records).records():
+            if not valid:
+                logger.warning(f"Datos invu00e1lidos: {record_id}, {call_params['timestamp']}, {call_params['price']}")
+                results[record_id] = False
+                continue
+            yield record_id, call_params
+
+    def submit_prices_batch(self, price_records: PriceRecords, mode: str = config.ORACLE_SUBMIT_MODE,
+                            signing_workers: int = config.ORACLE_SIGNING_WORKERS) -> dict:
         """Envu00eda un lote de precios a la blockchain.
         
         Args:
-            price_records: DataFrame con columnas 'id', 'timestamp', 'price'.
+            price_records: `PriceBatch` o DataFrame con columnas 'id', 'timestamp', 'price'.
+            mode: 'sequential' espera la inclusion de cada precio antes del siguiente;
+                'pipelined' los envia seguidos y recoge las inclusiones despues;
+                'batched' los agrupa en extrinsecas Utility.batch_all enviadas en modo pipelined.
+            signing_workers: Procesos que firman las extrinsecas en modo pipelined (0 firma en este proceso).
             
         Returns:
             dict: Resultados de las transacciones {id: u00e9xito}.
         """
+        self.block_hashes = {}
+        if mode == 'pipelined':
+            return self.submit_prices_pipelined(price_records, signing_workers=signing_workers)
+        if mode == 'batched':
+            return self.submit_prices_batched(price_records)
+        if mode != 'sequential':
+            raise ValueError(f"Modo de envio no valido: {mode}")
+        
         results = {}
         
         if not self.is_connected:
             logger.error("No hay conexiu00f3n con la blockchain")
             return results
             
-        for _, row in price_records.iterrows():
-            record_id = str(row.get('id', ''))
-            timestamp = row.get('timestamp')
-            price = float(row.get('price', 0))
-            
-            # Validar datos
-            if not record_id or not timestamp or price <= 0:
-                logger.warning(f"Datos invu00e1lidos: {row}")
-                results[record_id] = False
-                continue
-                
+        for record_id, call_params in self.iter_price_records(price_records, results):
             # Enviar precio
-            success = self.submit_price(record_id, timestamp, price)
+            success = self.submit_price_params(call_params)
             results[record_id] = success
             
             # Esperar un poco entre transacciones para evitar congestionar la red
             time.sleep(2)
             
-        return results
\ No newline at end of file
+        return results
+
+    def _price_calls(self, price_records: PriceRecords, results: dict) -> Iterator[Tuple[str, object]]:
+        """Valida los registros y crea sus llamadas submitPrice.
+        
+        Args:
+            price_records: `PriceBatch` o DataFrame con columnas 'id', 'timestamp', 'price'.
+            results: Resultados {id: u00e9xito}; los registros invalidos se marcan como fallidos.
+            
+        Yields:
+            Tuple[str, GenericCall]: Id del registro y su llamada.
+        """
+        for record_id, call_params in self.iter_price_records(price_records, results):
+            try:
+                yield record_id, self.compose_submit_call(call_params)
+            except Exception as e:
+                logger.error(f"Error al crear la llamada para {record_id}: {e}")
+                results[record_id] = False
+
+    def submit_prices_pipelined(self, price_records: PriceRecords, max_pending: int = config.ORACLE_MAX_PENDING,
+                                inclusion_timeout: float = config.ORACLE_INCLUSION_TIMEOUT,
+                                poll_interval: float = config.ORACLE_POLL_INTERVAL,
+                                signing_workers: int = config.ORACLE_SIGNING_WORKERS) -> dict:
+        """Envia los precios seguidos, con nonces locales, y recoge las inclusiones despues.
+        
+        Se firman y envian hasta `max_pending` extrinsecas sin esperar a ningun bloque;
+        las inclusiones se recogen recorriendo los bloques nuevos, de modo que un lote
+        entra en pocos bloques en lugar de uno por precio. Ante cualquier error de envio
+        el nonce se vuelve a leer de la cadena.
+        
+        Con `signing_workers` > 0 las extrinsecas se crean y firman en un pool de
+        procesos con nonces asignados de antemano (ver `ParallelSigner`), para que un
+        backfill grande no quede limitado por un solo nucleo.
+        
+        Args:
+            price_records: `PriceBatch` o DataFrame con columnas 'id', 'timestamp', 'price'.
+            max_pending: Extrinsecas enviadas que aun no se han visto en un bloque.
+            inclusion_timeout: Segundos sin nuevas inclusiones tras los que las pendientes se dan por fallidas.
+            poll_interval: Segundos entre consultas de bloques nuevos.
+            signing_workers: Procesos que firman las extrinsecas (0 firma en este proceso).
+            
+        Returns:
+            dict: Resultados de las transacciones {id: u00e9xito}.
+        """
+        results = {}
+        
+        if not self.is_connected or not self.substrate or not self.signer:
+            logger.error("No hay conexiu00f3n con la blockchain")
+            return results
+        
+        if signing_workers > 0:
+            calls = self._signed_price_calls(price_records, results, signing_workers)
+        else:
+            calls = (([record_id], call) for record_id, call in self._price_calls(price_records, results))
+        return self._submit_calls_pipelined(calls, results, max_pending, inclusion_timeout, poll_interval)
+
+    def _signed_price_calls(self, price_records: PriceRecords, results: dict,
+                            signing_workers: int) -> Iterator[Tuple[List[str], SignedExtrinsic]]:
+        """Valida los registros, les asigna nonces consecutivos y los firma en un pool de procesos.
+        
+        Args:
+            price_records: `PriceBatch` o DataFrame con columnas 'id', 'timestamp', 'price'.
+            results: Resultados {id: u00e9xito}; los registros invalidos se marcan como fallidos.
+            signing_workers: Procesos del pool.
+            
+        Yields:
+            Tuple[List[str], SignedExtrinsic]: Id del registro y su extrinseca firmada, en orden de nonce.
+        """
+        from price_oracle.signing import ParallelSigner
+        
+        tasks = [([record_id], call_params)
+                 for record_id, call_params in self.iter_price_records(price_records, results)]
+        if not tasks:
+            return iter(())
+        
+        try:
+            nonces = [self.next_nonce() for _ in tasks]
+        except Exception as e:
+            logger.error(f"Error al leer el nonce: {e}")
+            for record_ids, _ in tasks:
+                results[record_ids[0]] = False
+            self.resync_nonce()
+            return iter(())
+        logger.info(f"Firmando {len(tasks)} extrinsecas en {signing_workers} procesos")
+        signer = ParallelSigner(self.signer, signing_workers, connection_factory=self.connection_factory)
+        return signer.sign([(record_ids, params, nonce) for (record_ids, params), nonce in zip(tasks, nonces)])
+
+    def submit_signed(self, extrinsic: SignedExtrinsic) -> str:
+        """Envia al pool del nodo una extrinseca firmada en otro proceso.
+        
+        Args:
+            extrinsic: Extrinseca firmada por `ParallelSigner`.
+            
+        Returns:
+            str: Hash de la extrinseca.
+        """
+        if extrinsic.data is None:
+            raise ValueError(f"No se pudo firmar la extrinseca: {extrinsic.error}")
+        response = self.substrate.rpc_request('author_submitExtrinsic', [extrinsic.data])
+        if 'error' in response:
+            raise SubstrateRequestException(response['error'])
+        return extrinsic.extrinsic_hash
+
+    def submit_prices_batched(self, price_records: PriceRecords, atomic: bool = config.ORACLE_BATCH_ATOMIC,
+                              max_pending: int = config.ORACLE_MAX_PENDING,
+                              inclusion_timeout: float = config.ORACLE_INCLUSION_TIMEOUT,
+                              poll_interval: float = config.ORACLE_POLL_INTERVAL) -> dict:
+        """Agrupa muchas llamadas submitPrice en extrinsecas Utility.batch_all (o batch).
+        
+        Cada lote lleva una sola firma y paga una sola tarifa base; su tamau00f1o se
+        calcula con `batch_chunk_size` a partir del peso y la longitud de una llamada.
+        Los lotes se envian en modo pipelined y el resultado de cada precio se obtiene
+        de los eventos del lote.
+        
+        Una llamada que falla siempre haria fallar su lote en cada ejecucion (con batch_all
+        revierte el lote entero; con batch detiene las llamadas siguientes). Por eso los
+        precios fallidos de un lote se dividen en dos mitades que se reenvian como lotes
+        nuevos, hasta que la llamada problematica queda aislada y falla sola.
+        
+        Args:
+            price_records: `PriceBatch` o DataFrame con columnas 'id', 'timestamp', 'price'.
+            atomic: Usar batch_all (todo o nada) en lugar de batch (se detiene en el primer fallo).
+            max_pending: Lotes enviados que aun no se han visto en un bloque.
+            inclusion_timeout: Segundos sin nuevas inclusiones tras los que los pendientes se dan por fallidos.
+            poll_interval: Segundos entre consultas de bloques nuevos.
+            
+        Returns:
+            dict: Resultados de las transacciones {id: u00e9xito}.
+        """
+        results = {}
+        
+        if not self.is_connected or not self.substrate or not self.signer:
+            logger.error("No hay conexiu00f3n con la blockchain")
+            return results
+        
+        price_calls = list(self._price_calls(price_records, results))
+        if not price_calls:
+            return results
+        
+        try:
+            chunk_size = self.batch_chunk_size(price_calls[0][1])
+        except Exception as e:
+            logger.error(f"Error al calcular el tamau00f1o de los lotes: {e}")
+            for record_id, _ in price_calls:
+                results[record_id] = False
+            return results
+        
+        batch_function = 'batch_all' if atomic else 'batch'
+        logger.info(f"Enviando {len(price_calls)} precios en lotes Utility.{batch_function} de hasta {chunk_size}")
+        
+        def batches(chunks):
+            for chunk in chunks:
+                try:
+                    batch_call = self.substrate.compose_call(
+                        call_module='Utility',
+                        call_function=batch_function,
+                        call_params={'calls': [call for _, call in chunk]}
+                    )
+                except Exception as e:
+                    logger.error(f"Error al crear el lote: {e}")
+                    for record_id, _ in chunk:
+                        results[record_id] = False
+                    continue
+                yield [record_id for record_id, _ in chunk], batch_call
+        
+        chunks = [price_calls[start:start + chunk_size] for start in range(0, len(price_calls), chunk_size)]
+        while chunks:
+            self._submit_calls_pipelined(batches(chunks), results, max_pending, inclusion_timeout, poll_interval)
+            # Reenviar los precios fallidos de cada lote en dos mitades para aislar la llamada que falla
+            retry = []
+            for chunk in chunks:
+                failed = [(record_id, call) for record_id, call in chunk if not results.get(record_id)]
+                if len(failed) > 1:
+                    half = (len(failed) + 1) // 2
+                    retry.extend([failed[:half], failed[half:]])
+            if retry:
+                logger.warning(f"Reenviando {sum(len(chunk) for chunk in retry)} precios fallidos "
+                               f"en {len(retry)} lotes mas pequeu00f1os")
+            chunks = retry
+        return results
+
+    def batch_chunk_size(self, call) -> int:
+        """Calcula cuantas llamadas como `call` caben en una extrinseca de lote.
+        
+        El limite sale de ORACLE_BATCH_BLOCK_FRACTION del peso maximo de una extrinseca
+        normal y de la longitud maxima de bloque, usando el peso de `call` segun
+        payment_queryInfo (que ya incluye el peso base de una extrinseca, asi que
+        sobreestima y deja margen). El resultado se guarda para los siguientes lotes.
+        
+        Args:
+            call: Llamada representativa de las que se van a agrupar.
+            
+        Returns:
+            int: Numero de llamadas por lote, entre 1 y ORACLE_BATCH_MAX_CALLS.
+        """
+        if self._batch_chunk_size is not None:
+            return self._batch_chunk_size
+        
+        def weight_parts(weight) -> Tuple[int, int]:
+            # Weight V1 es un entero; Weight V2 tiene ref_time y proof_size
+            if isinstance(weight, dict):
+                return int(weight.get('ref_time', 0)), int(weight.get('proof_size', 0))
+            return int(weight), 0
+        
+        block_weights = self.substrate.get_constant('System', 'BlockWeights').value
+        normal_class = block_weights['per_class']['normal']
+        max_weight = weight_parts(normal_class.get('max_extrinsic') or block_weights['max_block'])
+        max_length = self.substrate.get_constant('System', 'BlockLength').value['max']['normal']
+        
+        call_weight = weight_parts(self.substrate.get_payment_info(call, self.signer)['weight'])
+        call_length = call.data.length
+        
+        limits = [config.ORACLE_BATCH_MAX_CALLS,
+                  int(max_length * config.ORACLE_BATCH_BLOCK_FRACTION) // max(call_length, 1)]
+        for budget, used in zip(max_weight, call_weight):
+            if used > 0:
+                limits.append(int(budget * config.ORACLE_BATCH_BLOCK_FRACTION) // used)
+        
+        self._batch_chunk_size = max(1, min(limits))
+        logger.info(f"Tamau00f1o de lote: {self._batch_chunk_size} llamadas (peso {call_weight}, {call_length} bytes por llamada)")
+        return self._batch_chunk_size
+
+    def _submit_calls_pipelined(self, calls: Iterable[Tuple[List[str], object]], results: dict, max_pending: int,
+                                inclusion_timeout: float, poll_interval: float) -> dict:
+        """Firma y envia llamadas con nonces locales y recoge sus inclusiones.
+        
+        Args:
+            calls: Pares (ids de los registros, llamada); un lote lleva varios ids.
+            results: Resultados {id: u00e9xito} a completar.
+            max_pending: Extrinsecas enviadas que aun no se han visto en un bloque.
+            inclusion_timeout: Segundos sin nuevas inclusiones tras los que las pendientes se dan por fallidas.
+            poll_interval: Segundos entre consultas de bloques nuevos.
+            
+        Returns:
+            dict: Resultados de las transacciones {id: u00e9xito}.
+        """
+        # Hash de extrinseca -> ids de los registros, para las enviadas aun sin bloque
+        pending: Dict[str, List[str]] = {}
+        # Las extrinsecas firmadas de antemano solo valen mientras sus nonces sigan siendo consecutivos
+        presigned_valid = True
+        try:
+            next_block = self.substrate.get_block_number(self.substrate.get_chain_head()) + 1
+        except Exception as e:
+            logger.error(f"Error al leer la cabeza de la cadena: {e}")
+            for record_ids, _ in calls:
+                for record_id in record_ids:
+                    results[record_id] = False
+            return results
+        
+        for record_ids, call in calls:
+            # Contrapresion: no mas de max_pending extrinsecas en el pool
+            if len(pending) >= max_pending:
+                next_block = self._wait_for_inclusions(pending, results, next_block, max_pending - 1,
+                                                       inclusion_timeout, poll_interval)
+            
+            try:
+                if isinstance(call, SignedExtrinsic) and presigned_valid:
+                    pending[self.submit_signed(call)] = record_ids
+                    continue
+                if isinstance(call, SignedExtrinsic):
+                    # Tras un fallo queda un hueco en los nonces firmados: firmar aqui con el nonce de la cadena
+                    call = self.substrate.compose_call(
+                        call_module='PriceFeed', call_function='submitPrice', call_params=call.call_params
+                    )
+                extrinsic = self.substrate.create_signed_extrinsic(
+                    call=call, keypair=self.signer, nonce=self.next_nonce()
+                )
+                receipt = self.substrate.submit_extrinsic(extrinsic, wait_for_inclusion=False)
+                pending[receipt.extrinsic_hash] = record_ids
+            except Exception as e:
+                # Nonce ya usado, futuro o rechazado por el pool: volver a leerlo de la cadena
+                logger.error(f"Error al enviar {', '.join(record_ids)}: {e}")
+                for record_id in record_ids:
+                    results[record_id] = False
+                self.resync_nonce()
+                presigned_valid = False
+        
+        logger.info(f"{len(pending)} extrinsecas enviadas pendientes de inclusiu00f3n")
+        self._wait_for_inclusions(pending, results, next_block, 0, inclusion_timeout, poll_interval)
+        return results
+
+    def _wait_for_inclusions(self, pending: Dict[str, List[str]], results: dict, next_block: int, target: int,
+                             inclusion_timeout: float, poll_interval: float) -> int:
+        """Recoge inclusiones hasta que queden como mucho `target` extrinsecas pendientes.
+        
+        Args:
+            pending: Hash de extrinseca -> ids de los registros; se vacia a medida que se incluyen.
+            results: Resultados {id: u00e9xito} a completar.
+            next_block: Primer bloque aun no revisado.
+            target: Numero de pendientes con el que se puede continuar.
+            inclusion_timeout: Segundos sin nuevas inclusiones tras los que las pendientes se dan por fallidas.
+            poll_interval: Segundos entre consultas de bloques nuevos.
+            
+        Returns:
+            int: Siguiente bloque a revisar.
+        """
+        last_progress = time.monotonic()
+        while len(pending) > target:
+            before = len(pending)
+            try:
+                next_block = self._collect_inclusions(pending, results, next_block)
+            except Exception as e:
+                logger.error(f"Error al recoger inclusiones: {e}")
+            if len(pending) < before:
+                last_progress = time.monotonic()
+            elif time.monotonic() - last_progress > inclusion_timeout:
+                # Extrinsecas descartadas por el pool (p. ej. nonce invalido o mortalidad)
+                logger.error(f"{len(pending)} extrinsecas sin incluir tras {inclusion_timeout}s, se dan por fallidas")
+                for record_ids in pending.values():
+                    for record_id in record_ids:
+                        results[record_id] = False
+                pending.clear()
+                self.resync_nonce()
+            else:
+                time.sleep(poll_interval)
+        return next_block
+
+    def _collect_inclusions(self, pending: Dict[str, List[str]], results: dict, next_block: int) -> int:
+        """Revisa los bloques nuevos y registra el resultado de las extrinsecas pendientes incluidas.
+        
+        Un lote se resuelve con sus eventos: ExtrinsicFailed marca todos sus precios
+        como fallidos; Utility.BatchInterrupted con un indice marca como exitosos solo
+        los anteriores a ese indice (batch no atomico).
+        
+        Args:
+            pending: Hash de extrinseca -> ids de los registros; se vacia a medida que se incluyen.
+            results: Resultados {id: u00e9xito} a completar.
+            next_block: Primer bloque aun no revisado.
+            
+        Returns:
+            int: Siguiente bloque a revisar.
+        """
+        head = self.substrate.get_block_number(self.substrate.get_chain_head())
+        while next_block <= head and pending:
+            block = self.substrate.get_block(block_number=next_block)
+            included = {}
+            for idx, extrinsic in enumerate(block['extrinsics']):
+                if extrinsic.extrinsic_hash:
+                    extrinsic_hash = f"0x{extrinsic.extrinsic_hash.hex()}"
+                    if extrinsic_hash in pending:
+                        included[idx] = pending.pop(extrinsic_hash)
+            
+            if included:
+                # Un solo get_events por bloque para todas las extrinsecas incluidas en el
+                block_hash = block['header']['hash']
+                succeeded = {}
+                for event in self.substrate.get_events(block_hash=block_hash):
+                    idx = event.extrinsic_idx
+                    if idx not in included:
+                        continue
+                    module_id, event_id = event.value['module_id'], event.value['event_id']
+                    if module_id == 'System' and event_id == 'ExtrinsicSuccess':
+                        succeeded.setdefault(idx, len(included[idx]))
+                    elif module_id == 'System' and event_id == 'ExtrinsicFailed':
+                        logger.error(f"Error en la transacciu00f3n {included[idx][0]}: {event.value['attributes']}")
+                        succeeded[idx] = 0
+                    elif module_id == 'Utility' and event_id == 'BatchInterrupted':
+                        attributes = event.value['attributes']
+                        index = attributes['index'] if isinstance(attributes, dict) else attributes[0]
+                        logger.error(f"Lote interrumpido en la llamada {index}: {attributes}")
+                        succeeded[idx] = index
+                for idx, record_ids in included.items():
+                    # Las llamadas de un lote se ejecutan en orden: exito hasta el indice interrumpido
+                    count = succeeded.get(idx, 0)
+                    for position, record_id in enumerate(record_ids):
+                        results[record_id] = position < count
+                        self.block_hashes[record_id] = block_hash
+                logger.info(f"{sum(len(ids) for ids in included.values())} precios incluidos en el bloque "
+                            f"{next_block} ({block_hash})")
+            next_block += 1
+        return next_block
@@ -0,0 +1,55 @@
+"""Politica de publicacion del oru00e1culo de precios.
+
+Un precio solo se publica si se desvia del ultimo precio publicado mas de
+ORACLE_DEVIATION_BPS puntos basicos, o si han pasado ORACLE_HEARTBEAT_SECONDS
+desde el ultimo precio publicado (heartbeat), de modo que las transacciones y
+las comisiones son proporcionales a la actividad del mercado. El ultimo precio
+publicado se lee del ledger local, sin consultar la cadena.
+"""
+
+import os
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from price_oracle.ledger import PriceKey
+
+
+def deviates(price_cents: int, reference_cents: int, deviation_bps: float) -> bool:
+    """Indica si un precio se aleja del de referencia al menos deviation_bps puntos basicos."""
+    return abs(price_cents - reference_cents) * 10_000 >= deviation_bps * abs(reference_cents)
+
+
+def select_for_publication(keys: Sequence[PriceKey], last_published: Optional[Tuple[int, int]],
+                           deviation_bps: float = config.ORACLE_DEVIATION_BPS,
+                           heartbeat_seconds: float = config.ORACLE_HEARTBEAT_SECONDS) -> List[bool]:
+    """Decide que precios publicar.
+
+    Los precios se recorren en orden de timestamp y cada precio seleccionado pasa a
+    ser la referencia de los siguientes. Los precios anteriores al ultimo publicado
+    se descartan.
+
+    Args:
+        keys: (id, timestamp en ms, precio en centavos) de cada precio candidato.
+        last_published: (timestamp en ms, precio en centavos) del ultimo precio publicado, o None.
+        deviation_bps: Desviacion minima en puntos basicos respecto a la referencia.
+        heartbeat_seconds: Segundos tras la referencia a partir de los cuales se publica aunque no haya desviacion.
+
+    Returns:
+        List[bool]: True para los precios que hay que publicar, en el orden de `keys`.
+    """
+    selected = [False] * len(keys)
+    reference = last_published
+    heartbeat_ms = heartbeat_seconds * 1000
+    for index in sorted(range(len(keys)), key=lambda i: keys[i][1]):
+        _, timestamp_ms, price_cents = keys[index]
+        if reference is not None:
+            reference_ms, reference_cents = reference
+            if timestamp_ms <= reference_ms:
+                continue
+            if timestamp_ms - reference_ms < heartbeat_ms and not deviates(price_cents, reference_cents, deviation_bps):
+                continue
+        selected[index] = True
+        reference = (timestamp_ms, price_cents)
+    return selected
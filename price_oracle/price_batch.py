@@ -0,0 +1,179 @@
+"""Entrada del oru00e1culo como arrays tipados.
+
+`PriceBatch` guarda los precios que se van a enviar ya convertidos a lo que se
+publica on-chain (timestamp en ms y precio en centavos, ambos int64) y validados,
+todo con operaciones sobre columnas completas en lugar de fila a fila. Se crea a
+partir del `PriceStore` indexado (leyendo solo el rango de tiempo necesario) o de
+un DataFrame, y los modos de envio lo recorren sin volver a convertir nada.
+"""
+
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from price_oracle.ledger import PriceKey
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+HOUR_MS = 60 * 60 * 1000
+
+
+def local_to_epoch_ms(wall_ms: Any) -> np.ndarray:
+    """Interpreta milisegundos de hora de pared sin zona en la zona horaria local, como `datetime.timestamp()`.
+
+    El desfase se calcula una vez por hora distinta, asi que sigue los cambios de horario de verano.
+
+    Args:
+        wall_ms: Milisegundos desde la epoca de la hora de pared, leida como si fuera UTC.
+
+    Returns:
+        np.ndarray: Milisegundos desde la epoca (int64).
+    """
+    wall_ms = np.asarray(wall_ms, dtype=np.int64)
+    if wall_ms.size == 0:
+        return wall_ms
+    hours, index = np.unique(wall_ms // HOUR_MS, return_inverse=True)
+    epoch = datetime(1970, 1, 1)
+    offsets_ms = np.array([
+        int(hour) * HOUR_MS - int((epoch + timedelta(hours=int(hour))).timestamp() * 1000) for hour in hours
+    ], dtype=np.int64)
+    return wall_ms - offsets_ms[index.reshape(wall_ms.shape)]
+
+
+def timestamps_to_ms(values: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """Convierte marcas de tiempo ISO (o datetime) a milisegundos, como `timestamp_to_ms`.
+
+    Las marcas con zona horaria se convierten de forma exacta; las que no la tienen se
+    interpretan en la zona horaria local, como hacia el oru00e1culo desde el principio,
+    para que los valores publicados y las claves del ledger no cambien.
+
+    Args:
+        values: Columna o secuencia de marcas de tiempo.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Milisegundos (int64) y mascara de las marcas validas.
+    """
+    values = pd.Series(values)
+    parsed = pd.to_datetime(values, utc=True, errors='coerce', format='ISO8601')
+    valid = parsed.notna().to_numpy()
+    timestamps_ms = np.where(valid, parsed.dt.as_unit('ms').astype('int64').to_numpy(), 0)
+    # utc=True lee las marcas sin zona como UTC: esas se pasan a hora local
+    naive = ~values.astype(str).str.strip().str.contains(r'(?:Z|[+-]\d{2}:?\d{2})$', regex=True).to_numpy()
+    local = naive & valid
+    timestamps_ms[local] = local_to_epoch_ms(timestamps_ms[local])
+    return timestamps_ms, valid
+
+
+def prices_to_cents(prices: Any) -> np.ndarray:
+    """Convierte precios en USD a centavos (int64), redondeando como `price_to_cents`; NaN pasa a 0."""
+    prices = np.asarray(prices, dtype=np.float64)
+    return np.rint(np.nan_to_num(prices * 100, nan=0.0, posinf=0.0, neginf=0.0)).astype(np.int64)
+
+
+@dataclass(frozen=True)
+class PriceBatch:
+    """Precios listos para enviar, como arrays alineados."""
+    ids: np.ndarray            # str (dtype object)
+    timestamps_ms: np.ndarray  # int64
+    prices_cents: np.ndarray   # int64
+    valid: np.ndarray          # bool: id no vacio, timestamp valido y precio positivo
+
+    @classmethod
+    def from_arrays(cls, ids: Any, timestamps_ms: Any, prices: Any) -> 'PriceBatch':
+        """Crea el lote a partir de ids, timestamps en ms y precios en USD.
+
+        Args:
+            ids: Identificadores de los registros.
+            timestamps_ms: Milisegundos desde la epoca.
+            prices: Precios en USD.
+
+        Returns:
+            PriceBatch: Lote con las filas validadas.
+        """
+        ids = np.asarray(ids, dtype=object)
+        timestamps_ms = np.asarray(timestamps_ms, dtype=np.int64)
+        prices_cents = prices_to_cents(prices)
+        valid = (ids != '') & (timestamps_ms > 0) & (prices_cents > 0)
+        return cls(ids, timestamps_ms, prices_cents, valid)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'PriceBatch':
+        """Crea el lote a partir de un DataFrame con columnas 'id', 'timestamp' y 'price'.
+
+        Args:
+            frame: DataFrame de precios.
+
+        Returns:
+            PriceBatch: Lote con las filas validadas.
+        """
+        ids = frame['id'] if 'id' in frame.columns else pd.Series('', index=frame.index)
+        present = ids.notna().to_numpy()
+        ids = np.where(present, ids.astype(str).to_numpy(dtype=object), '')
+        timestamps_ms, valid_time = timestamps_to_ms(frame['timestamp'])
+        prices = pd.to_numeric(frame['price'], errors='coerce').to_numpy(dtype=np.float64)
+        batch = cls.from_arrays(ids, timestamps_ms, prices)
+        return cls(batch.ids, batch.timestamps_ms, batch.prices_cents, batch.valid & valid_time)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def select(self, mask: Any) -> 'PriceBatch':
+        """Devuelve las filas indicadas por una mascara o por indices."""
+        return PriceBatch(self.ids[mask], self.timestamps_ms[mask], self.prices_cents[mask], self.valid[mask])
+
+    def keys(self) -> List[Optional[PriceKey]]:
+        """Clave del ledger (id, timestamp en ms, precio en centavos) de cada fila, o None si no es valida."""
+        return [key if valid else None for key, valid in
+                zip(zip(self.ids.tolist(), self.timestamps_ms.tolist(), self.prices_cents.tolist()),
+                    self.valid.tolist())]
+
+    def records(self) -> Iterator[Tuple[str, Dict[str, int], bool]]:
+        """Recorre las filas como (id, parametros de PriceFeed.submitPrice, valida)."""
+        for record_id, timestamp_ms, price_cents, valid in zip(self.ids.tolist(), self.timestamps_ms.tolist(),
+                                                               self.prices_cents.tolist(), self.valid.tolist()):
+            yield record_id, {'id': record_id, 'timestamp': timestamp_ms, 'price': price_cents}, valid
+
+
+# Entrada aceptada por los modos de envio
+PriceRecords = Union[PriceBatch, pd.DataFrame]
+
+
+def as_price_batch(price_records: PriceRecords) -> PriceBatch:
+    """Acepta un `PriceBatch` o un DataFrame con columnas 'id', 'timestamp', 'price'."""
+    if isinstance(price_records, PriceBatch):
+        return price_records
+    return PriceBatch.from_frame(price_records)
+
+
+def load_store_batch(hours: int = 24, db_path: Optional[str] = None) -> PriceBatch:
+    """Lee del PriceStore indexado solo los precios de las ultimas `hours` horas.
+
+    El PriceStore guarda la hora de pared de cada precio (sin zona horaria), que aqui se
+    interpreta en la zona horaria local, igual que las marcas sin zona de la fuente 'file'.
+
+    Args:
+        hours: Horas hacia atras desde ahora (0 lee todo el historico).
+        db_path: Base de datos del PriceStore (por defecto PRICE_STORE_PATH).
+
+    Returns:
+        PriceBatch: Precios del rango, del mas antiguo al mas reciente.
+    """
+    from data_indexing.price_store import PriceStore
+
+    store = PriceStore() if db_path is None else PriceStore(db_path)
+    # El rango se filtra en hora de pared local, la de las marcas guardadas
+    now = datetime.now()
+    now_wall_ms = int((now - datetime(1970, 1, 1)) / timedelta(milliseconds=1))
+    start_ms = now_wall_ms - hours * HOUR_MS if hours > 0 else None
+    ids, wall_ms, prices = store.load_records(start_ms)
+    return PriceBatch.from_arrays(ids, local_to_epoch_ms(wall_ms), prices)
@@ -0,0 +1,432 @@
+"""Conciliacion de los precios publicados on-chain con el ledger del oru00e1culo.
+
+Lee en bloque lo que hay publicado y lo compara con el ledger local en una sola
+pasada con operaciones de pandas, sin una llamada RPC por precio:
+
+- Substrate: el mapa de almacenamiento PriceFeed.<ORACLE_PRICE_STORAGE> se
+  recorre con `query_map` en paginas de RECONCILE_PAGE_SIZE claves (dos llamadas
+  RPC por pagina), todo en el mismo bloque.
+- EVM: `getPriceByIndex` del contrato CafeIndex se llama con peticiones
+  JSON-RPC por lotes de RECONCILE_BATCH_SIZE eth_call, fijadas al mismo bloque.
+  Las entradas del contrato no cambian una vez escritas, asi que los indices ya
+  verificados se guardan en RECONCILE_CACHE_PATH y no se vuelven a leer.
+
+    python -m price_oracle.reconcile --target substrate
+    python -m price_oracle.reconcile --target evm --output data/reconcile.csv
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import requests
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from price_oracle.ledger import CONFIRMED, SubmissionLedger
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Cargar variables de entorno
+load_dotenv()
+
+EVM_RPC_URL = os.getenv('EVM_RPC_URL', 'https://ethereum-sepolia-rpc.publicnode.com')
+CAFEINDEX_CONTRACT_ADDRESS = os.getenv('CAFEINDEX_CONTRACT_ADDRESS')
+
+# Selectores de las funciones de CafeIndex (primeros 4 bytes del keccak256 de la firma)
+GET_PRICE_BY_INDEX = '0x112aae8c'  # getPriceByIndex(uint256)
+PRICE_COUNT = '0xbe38093d'  # priceCount()
+# CafeIndex guarda el timestamp en segundos (ver EthereumConnector.tsx); el ledger, en ms
+EVM_TIMESTAMP_SCALE = 1000
+
+# Resultado de cada precio en la conciliacion
+MATCH = 'match'  # Publicado con el mismo valor que un precio confirmado en el ledger
+MISMATCH = 'mismatch'  # Publicado con un valor que no coincide con ninguna entrada del ledger para su id
+UNCONFIRMED = 'unconfirmed'  # Publicado, pero el ledger lo tiene como pendiente o fallido
+NOT_IN_LEDGER = 'not_in_ledger'  # Publicado con un id que el ledger no conoce
+MISSING = 'missing_onchain'  # Confirmado en el ledger, pero su id no esta publicado
+
+PRICE_COLUMNS = ['record_id', 'timestamp_ms', 'price_cents']
+
+
+def price_frame(record_ids: Sequence[str], timestamps_ms: Sequence[int], prices_cents: Sequence[int],
+                **extra: Sequence[Any]) -> pd.DataFrame:
+    """Crea un DataFrame de precios con columnas tipadas (id, timestamp en ms, precio en centavos)."""
+    frame = pd.DataFrame({
+        'record_id': pd.Series(list(record_ids), dtype=object),
+        'timestamp_ms': np.asarray(timestamps_ms, dtype=np.int64),
+        'price_cents': np.asarray(prices_cents, dtype=np.int64),
+    })
+    for column, values in extra.items():
+        frame[column] = list(values)
+    return frame
+
+
+def read_substrate_prices(substrate: Any, page_size: int = config.RECONCILE_PAGE_SIZE,
+                          block_hash: Optional[str] = None) -> pd.DataFrame:
+    """Lee todos los precios publicados en PriceFeed por paginas de almacenamiento.
+
+    Args:
+        substrate: Conexiu00f3n con el nodo (SubstrateInterface o `LocalNode`).
+        page_size: Claves por pagina de state_getKeysPaged.
+        block_hash: Bloque en el que leer (por defecto la cabeza de la cadena).
+
+    Returns:
+        pd.DataFrame: Columnas 'record_id', 'timestamp_ms', 'price_cents'.
+    """
+    block_hash = block_hash or substrate.get_chain_head()
+    entries = substrate.query_map('PriceFeed', config.ORACLE_PRICE_STORAGE, block_hash=block_hash,
+                                  page_size=page_size)
+    record_ids, timestamps_ms, prices_cents = [], [], []
+    undecoded = 0
+    for key, value in entries:
+        # Las entradas que no se pueden decodificar llegan como None
+        if value is None or value.value is None:
+            undecoded += 1
+            continue
+        record_ids.append(str(key.value))
+        timestamps_ms.append(int(value.value['timestamp']))
+        prices_cents.append(int(value.value['price']))
+    storage = f"PriceFeed.{config.ORACLE_PRICE_STORAGE}"
+    if undecoded:
+        logger.warning(f"{undecoded} entradas de {storage} no se pudieron decodificar")
+    logger.info(f"Leidos {len(record_ids)} precios de {storage} en el bloque {block_hash}")
+    return price_frame(record_ids, timestamps_ms, prices_cents)
+
+
+def decode_price_result(result: str) -> Tuple[str, int, int, str]:
+    """Decodifica el resultado ABI de getPriceByIndex: (string id, uint256 timestamp, uint256 price, address).
+
+    Args:
+        result: Datos devueltos por eth_call, en hex.
+
+    Returns:
+        Tuple[str, int, int, str]: Id, timestamp, precio en centavos y direccion del emisor.
+    """
+    data = bytes.fromhex(result[2:] if result.startswith('0x') else result)
+
+    def word(offset: int) -> int:
+        return int.from_bytes(data[offset:offset + 32], 'big')
+
+    id_offset = word(0)
+    id_length = word(id_offset)
+    record_id = data[id_offset + 32:id_offset + 32 + id_length].decode('utf-8')
+    return record_id, word(32), word(64), '0x' + data[108:128].hex()
+
+
+class EvmPriceReader:
+    """Lee los precios del contrato CafeIndex con peticiones JSON-RPC por lotes."""
+
+    def __init__(self, rpc_url: str = EVM_RPC_URL, contract_address: Optional[str] = CAFEINDEX_CONTRACT_ADDRESS,
+                 batch_size: int = config.RECONCILE_BATCH_SIZE, timeout: float = 30.0):
+        """Crea el lector.
+
+        Args:
+            rpc_url: Endpoint JSON-RPC de la red EVM.
+            contract_address: Direccion del contrato CafeIndex.
+            batch_size: Llamadas eth_call por peticion HTTP.
+            timeout: Segundos de espera de cada peticion.
+        """
+        if not contract_address:
+            raise ValueError("No se ha proporcionado CAFEINDEX_CONTRACT_ADDRESS en .env")
+        self.rpc_url = rpc_url
+        self.contract_address = contract_address.lower()
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.session = requests.Session()
+        # Peticiones HTTP realizadas, cada una con hasta batch_size llamadas
+        self.rpc_calls = 0
+
+    def _batch(self, calls: Sequence[Tuple[str, list]]) -> List[Dict[str, Any]]:
+        """Envia varias llamadas JSON-RPC en una sola peticion y devuelve las respuestas en el mismo orden."""
+        payload = [{'jsonrpc': '2.0', 'id': i, 'method': method, 'params': params}
+                   for i, (method, params) in enumerate(calls)]
+        response = self.session.post(self.rpc_url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        self.rpc_calls += 1
+        replies = response.json()
+        if not isinstance(replies, list):
+            # Algunos nodos rechazan las peticiones por lotes con un unico error
+            raise RuntimeError(f"El nodo no acepto la peticion por lotes: {replies.get('error', replies)}")
+        # El orden de las respuestas de un lote no esta garantizado
+        by_id = {reply.get('id'): reply for reply in replies}
+        return [by_id.get(i, {'error': 'sin respuesta'}) for i in range(len(calls))]
+
+    def _call(self, data: str, block: str) -> Tuple[str, list]:
+        return 'eth_call', [{'to': self.contract_address, 'data': data}, block]
+
+    def snapshot(self) -> Tuple[str, str, int]:
+        """Fija el bloque de lectura.
+
+        Returns:
+            Tuple[str, str, int]: Identificador del contrato (chain id y direccion), bloque en hex y numero
+            de precios publicados en ese bloque.
+        """
+        chain_id, block = self._batch([('eth_chainId', []), ('eth_blockNumber', [])])
+        for reply in (chain_id, block):
+            if 'error' in reply:
+                raise RuntimeError(f"Error JSON-RPC: {reply['error']}")
+        count, = self._batch([self._call(PRICE_COUNT, block['result'])])
+        if 'error' in count:
+            raise RuntimeError(f"Error al leer priceCount: {count['error']}")
+        contract = f"{int(chain_id['result'], 16)}:{self.contract_address}"
+        return contract, block['result'], int(count['result'], 16)
+
+    def read_prices(self, indices: Sequence[int], block: str) -> pd.DataFrame:
+        """Lee los precios de los indices indicados con getPriceByIndex, en lotes.
+
+        Args:
+            indices: Indices de precio a leer.
+            block: Bloque en el que leer, en hex.
+
+        Returns:
+            pd.DataFrame: Columnas 'record_id', 'timestamp_ms', 'price_cents', 'index' y 'submitter'.
+        """
+        rows: List[Tuple[str, int, int, str]] = []
+        read: List[int] = []
+        failed = 0
+        for start in range(0, len(indices), self.batch_size):
+            chunk = indices[start:start + self.batch_size]
+            replies = self._batch([self._call(f"{GET_PRICE_BY_INDEX}{index:064x}", block) for index in chunk])
+            for index, reply in zip(chunk, replies):
+                try:
+                    rows.append(decode_price_result(reply['result']))
+                    read.append(index)
+                except Exception as e:
+                    logger.warning(f"No se pudo leer el precio {index}: {reply.get('error', e)}")
+                    failed += 1
+        if failed:
+            logger.warning(f"{failed} de {len(indices)} precios del contrato no se pudieron leer")
+        return price_frame([row[0] for row in rows], [row[1] * EVM_TIMESTAMP_SCALE for row in rows],
+                           [row[2] for row in rows], index=read, submitter=[row[3] for row in rows])
+
+
+class VerifiedIndexCache:
+    """Indices de CafeIndex ya conciliados con el ledger, para no volver a leerlos del contrato."""
+
+    def __init__(self, db_path: str = config.RECONCILE_CACHE_PATH):
+        """Abre (y crea si hace falta) la cache.
+
+        Args:
+            db_path: Ruta del fichero SQLite.
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS verified_prices (
+                    contract TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    record_id TEXT NOT NULL,
+                    timestamp_ms INTEGER NOT NULL,
+                    price_cents INTEGER NOT NULL,
+                    submitter TEXT,
+                    PRIMARY KEY (contract, idx)
+                ) WITHOUT ROWID
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Abre una conexion para una transaccion (confirmada, o revertida si falla) y la cierra."""
+        conn = sqlite3.connect(self.db_path, timeout=5.0)
+        try:
+            conn.execute("PRAGMA busy_timeout = 5000")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def load(self, contract: str) -> pd.DataFrame:
+        """Devuelve los precios verificados de un contrato, con las mismas columnas que `read_prices`."""
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT record_id, timestamp_ms, price_cents, idx, submitter FROM verified_prices "
+                    "WHERE contract = ? ORDER BY idx",
+                    (contract,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error al leer la cache de conciliacion: {e}")
+            rows = []
+        return price_frame([row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows],
+                           index=[row[3] for row in rows], submitter=[row[4] for row in rows])
+
+    def add(self, contract: str, prices: pd.DataFrame) -> None:
+        """Guarda precios del contrato que coinciden con el ledger."""
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO verified_prices "
+                    "(contract, idx, record_id, timestamp_ms, price_cents, submitter) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(contract, *row) for row in zip(prices['index'].astype(np.int64).tolist(),
+                                                     prices['record_id'].tolist(),
+                                                     prices['timestamp_ms'].tolist(), prices['price_cents'].tolist(),
+                                                     prices['submitter'].tolist())]
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error al escribir en la cache de conciliacion: {e}")
+
+
+def ledger_frame(ledger: SubmissionLedger) -> pd.DataFrame:
+    """Carga las entradas del ledger como DataFrame (id, timestamp, precio, estado, actualizacion)."""
+    rows = ledger.entries()
+    frame = price_frame([row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows])
+    frame['status'] = pd.Series([row[3] for row in rows], dtype=object)
+    frame['updated_at'] = np.array([row[4] for row in rows], dtype=np.float64)
+    return frame
+
+
+def diff_prices(onchain: pd.DataFrame, ledger: pd.DataFrame) -> pd.DataFrame:
+    """Compara los precios publicados con el ledger en una sola pasada vectorizada.
+
+    Args:
+        onchain: Precios publicados, con columnas 'record_id', 'timestamp_ms', 'price_cents' (y opcionales).
+        ledger: Entradas del ledger, de `ledger_frame`.
+
+    Returns:
+        pd.DataFrame: Una fila por precio publicado y por precio confirmado que falta on-chain, con
+        'status' (MATCH, MISMATCH, UNCONFIRMED, NOT_IN_LEDGER o MISSING) y el ultimo valor del ledger
+        para el id ('ledger_timestamp_ms', 'ledger_price_cents').
+    """
+    # Coincidencia exacta con alguna entrada del ledger (id, timestamp y precio)
+    exact = onchain.merge(ledger[PRICE_COLUMNS + ['status']].rename(columns={'status': 'ledger_status'}),
+                          on=PRICE_COLUMNS, how='left')
+    known = exact['record_id'].isin(ledger['record_id']).to_numpy()
+    exact['status'] = np.select(
+        [exact['ledger_status'].eq(CONFIRMED).to_numpy(), exact['ledger_status'].notna().to_numpy(), known],
+        [MATCH, UNCONFIRMED, MISMATCH], NOT_IN_LEDGER
+    )
+
+    # Precios confirmados cuyo id no aparece on-chain
+    missing = ledger[ledger['status'].eq(CONFIRMED) & ~ledger['record_id'].isin(onchain['record_id'])]
+    missing = missing[PRICE_COLUMNS].assign(status=MISSING)
+
+    # Ultimo valor del ledger de cada id, para ver que se esperaba publicar
+    latest = (ledger.sort_values('updated_at').drop_duplicates('record_id', keep='last')[PRICE_COLUMNS]
+              .rename(columns={'timestamp_ms': 'ledger_timestamp_ms', 'price_cents': 'ledger_price_cents'}))
+    report = pd.concat([exact.drop(columns='ledger_status'), missing], ignore_index=True)
+    return report.merge(latest, on='record_id', how='left')
+
+
+def confirm_unconfirmed(ledger: SubmissionLedger, report: pd.DataFrame) -> int:
+    """Marca como confirmados en el ledger los precios pendientes o fallidos que si estan publicados.
+
+    Args:
+        ledger: Ledger del oru00e1culo.
+        report: Resultado de `diff_prices`.
+
+    Returns:
+        int: Numero de precios corregidos.
+    """
+    rows = report[report['status'] == UNCONFIRMED]
+    keys = list(zip(rows['record_id'].tolist(), rows['timestamp_ms'].tolist(), rows['price_cents'].tolist()))
+    ledger.record_results(keys, {key[0]: True for key in keys})
+    return len(keys)
+
+
+def reconcile_substrate(substrate: Any, ledger: Optional[SubmissionLedger] = None,
+                        page_size: int = config.RECONCILE_PAGE_SIZE) -> pd.DataFrame:
+    """Concilia el almacenamiento de PriceFeed con el ledger.
+
+    Args:
+        substrate: Conexiu00f3n con el nodo.
+        ledger: Ledger del oru00e1culo (por defecto ORACLE_LEDGER_PATH).
+        page_size: Claves por pagina de almacenamiento.
+
+    Returns:
+        pd.DataFrame: Informe de `diff_prices`.
+    """
+    ledger = ledger or SubmissionLedger()
+    return diff_prices(read_substrate_prices(substrate, page_size), ledger_frame(ledger))
+
+
+def reconcile_evm(reader: EvmPriceReader, ledger: Optional[SubmissionLedger] = None,
+                  cache: Optional[VerifiedIndexCache] = None) -> pd.DataFrame:
+    """Concilia los precios del contrato CafeIndex con el ledger, leyendo solo los indices no verificados.
+
+    Args:
+        reader: Lector del contrato.
+        ledger: Ledger del oru00e1culo (por defecto ORACLE_LEDGER_PATH).
+        cache: Cache de indices verificados (por defecto RECONCILE_CACHE_PATH).
+
+    Returns:
+        pd.DataFrame: Informe de `diff_prices`, con las columnas 'index' y 'submitter' del contrato.
+    """
+    ledger = ledger or SubmissionLedger()
+    cache = cache or VerifiedIndexCache()
+    contract, block, count = reader.snapshot()
+    verified = cache.load(contract)
+    verified = verified[verified['index'] < count]
+    pending = np.setdiff1d(np.arange(count, dtype=np.int64), verified['index'].to_numpy(dtype=np.int64))
+    logger.info(f"Contrato {contract}: {count} precios en el bloque {int(block, 16)}, "
+                f"{len(verified)} ya verificados, {len(pending)} por leer")
+
+    fetched = reader.read_prices(pending.tolist(), block)
+    onchain = fetched if verified.empty else pd.concat([verified, fetched], ignore_index=True)
+    report = diff_prices(onchain, ledger_frame(ledger))
+
+    # Solo se guardan los precios leidos en esta ejecucion que coinciden con el ledger
+    matched = report[(report['status'] == MATCH) & report['index'].isin(fetched['index'])]
+    cache.add(contract, matched)
+    return report
+
+
+def main() -> None:
+    """Ejecuta la conciliacion desde la lu00ednea de comandos."""
+    parser = argparse.ArgumentParser(description='Conciliar los precios publicados on-chain con el ledger del oru00e1culo')
+    parser.add_argument('--target', choices=['substrate', 'evm'], default='substrate',
+                        help='Leer PriceFeed en Westend o el contrato CafeIndex en la red EVM')
+    parser.add_argument('--page-size', type=int, default=config.RECONCILE_PAGE_SIZE,
+                        help='Claves por pagina de almacenamiento (substrate)')
+    parser.add_argument('--batch-size', type=int, default=config.RECONCILE_BATCH_SIZE,
+                        help='Llamadas eth_call por peticion JSON-RPC (evm)')
+    parser.add_argument('--fix', action='store_true',
+                        help='Marcar como confirmados en el ledger los precios pendientes o fallidos que estan publicados')
+    parser.add_argument('--output', help='Guardar el informe completo en este CSV')
+    args = parser.parse_args()
+
+    ledger = SubmissionLedger()
+    start = time.perf_counter()
+    if args.target == 'evm':
+        reader = EvmPriceReader(batch_size=args.batch_size)
+        report = reconcile_evm(reader, ledger)
+        rpc_calls = reader.rpc_calls
+    else:
+        from price_oracle.oracle import create_substrate
+        substrate = create_substrate()
+        try:
+            report = reconcile_substrate(substrate, ledger, args.page_size)
+        finally:
+            substrate.close()
+        rpc_calls = None
+    elapsed = time.perf_counter() - start
+
+    counts = report['status'].value_counts().to_dict()
+    logger.info(f"Conciliacion en {elapsed:.1f}s" + (f" ({rpc_calls} peticiones JSON-RPC)" if rpc_calls else "")
+                + ": " + ", ".join(f"{status} {counts.get(status, 0)}"
+                                   for status in (MATCH, MISMATCH, UNCONFIRMED, NOT_IN_LEDGER, MISSING)))
+    for _, row in report[report['status'] == MISMATCH].head(10).iterrows():
+        logger.warning(f"Precio {row['record_id']} publicado como ({row['timestamp_ms']}, {row['price_cents']}), "
+                       f"ledger ({row['ledger_timestamp_ms']}, {row['ledger_price_cents']})")
+    if args.fix:
+        logger.info(f"{confirm_unconfirmed(ledger, report)} precios marcados como confirmados en el ledger")
+    if args.output:
+        report.to_csv(args.output, index=False)
+        logger.info(f"Informe guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,17 @@
 
 Este script estu00e1 diseñado para ser ejecutado como un cron job cada 15 minutos,
 leyendo los datos de precios mu00e1s recientes y envu00e1ndolos a la blockchain.
+Con --daemon se mantiene en ejecucion (ver price_oracle/daemon.py) y envia los
+precios en cuanto cambian los datos.
 """
 
 import os
 import sys
 import logging
 import argparse
-from datetime import datetime
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 
@@ -18,8 +22,14 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Importar mu00f3dulos del proyecto
 from price_oracle import PriceOracle
+from price_oracle.ledger import SubmissionLedger
+from price_oracle.price_batch import HOUR_MS, PriceBatch, load_store_batch
+from price_oracle.policy import select_for_publication
 import config
 
+if TYPE_CHECKING:
+    from price_oracle.async_engine import AsyncOracleEngine
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -31,133 +41,165 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Columnas del archivo de precios que usa el oru00e1culo
+PRICE_COLUMNS = ('id', 'blockHeight', 'timestamp', 'date', 'price')
 
-def load_price_data(source: str = 'file') -> pd.DataFrame:
-    """Carga los datos de precios mu00e1s recientes para enviar a la blockchain.
-    
-    Args:
-        source: Fuente de los datos ('file' o 'db').
-        
-    Returns:
-        pd.DataFrame: DataFrame con los datos de precios.
-    """
-    try:
-        if source == 'file':
-            # Cargar desde el archivo de predicciones
-            file_path = os.path.join(config.DATA_DIR, "predictions.csv")
-            if not os.path.exists(file_path):
-                # Si no existe el archivo de predicciones, usar datos procesados
-                file_path = config.PROCESSED_DATA_PATH
-                
-            logger.info(f"Cargando datos de precios desde {file_path}")
-            df = pd.read_csv(file_path)
-            
-            # Verificar que existan las columnas necesarias
-            required_columns = ['id', 'date', 'price']
-            for col in required_columns:
-                if col not in df.columns:
-                    logger.error(f"Falta la columna {col} en los datos")
-                    if col == 'id' and 'blockHeight' in df.columns:
-                        df['id'] = df['blockHeight']
-                        logger.info("Usando blockHeight como id")
-                    elif col == 'date' and 'timestamp' in df.columns:
-                        df['date'] = pd.to_datetime(df['timestamp']).dt.date.astype(str)
-                        logger.info("Usando timestamp para generar date")
-                    else:
-                        return pd.DataFrame()
-            
-            # Si no hay columna timestamp pero hay date, crear timestamp
-            if 'timestamp' not in df.columns and 'date' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['date']).dt.isoformat()
-                
-            return df
-        elif source == 'db':
-            # Implementar carga desde la base de datos si es necesario
-            logger.error("Carga desde base de datos no implementada")
-            return pd.DataFrame()
-        else:
-            logger.error(f"Fuente de datos no vu00e1lida: {source}")
-            return pd.DataFrame()
-    except Exception as e:
-        logger.error(f"Error al cargar datos de precios: {e}")
-        return pd.DataFrame()
 
+def price_data_path() -> str:
+    """Devuelve el archivo de precios que se envia: las predicciones o, si no existen, los datos procesados."""
+    file_path = os.path.join(config.DATA_DIR, "predictions.csv")
+    if not os.path.exists(file_path):
+        file_path = config.PROCESSED_DATA_PATH
+    return file_path
 
-def filter_recent_prices(df: pd.DataFrame, hours: int = 24) -> pd.DataFrame:
-    """Filtra los precios mu00e1s recientes dentro de un periodo de tiempo.
+
+def load_price_data(source: str = 'file', hours: int = 24) -> Optional[PriceBatch]:
+    """Carga los precios de las u00faltimas `hours` horas para enviar a la blockchain.
+    
+    La validacion y la conversion a timestamp en ms y precio en centavos se hacen
+    por columnas (ver `PriceBatch`). Con la fuente 'db' solo se lee el rango de
+    tiempo necesario del PriceStore indexado.
     
     Args:
-        df: DataFrame con datos de precios.
-        hours: Nu00famero de horas para filtrar (por defecto 24).
+        source: Fuente de los datos ('file' o 'db').
+        hours: Nu00famero de horas hacia atras (0 para no filtrar).
         
     Returns:
-        pd.DataFrame: DataFrame filtrado con precios recientes.
+        Optional[PriceBatch]: Precios del periodo, o None si no se pudieron cargar.
     """
     try:
-        # Asegurar que hay una columna de timestamp
-        if 'timestamp' not in df.columns:
-            logger.error("No se puede filtrar por tiempo, falta la columna 'timestamp'")
-            return df
-            
-        # Convertir timestamp a datetime si no lo es ya
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
-        # Obtener la fecha y hora actual
-        now = datetime.now()
+        if source == 'db':
+            batch = load_store_batch(hours)
+            logger.info(f"Cargados {len(batch)} precios de las u00faltimas {hours} horas desde el PriceStore")
+            return batch
+        if source != 'file':
+            logger.error(f"Fuente de datos no vu00e1lida: {source}")
+            return None
         
-        # Filtrar registros de las u00faltimas 'hours' horas
-        recent_df = df[df['timestamp'] > now - pd.Timedelta(hours=hours)]
+        # Cargar desde el archivo de predicciones (o de los datos procesados), solo las columnas necesarias
+        file_path = price_data_path()
+        logger.info(f"Cargando datos de precios desde {file_path}")
+        df = pd.read_csv(file_path, usecols=lambda column: column in PRICE_COLUMNS)
+        if 'price' not in df.columns:
+            logger.error("Falta la columna price en los datos")
+            return None
+        # Sin id se usa blockHeight, y sin timestamp la fecha
+        if 'id' not in df.columns and 'blockHeight' in df.columns:
+            logger.info("Usando blockHeight como id")
+            df['id'] = df['blockHeight']
+        if 'timestamp' not in df.columns and 'date' in df.columns:
+            df['timestamp'] = df['date']
+        if 'id' not in df.columns or 'timestamp' not in df.columns:
+            logger.error("Faltan las columnas id o timestamp en los datos")
+            return None
         
-        logger.info(f"Filtrados {len(recent_df)} registros de las u00faltimas {hours} horas")
-        return recent_df
+        batch = PriceBatch.from_frame(df)
+        if hours > 0:
+            start_ms = int(time.time() * 1000) - hours * HOUR_MS
+            batch = batch.select(batch.timestamps_ms > start_ms)
+            logger.info(f"Filtrados {len(batch)} registros de las u00faltimas {hours} horas")
+        return batch
     except Exception as e:
-        logger.error(f"Error al filtrar precios recientes: {e}")
-        return df
+        logger.error(f"Error al cargar datos de precios: {e}")
+        return None
 
 
-def run_oracle(data_source: str = 'file', time_filter: int = 24) -> None:
+def run_oracle(data_source: str = 'file', time_filter: int = 24, mode: str = config.ORACLE_SUBMIT_MODE,
+               engine: str = config.ORACLE_ENGINE, oracle: Optional[PriceOracle] = None,
+               async_engine: Optional['AsyncOracleEngine'] = None,
+               policy: str = config.ORACLE_PUBLISH_POLICY,
+               signing_workers: int = config.ORACLE_SIGNING_WORKERS) -> Optional[Dict[str, bool]]:
     """Ejecuta el proceso de enviu00f3 de precios a la blockchain.
     
     Args:
         data_source: Fuente de los datos ('file' o 'db').
         time_filter: Filtrar precios de las u00faltimas N horas.
+        mode: Modo de envio ('sequential', 'pipelined' o 'batched') del motor sincrono.
+        engine: Motor de envio ('sync' o 'async').
+        oracle: Oru00e1culo ya conectado (modo daemon); si no se indica se abre una conexiu00f3n para esta ejecucion.
+        async_engine: Motor async ya creado (modo daemon), usado cuando engine es 'async'.
+        policy: Politica de publicacion ('all' o 'deviation', ver price_oracle/policy.py).
+        signing_workers: Procesos que firman las extrinsecas en modo pipelined (0 firma en este proceso).
+        
+    Returns:
+        Optional[Dict[str, bool]]: Resultados {id: u00e9xito} (vacio si no habia nada que enviar),
+        o None si no se pudieron cargar los datos o conectar con la blockchain.
     """
     logger.info("Iniciando proceso de enviu00f3 de precios a la blockchain")
     
-    # Cargar datos de precios
-    price_data = load_price_data(data_source)
-    if price_data.empty:
+    # Cargar los precios recientes, ya validados y convertidos
+    recent_prices = load_price_data(data_source, time_filter)
+    if recent_prices is None:
         logger.error("No se pudieron cargar datos de precios")
-        return
-        
-    # Filtrar precios recientes
-    recent_prices = filter_recent_prices(price_data, time_filter) if time_filter > 0 else price_data
-    if recent_prices.empty:
+        return None
+    if len(recent_prices) == 0:
         logger.warning("No hay precios recientes para enviar")
-        return
+        return {}
         
-    # Inicializar el oru00e1culo
-    oracle = PriceOracle()
-    if not oracle.is_connected:
-        logger.error("No se pudo conectar con la blockchain")
-        return
+    # Descartar los precios ya confirmados on-chain (las ventanas de cada ejecucion se solapan)
+    ledger = SubmissionLedger()
+    keys = recent_prices.keys()
+    unconfirmed = iter(ledger.unconfirmed([key for key in keys if key is not None]))
+    # Las filas invalidas se envian igualmente para que el oru00e1culo las reporte como fallidas
+    to_send = [key is None or next(unconfirmed) for key in keys]
+    logger.info(f"{len(to_send) - sum(to_send)} precios ya confirmados segun el ledger")
+    
+    # Publicar solo los movimientos significativos y los heartbeats respecto al ultimo precio publicado
+    if policy == 'deviation':
+        candidates = [index for index, key in enumerate(keys) if key is not None and to_send[index]]
+        selected = select_for_publication([keys[index] for index in candidates], ledger.last_confirmed())
+        for index, publish in zip(candidates, selected):
+            to_send[index] = publish
+        logger.info(f"Politica de desviacion: {sum(selected)} de {len(candidates)} precios superan "
+                    f"{config.ORACLE_DEVIATION_BPS} pb o el heartbeat de {config.ORACLE_HEARTBEAT_SECONDS}s")
+    
+    new_prices = recent_prices.select(np.array(to_send, dtype=bool))
+    if len(new_prices) == 0:
+        logger.info("No hay precios nuevos para enviar")
+        return {}
+    submitted_keys = [key for key, send in zip(keys, to_send) if send and key is not None]
         
-    # Enviar precios a la blockchain
-    logger.info(f"Enviando {len(recent_prices)} precios a la blockchain")
-    results = oracle.submit_prices_batch(recent_prices)
+    # Inicializar el oru00e1culo
+    one_shot = oracle is None
+    if one_shot:
+        oracle = PriceOracle()
+    try:
+        if not oracle.is_connected:
+            logger.error("No se pudo conectar con la blockchain")
+            return None
+            
+        # Enviar precios a la blockchain
+        ledger.mark_pending(submitted_keys)
+        if engine == 'async':
+            logger.info(f"Enviando {len(new_prices)} precios a la blockchain (motor async)")
+            if async_engine is None:
+                from price_oracle.async_engine import AsyncOracleEngine
+                engine_instance = AsyncOracleEngine(oracle)
+                try:
+                    results = engine_instance.run(new_prices)
+                finally:
+                    engine_instance.close()
+            else:
+                engine_instance = async_engine
+                results = engine_instance.run(new_prices)
+            block_hashes = engine_instance.block_hashes
+        else:
+            logger.info(f"Enviando {len(new_prices)} precios a la blockchain (modo {mode})")
+            results = oracle.submit_prices_batch(new_prices, mode=mode, signing_workers=signing_workers)
+            block_hashes = oracle.block_hashes
     
-    # Analizar resultados
-    success_count = sum(1 for success in results.values() if success)
-    logger.info(f"Resultados: {success_count} transacciones exitosas de {len(results)}")
+        # Analizar resultados
+        success_count = sum(1 for success in results.values() if success)
+        logger.info(f"Resultados: {success_count} transacciones exitosas de {len(results)}")
     
-    # Guardar registro de resultados
-    results_df = pd.DataFrame([
-        {'id': id, 'success': success, 'timestamp': datetime.now().isoformat()}
-        for id, success in results.items()
-    ])
-    results_path = os.path.join(config.DATA_DIR, "oracle_results.csv")
-    results_df.to_csv(results_path, mode='a', header=not os.path.exists(results_path), index=False)
-    logger.info(f"Resultados guardados en {results_path}")
+        # Guardar el resultado de cada precio en el ledger
+        ledger.record_results(submitted_keys, results, block_hashes)
+        logger.info(f"Ledger en {ledger.db_path}: {ledger.summary()}")
+        return results
+    finally:
+        # Una conexiu00f3n abierta para esta ejecucion se cierra aunque el envio falle
+        if one_shot:
+            oracle.close()
 
 
 def main():
@@ -171,12 +213,29 @@ def main():
                         help='Fuente de datos de precios (archivo o base de datos)')
     parser.add_argument('--hours', type=int, default=24,
                         help='Filtrar precios de las u00faltimas N horas (0 para no filtrar)')
+    parser.add_argument('--mode', choices=['sequential', 'pipelined', 'batched'], default=config.ORACLE_SUBMIT_MODE,
+                        help='Esperar la inclusion de cada precio, enviarlos seguidos con nonces locales o agruparlos en Utility.batch_all')
+    
+    parser.add_argument('--engine', choices=['sync', 'async'], default=config.ORACLE_ENGINE,
+                        help='Motor de envio: PriceOracle sincrono o motor asyncio con envios en vuelo limitados')
+    parser.add_argument('--policy', choices=['all', 'deviation'], default=config.ORACLE_PUBLISH_POLICY,
+                        help='Publicar todos los precios nuevos o solo los que se desvian del ultimo publicado (y los heartbeats)')
+    parser.add_argument('--sign-workers', type=int, default=config.ORACLE_SIGNING_WORKERS,
+                        help='Procesos que firman las extrinsecas en modo pipelined, para backfills grandes (0 firma en el proceso principal)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Mantener la conexiu00f3n abierta y enviar los precios en cuanto cambien los datos, en lugar de ejecutarse una vez (cron)')
     
     # Analizar argumentos
     args = parser.parse_args()
     
     # Ejecutar el oru00e1culo
-    run_oracle(args.source, args.hours)
+    if args.daemon:
+        from price_oracle.daemon import OracleDaemon
+        OracleDaemon(args.source, args.hours, args.mode, args.engine, policy=args.policy,
+                     signing_workers=args.sign_workers).run()
+    else:
+        run_oracle(args.source, args.hours, args.mode, args.engine, policy=args.policy,
+                   signing_workers=args.sign_workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+"""Firma de extrinsecas en paralelo para envios grandes.
+
+Crear una extrinseca firmada (codificar la llamada y el payload en SCALE y
+firmarlo con sr25519) cuesta CPU en Python y, en un backfill de varios dias de
+precios, limita el modo pipelined a un nucleo. `ParallelSigner` reparte ese
+trabajo en un pool de procesos: cada proceso abre su propia conexiu00f3n (la
+metadata se descarga una vez por proceso), recibe los parametros de la llamada
+y un nonce asignado de antemano, y devuelve la extrinseca codificada, que el
+proceso principal envia tal cual con author_submitExtrinsic.
+"""
+
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from price_oracle.oracle import SignedExtrinsic, create_substrate
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Conexiu00f3n y firmante de cada proceso del pool, creados por _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(connection_factory: Callable[[], Any], signer: Any) -> None:
+    """Abre la conexiu00f3n del proceso de firma."""
+    _worker['substrate'] = connection_factory()
+    _worker['signer'] = signer
+
+
+def _sign_call(task: Tuple[Dict[str, Any], int]) -> SignedExtrinsic:
+    """Crea y firma una extrinseca submitPrice con el nonce indicado (se ejecuta en el pool)."""
+    call_params, nonce = task
+    try:
+        substrate = _worker['substrate']
+        call = substrate.compose_call(call_module='PriceFeed', call_function='submitPrice', call_params=call_params)
+        extrinsic = substrate.create_signed_extrinsic(call=call, keypair=_worker['signer'], nonce=nonce)
+        return SignedExtrinsic(str(extrinsic.data), f"0x{extrinsic.extrinsic_hash.hex()}", nonce, call_params)
+    except Exception as e:
+        return SignedExtrinsic(None, None, nonce, call_params, str(e))
+
+
+class ParallelSigner:
+    """Firma extrinsecas con nonces asignados de antemano en un pool de procesos."""
+
+    def __init__(self, signer: Any, workers: Optional[int] = None,
+                 connection_factory: Callable[[], Any] = create_substrate, chunk_size: int = 16):
+        """Crea el firmante.
+
+        Args:
+            signer: Keypair con el que firmar; se copia a cada proceso.
+            workers: Procesos del pool (por defecto uno por nucleo).
+            connection_factory: Funcion que abre la conexiu00f3n de cada proceso.
+            chunk_size: Extrinsecas que se envian juntas a un proceso.
+        """
+        self.signer = signer
+        self.workers = workers or os.cpu_count() or 1
+        self.connection_factory = connection_factory
+        self.chunk_size = chunk_size
+
+    def sign(self, tasks: Sequence[Tuple[List[str], Dict[str, Any], int]]) -> Iterator[Tuple[List[str], SignedExtrinsic]]:
+        """Firma las llamadas y las devuelve en el mismo orden, a medida que estan listas.
+
+        Args:
+            tasks: (ids de los registros, parametros de submitPrice, nonce) de cada extrinseca.
+
+        Yields:
+            Tuple[List[str], SignedExtrinsic]: Ids y extrinseca firmada; si la firma fallo, `data` es None.
+        """
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                       initargs=(self.connection_factory, self.signer))
+        try:
+            signed = executor.map(_sign_call, [(params, nonce) for _, params, nonce in tasks],
+                                  chunksize=self.chunk_size)
+            for (record_ids, _, _), extrinsic in zip(tasks, signed):
+                yield record_ids, extrinsic
+        finally:
+            # Si el envio se interrumpe no hace falta terminar de firmar el resto
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -9,7 +9,6 @@ import os
 import sys
 import logging
 import argparse
-import pandas as pd
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -43,6 +42,7 @@ def test_connection():
 def create_test_data():
     """Crea un conjunto de datos de prueba para enviar a la blockchain."""
     logger.info("Creando datos de prueba...")
+    import pandas as pd
     
     # Crear DataFrame con datos de prueba
     test_data = [
@@ -0,0 +1,136 @@
+"""Cold-start benchmark for the Cafu00e9Index AI entry points.
+
+Each entry point is imported in a fresh interpreter with `python -X importtime`
+and its cumulative import time is compared with `config.STARTUP_BUDGET_MS`.
+Cron-driven oracle runs and every new API replica pay this cost on start, so
+heavy modules (pandas, scikit-learn, requests, substrate-interface) should be
+imported inside the functions that use them.
+
+Usage:
+    python startup_benchmark.py [--repeat N] [--top N]
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+from typing import Dict, Any, List, Optional, Tuple
+
+import config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """Parse the stderr of `python -X importtime`.
+
+    Args:
+        output: Text written by the interpreter to stderr.
+
+    Returns:
+        List[Tuple[str, int, int]]: (module, self microseconds, cumulative microseconds) per
+            import in the order printed, with the module name indented two spaces per level.
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        imports.append((module[1:].rstrip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def measure_import(module: str, top: int = 5) -> Optional[Dict[str, Any]]:
+    """Import a module in a fresh interpreter and measure it.
+
+    Args:
+        module: Dotted module name, e.g. 'prediction_service.app'.
+        top: Number of heaviest top-level dependencies to report.
+
+    Returns:
+        Optional[Dict[str, Any]]: Total milliseconds and heaviest dependencies, or None if
+            the import fails.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        logger.error(f"Could not import {module}: {error}")
+        return None
+
+    # Nested imports are printed before the module that triggered them
+    imports = parse_importtime(result.stderr)
+    position = next((i for i, (name, _, _) in enumerate(imports) if name == module), None)
+    if position is None:
+        logger.error(f"No import time reported for {module}")
+        return None
+    total_us = imports[position][2]
+    children = []
+    for name, _, cumulative in reversed(imports[:position]):
+        if not name.startswith(" "):
+            break
+        if not name.startswith("   "):
+            children.append((name.strip(), cumulative))
+    children.sort(key=lambda item: item[1], reverse=True)
+    return {
+        'total_ms': total_us / 1000,
+        'heaviest': [(name, cumulative / 1000) for name, cumulative in children[:top]],
+    }
+
+
+def benchmark_startup(repeat: int = 5, top: int = 5) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Measure every entry point in `config.STARTUP_BUDGET_MS`.
+
+    Args:
+        repeat: Fresh interpreters per entry point; the fastest run is kept, as the others
+            include disk cache and bytecode compilation noise.
+        top: Number of heaviest dependencies to report per entry point.
+
+    Returns:
+        Dict[str, Optional[Dict[str, Any]]]: Measurement and budget per entry point, or None
+            if it could not be imported.
+    """
+    results = {}
+    for module, budget_ms in config.STARTUP_BUDGET_MS.items():
+        runs = [measure_import(module, top) for _ in range(repeat)]
+        runs = [run for run in runs if run is not None]
+        if not runs:
+            results[module] = None
+            continue
+        best = min(runs, key=lambda run: run['total_ms'])
+        best['budget_ms'] = budget_ms
+        best['within_budget'] = best['total_ms'] <= budget_ms
+        results[module] = best
+    return results
+
+
+def main() -> int:
+    """Run the benchmark and return a non-zero exit code if a budget is exceeded."""
+    parser = argparse.ArgumentParser(description="Measure cold import time of each entry point")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per entry point")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest dependencies to show")
+    args = parser.parse_args()
+
+    over_budget = False
+    for module, result in benchmark_startup(args.repeat, args.top).items():
+        if result is None:
+            logger.warning(f"{module}: skipped (import failed)")
+            continue
+        status = "OK" if result['within_budget'] else "OVER BUDGET"
+        logger.info(f"{module}: {result['total_ms']:.1f} ms (budget {result['budget_ms']} ms) {status}")
+        for name, ms in result['heaviest']:
+            logger.info(f"    {name}: {ms:.1f} ms")
+        over_budget = over_budget or not result['within_budget']
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Parity tests between the training features and the serving extractor."""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from data_processing.features import extract_latest_features, feature_columns, parse_timestamps
+from data_processing.preprocessor import clean_data, create_features, load_data
+
+WINDOW_SIZE = config.FEATURE_WINDOW_SIZE
+START = datetime(2024, 1, 1, 5, 0)
+
+
+def assert_last_row_parity(df: pd.DataFrame, raw_timestamps, window_size: int = WINDOW_SIZE) -> None:
+    """Check extract_latest_features against the last row of create_features.
+
+    Args:
+        df: Frame with naive 'timestamp', 'price' and 'blockHeight' columns, as used in training.
+        raw_timestamps: The same timestamps in the form the serving path receives them.
+        window_size: Number of lag features.
+    """
+    feature_df = create_features(df, window_size)
+    assert not feature_df.empty
+
+    # create_features drops the newest record (no target), so serve the history up to its last row
+    end = df.index.get_loc(feature_df.index[-1]) + 1
+    timestamps = parse_timestamps(list(raw_timestamps)[:end])
+    served = extract_latest_features(
+        timestamps, df['price'].to_numpy(dtype=float)[:end], df['blockHeight'].to_numpy(dtype=float)[:end],
+        window_size
+    )
+
+    assert served is not None
+    expected = feature_df[feature_columns(window_size)].to_numpy(dtype=float)[-1]
+    np.testing.assert_allclose(served[0], expected)
+
+
+def price_frame(periods: int) -> pd.DataFrame:
+    """Build a daily price series with naive timestamps starting at START."""
+    timestamps = [START + timedelta(days=day) for day in range(periods)]
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(timestamps),
+        'blockHeight': np.arange(periods) * 20 + 1000000,
+        'price': 3.5 + np.sin(np.arange(periods)) / 10,
+    })
+
+
+def test_parity_on_repo_csv():
+    df = clean_data(load_data(config.RAW_DATA_PATH))
+    assert_last_row_parity(df, df['timestamp'].astype(str).tolist())
+
+
+def test_parity_with_mixed_epoch_and_iso_timestamps():
+    df = price_frame(20)
+    raw = []
+    for i, timestamp in enumerate(df['timestamp']):
+        epoch = int(timestamp.replace(tzinfo=timezone.utc).timestamp())
+        raw.append([timestamp.isoformat(), epoch, epoch * 1000, str(epoch)][i % 4])
+    assert_last_row_parity(df, raw)
+
+
+@pytest.mark.parametrize('suffix', ['Z', '+02:00', '-05:00'])
+def test_parity_with_timezone_suffixes(suffix):
+    df = price_frame(20)
+    raw = [timestamp.isoformat() + suffix for timestamp in df['timestamp']]
+    assert_last_row_parity(df, raw)
+
+
+def test_timezone_suffixes_are_dropped_consistently():
+    # The vectorized and per-element paths must agree on the wall time
+    iso_only = parse_timestamps(['2024-01-01T05:00:00+02:00', '2024-01-01T06:00:00+02:00'])
+    mixed = parse_timestamps(['2024-01-01T05:00:00+02:00', 1700000000])
+
+    assert iso_only[0] == np.datetime64('2024-01-01T05:00:00')
+    assert mixed[0] == iso_only[0]
+
+
+def test_short_history():
+    df = price_frame(WINDOW_SIZE + 2)
+    assert_last_row_parity(df, [timestamp.isoformat() for timestamp in df['timestamp']])
+
+    short = price_frame(WINDOW_SIZE)
+    timestamps = parse_timestamps([timestamp.isoformat() for timestamp in short['timestamp']])
+    assert create_features(short, WINDOW_SIZE).empty
+    assert extract_latest_features(timestamps, short['price'].to_numpy(), short['blockHeight'].to_numpy()) is None
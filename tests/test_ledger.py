@@ -0,0 +1,72 @@
+"""Submission ledger: what gets sent again on the next oracle run."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from price_oracle.ledger import CONFIRMED, FAILED, LOOKUP_CHUNK, PENDING, SubmissionLedger
+
+KEYS = [('price-1', 1_700_000_000_000, 350), ('price-2', 1_700_000_900_000, 352), ('price-3', 1_700_001_800_000, 349)]
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return SubmissionLedger(str(tmp_path / 'ledger.db'))
+
+
+def submit(ledger: SubmissionLedger, keys, results) -> list:
+    """One oracle run: filter, mark pending and record the results."""
+    to_send = [key for key, send in zip(keys, ledger.unconfirmed(keys)) if send]
+    ledger.mark_pending(to_send)
+    ledger.record_results(to_send, results)
+    return to_send
+
+
+def test_confirmed_prices_are_not_resent(ledger):
+    assert submit(ledger, KEYS, {'price-1': True, 'price-2': True, 'price-3': True}) == KEYS
+
+    assert ledger.unconfirmed(KEYS) == [False, False, False]
+    assert submit(ledger, KEYS, {}) == []
+
+
+def test_failed_and_pending_prices_are_retried(ledger):
+    # price-3 has no result, e.g. the run stopped before its inclusion was seen
+    submit(ledger, KEYS, {'price-1': True, 'price-2': False})
+    assert ledger.summary() == {CONFIRMED: 1, FAILED: 1, PENDING: 1}
+
+    assert submit(ledger, KEYS, {'price-2': True, 'price-3': True}) == KEYS[1:]
+    assert ledger.summary() == {CONFIRMED: 3}
+    assert ledger.unconfirmed(KEYS) == [False, False, False]
+
+
+def test_changed_price_is_sent_again(ledger):
+    submit(ledger, KEYS, {'price-1': True, 'price-2': True, 'price-3': True})
+
+    corrected = ('price-2', KEYS[1][1], 353)
+    assert ledger.unconfirmed([KEYS[1], corrected]) == [False, True]
+
+
+def test_results_never_downgrade_a_confirmed_price(ledger):
+    submit(ledger, KEYS[:1], {'price-1': True})
+
+    ledger.mark_pending(KEYS[:1])
+    ledger.record_results(KEYS[:1], {'price-1': False})
+
+    assert ledger.summary() == {CONFIRMED: 1}
+
+
+def test_last_confirmed_is_the_newest_confirmed_price(ledger):
+    assert ledger.last_confirmed() is None
+
+    submit(ledger, KEYS, {'price-1': True, 'price-2': True, 'price-3': False})
+
+    assert ledger.last_confirmed() == (KEYS[1][1], KEYS[1][2])
+
+
+def test_lookup_spans_several_chunks(ledger):
+    keys = [(f'price-{i}', 1_700_000_000_000 + i * 900_000, 350) for i in range(LOOKUP_CHUNK * 2 + 10)]
+    submit(ledger, keys, {key[0]: i % 2 == 0 for i, key in enumerate(keys)})
+
+    assert ledger.unconfirmed(keys) == [i % 2 == 1 for i in range(len(keys))]
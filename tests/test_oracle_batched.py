@@ -0,0 +1,50 @@
+"""Batched submission against a LocalNode with failing calls."""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('substrateinterface')
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from price_oracle.benchmark import make_price_records
+from price_oracle.local_node import LocalKeypair, LocalNode
+from price_oracle.oracle import PriceOracle
+from price_oracle.price_batch import PriceBatch
+
+BLOCK_TIME = 0.05
+
+
+@pytest.fixture
+def node():
+    node = LocalNode(block_time=BLOCK_TIME, fail_ids={'bench-7', 'bench-31'})
+    yield node
+    node.stop()
+
+
+def submit_batched(node: LocalNode, count: int, atomic: bool) -> dict:
+    oracle = PriceOracle(substrate=node, signer=LocalKeypair(), connection_factory=lambda: node)
+    records = PriceBatch.from_frame(make_price_records(count))
+    return oracle.submit_prices_batched(records, atomic=atomic, poll_interval=BLOCK_TIME / 2)
+
+
+@pytest.mark.parametrize('atomic', [True, False])
+def test_failing_call_is_isolated(node, atomic):
+    results = submit_batched(node, 40, atomic)
+
+    assert len(results) == 40
+    assert {record_id for record_id, success in results.items() if not success} == {'bench-7', 'bench-31'}
+    assert set(node.prices) == set(results) - {'bench-7', 'bench-31'}
+
+
+def test_random_failures_do_not_block_the_batch():
+    node = LocalNode(block_time=BLOCK_TIME, failure_rate=0.1, seed=1)
+    try:
+        results = submit_batched(node, 100, atomic=True)
+    finally:
+        node.stop()
+
+    published = {record_id for record_id, success in results.items() if success}
+    assert len(published) >= 80
+    assert published == set(node.prices)
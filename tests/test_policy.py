@@ -0,0 +1,52 @@
+"""Deviation and heartbeat publication policy."""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from price_oracle.policy import deviates, select_for_publication
+
+HOUR_MS = 3600 * 1000
+START_MS = 1_700_000_000_000
+LAST = (START_MS, 400)  # 50 bps of 4.00 USD is 2 cents
+
+
+def select(*prices, last=LAST):
+    """Select from (ms after START_MS, price in cents) pairs."""
+    keys = [(f'price-{i}', START_MS + offset, cents) for i, (offset, cents) in enumerate(prices)]
+    return select_for_publication(keys, last, deviation_bps=50, heartbeat_seconds=3600)
+
+
+def test_deviation_threshold_is_inclusive():
+    assert deviates(402, 400, 50)
+    assert deviates(398, 400, 50)
+    assert not deviates(401, 400, 50)
+    assert not deviates(399, 400, 50)
+
+
+def test_deviation_boundary():
+    assert select((60_000, 402)) == [True]
+    assert select((60_000, 398)) == [True]
+    assert select((60_000, 401)) == [False]
+
+
+def test_heartbeat_boundary():
+    assert select((HOUR_MS, 400)) == [True]
+    assert select((HOUR_MS - 1, 400)) == [False]
+
+
+def test_selected_price_becomes_the_reference():
+    # Once 402 is published, 404 is compared with 402 (below 50 bps) rather than with 400
+    assert select((60_000, 402), (120_000, 404), (180_000, 405)) == [True, False, True]
+
+
+def test_prices_are_evaluated_in_timestamp_order():
+    assert select((120_000, 403), (60_000, 402)) == [False, True]
+
+
+def test_prices_not_newer_than_the_last_published_are_skipped():
+    assert select((0, 500), (-60_000, 500)) == [False, False]
+
+
+def test_first_price_is_published_without_history():
+    assert select((0, 400), (60_000, 400), last=None) == [True, False]
@@ -0,0 +1,67 @@
+"""Timestamp conversion of the oracle input, which decides the values published on-chain."""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_indexing.price_store import PriceStore
+from price_oracle.price_batch import PriceBatch, load_store_batch, timestamps_to_ms
+
+TIMESTAMPS = [
+    '2025-03-09T01:30:00',        # before the US spring-forward gap
+    '2025-03-09T03:30:00',        # after it
+    '2025-11-02T01:30:00',        # repeated hour at the end of DST
+    '2025-07-01T12:00:00',
+    '2025-07-01T12:00:00Z',
+    '2025-07-01T12:00:00+02:00',
+    '2025-01-26',
+]
+
+
+@pytest.fixture(params=['UTC', 'America/New_York', 'Asia/Kolkata'])
+def local_timezone(request, monkeypatch):
+    if not hasattr(time, 'tzset'):
+        pytest.skip('time.tzset is not available on this platform')
+    monkeypatch.setenv('TZ', request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+def published_ms(timestamp: str) -> int:
+    """Per-row conversion the oracle has always published: naive timestamps are local time."""
+    return int(datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp() * 1000)
+
+
+def test_timestamps_match_the_published_values(local_timezone):
+    timestamps_ms, valid = timestamps_to_ms(TIMESTAMPS + ['not a date'])
+
+    assert timestamps_ms.tolist() == [published_ms(timestamp) for timestamp in TIMESTAMPS] + [0]
+    assert valid.tolist() == [True] * len(TIMESTAMPS) + [False]
+
+
+def test_store_batch_uses_local_wall_time(local_timezone, tmp_path):
+    db_path = str(tmp_path / 'prices.db')
+    now = datetime.now().replace(microsecond=0)
+    recent, old = (now - timedelta(hours=2)).isoformat(), (now - timedelta(hours=25)).isoformat()
+    PriceStore(db_path).upsert([
+        {'id': 'recent', 'timestamp': recent, 'price': 3.5, 'blockHeight': 1},
+        {'id': 'old', 'timestamp': old, 'price': 3.6, 'blockHeight': 2},
+    ])
+
+    batch = load_store_batch(24, db_path)
+
+    assert batch.ids.tolist() == ['recent']
+    assert batch.timestamps_ms.tolist() == [published_ms(recent)]
+
+
+def test_invalid_rows_are_flagged():
+    batch = PriceBatch.from_arrays(['a', '', 'c', 'd'], [1, 2, 0, 4], [3.5, 3.5, 3.5, 0.0])
+
+    assert batch.valid.tolist() == [True, False, False, False]
+    assert batch.keys() == [('a', 1, 350), None, None, None]
@@ -0,0 +1,117 @@
+"""Request deadlines and circuit breaker state transitions."""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from prediction_service.resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded
+)
+
+RESET_TIMEOUT = 0.1
+
+
+def fail():
+    raise ConnectionError('upstream down')
+
+
+@pytest.fixture
+def breaker():
+    return CircuitBreaker('test', failure_threshold=3, reset_timeout=RESET_TIMEOUT)
+
+
+def open_circuit(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+
+
+def test_deadline_caps_each_step():
+    deadline = Deadline(10.0)
+
+    assert deadline.timeout(2.0) == 2.0
+    assert 9.0 < deadline.timeout() <= 10.0
+
+
+def test_spent_deadline_raises():
+    deadline = Deadline(0.05)
+    time.sleep(0.06)
+
+    assert deadline.remaining() == 0.0
+    with pytest.raises(DeadlineExceeded):
+        deadline.timeout(1.0)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    for _ in range(breaker.failure_threshold - 1):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.state == CLOSED
+
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, 1)
+    assert calls == []
+
+
+def test_success_resets_the_failure_count(breaker):
+    for _ in range(breaker.failure_threshold - 1):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.call(lambda: 'ok') == 'ok'
+
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == CLOSED
+
+
+def test_successful_trial_closes_the_circuit(breaker):
+    open_circuit(breaker)
+    time.sleep(RESET_TIMEOUT * 1.5)
+
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == CLOSED
+
+
+def test_failed_trial_reopens_the_circuit(breaker):
+    open_circuit(breaker)
+    time.sleep(RESET_TIMEOUT * 1.5)
+
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 'ok')
+
+
+def test_half_open_allows_a_single_concurrent_trial(breaker):
+    open_circuit(breaker)
+    time.sleep(RESET_TIMEOUT * 1.5)
+    started, release = threading.Event(), threading.Event()
+
+    def trial():
+        started.set()
+        release.wait(5)
+        return 'ok'
+
+    with ThreadPoolExecutor(5) as pool:
+        first = pool.submit(breaker.call, trial)
+        assert started.wait(5)
+        assert breaker.state == HALF_OPEN
+        others = [pool.submit(breaker.call, lambda: 'ok') for _ in range(4)]
+        for future in others:
+            with pytest.raises(CircuitOpenError):
+                future.result(5)
+        release.set()
+        assert first.result(5) == 'ok'
+
+    assert breaker.state == CLOSED
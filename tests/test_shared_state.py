@@ -0,0 +1,88 @@
+"""Shared model arrays against the scikit-learn models they are exported from."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from data_processing.features import feature_columns
+from prediction_service import shared_state
+from prediction_service.shared_state import SharedState, export_model_arrays, publish_shared_state, shared_model
+
+N_FEATURES = len(feature_columns())
+
+
+def training_data(rows: int = 300):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(rows, N_FEATURES))
+    y = X[:, 1] * 2 + np.sin(X[:, 3]) + rng.normal(scale=0.1, size=rows)
+    return X, y
+
+
+@pytest.mark.parametrize('params', [
+    {'n_estimators': 10, 'max_depth': 4},
+    {'n_estimators': 5, 'max_depth': None, 'min_samples_leaf': 3},
+])
+def test_shared_forest_matches_sklearn(params):
+    X, y = training_data()
+    model = RandomForestRegressor(random_state=0, **params).fit(X, y)
+
+    exported = export_model_arrays(model)
+    X_test = np.random.default_rng(1).normal(size=(200, N_FEATURES))
+
+    assert exported['kind'] == 'forest'
+    np.testing.assert_allclose(shared_model(exported).predict(X_test), model.predict(X_test))
+
+
+def test_shared_linear_matches_sklearn():
+    X, y = training_data()
+    model = LinearRegression().fit(X, y)
+
+    np.testing.assert_allclose(shared_model(export_model_arrays(model)).predict(X), model.predict(X))
+
+
+@pytest.fixture
+def published_model(tmp_path, monkeypatch):
+    """Serve a small forest and price window to publish_shared_state."""
+    X, y = training_data()
+    model = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0).fit(X, y)
+    prices = [
+        {'timestamp': f'2025-01-{day:02d}T00:00:00', 'price': 3.5 + day / 100, 'blockHeight': 1000000 + day}
+        for day in range(1, config.FEATURE_WINDOW_SIZE + 10)
+    ]
+    monkeypatch.setattr(shared_state, 'load_model', lambda *args: {'model': model, 'model_name': 'test'})
+    monkeypatch.setattr(shared_state, 'load_latest_prices', lambda *args: prices)
+    model_path = tmp_path / 'model.pkl'
+    model_path.write_bytes(b'')
+    os.utime(model_path, (0, 0))
+    return tmp_path / 'shared', str(model_path)
+
+
+def test_publish_and_map(published_model):
+    state_dir, model_path = published_model
+
+    assert publish_shared_state(str(state_dir)) == 1
+    assert isinstance(SharedState(str(state_dir)).model_data(model_path)['model'], shared_state.SharedForest)
+
+
+def test_failed_parity_falls_back_to_pickled_model(published_model, monkeypatch):
+    state_dir, model_path = published_model
+    assert publish_shared_state(str(state_dir)) == 1
+    state = SharedState(str(state_dir))
+    assert state.model_data(model_path) is not None
+
+    # An exporter that no longer matches scikit-learn must not reach the workers
+    export = shared_state.export_model_arrays
+    def broken_export(model):
+        exported = export(model)
+        exported['arrays']['threshold'] = exported['arrays']['threshold'] + 1.0
+        return exported
+    monkeypatch.setattr(shared_state, 'export_model_arrays', broken_export)
+
+    assert publish_shared_state(str(state_dir)) is None
+    assert state.model_data(model_path) is None
@@ -0,0 +1,50 @@
+"""Parallel signing with a connection factory that survives any start method."""
+
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pytest
+
+pytest.importorskip('substrateinterface')
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from price_oracle import signing
+from price_oracle.local_node import LocalKeypair, LocalNode, LocalNodeFactory
+
+CALLS = [{'id': f'price-{i}', 'timestamp': 1_700_000_000_000 + i, 'price': 350 + i} for i in range(6)]
+
+
+@pytest.fixture
+def node():
+    node = LocalNode(block_time=0.05)
+    yield node
+    node.stop()
+
+
+def test_factory_returns_the_shared_node_in_process(node):
+    factory = LocalNodeFactory(node)
+
+    assert factory() is node
+
+
+@pytest.mark.parametrize('start_method', ['fork', 'spawn'])
+def test_signing_processes_match_in_process_signing(node, monkeypatch, start_method):
+    if start_method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f'{start_method} is not available on this platform')
+    monkeypatch.setattr(signing, 'ProcessPoolExecutor',
+                        partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context(start_method)))
+    signer = signing.ParallelSigner(LocalKeypair(), workers=2, connection_factory=LocalNodeFactory(node))
+
+    signed = list(signer.sign([([params['id']], params, nonce) for nonce, params in enumerate(CALLS)]))
+
+    expected = [
+        node.create_signed_extrinsic(call=node.compose_call('PriceFeed', 'submitPrice', params),
+                                     keypair=LocalKeypair(), nonce=nonce).data
+        for nonce, params in enumerate(CALLS)
+    ]
+    assert [record_ids for record_ids, _ in signed] == [[params['id']] for params in CALLS]
+    assert [extrinsic.error for _, extrinsic in signed] == [None] * len(CALLS)
+    assert [extrinsic.data for _, extrinsic in signed] == expected
@@ -0,0 +1,115 @@
+"""Request coalescing under concurrent callers."""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from prediction_service.singleflight import SingleFlight
+
+CALLERS = 8
+
+
+def run_concurrently(flight: SingleFlight, fn, started: threading.Event, **kwargs):
+    """Start CALLERS identical calls while the first one is still running."""
+    with ThreadPoolExecutor(CALLERS) as pool:
+        leader = pool.submit(flight.do, 'key', fn, **kwargs)
+        assert started.wait(5)
+        followers = [pool.submit(flight.do, 'key', fn, **kwargs) for _ in range(CALLERS - 1)]
+        # Let every follower join the flight before it completes
+        time.sleep(0.1)
+        return leader, followers
+
+
+@pytest.mark.parametrize('wait_timeout', [None, 5.0])
+def test_concurrent_callers_share_one_call(wait_timeout):
+    flight = SingleFlight('test')
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'result'
+
+    with ThreadPoolExecutor(1) as releaser:
+        releaser.submit(lambda: (time.sleep(0.2), release.set()))
+        leader, followers = run_concurrently(flight, compute, started, wait_timeout=wait_timeout)
+
+    assert [future.result() for future in [leader] + followers] == ['result'] * CALLERS
+    assert len(calls) == 1
+
+
+def test_leader_failure_reaches_every_follower():
+    flight = SingleFlight('test')
+    started = threading.Event()
+
+    def compute():
+        started.set()
+        time.sleep(0.2)
+        raise ValueError('upstream failed')
+
+    leader, followers = run_concurrently(flight, compute, started)
+
+    for future in [leader] + followers:
+        with pytest.raises(ValueError, match='upstream failed'):
+            future.result()
+
+
+def test_next_call_after_completion_starts_fresh():
+    flight = SingleFlight('test')
+
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+
+
+def test_different_keys_run_independently():
+    flight = SingleFlight('test')
+    barrier = threading.Barrier(2, timeout=5)
+
+    def compute(value):
+        # Deadlocks unless both keys run at the same time
+        barrier.wait()
+        return value
+
+    with ThreadPoolExecutor(2) as pool:
+        futures = [pool.submit(flight.do, key, compute, key) for key in ('a', 'b')]
+        assert [future.result() for future in futures] == ['a', 'b']
+
+
+def test_wait_timeout_bounds_the_leader():
+    flight = SingleFlight('test')
+    release = threading.Event()
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        flight.do('key', lambda: release.wait(5) and 'late', wait_timeout=0.1)
+    assert time.monotonic() - start < 1.0
+
+    # The call keeps running on the worker thread; a caller joining it gets its result
+    release.set()
+    assert flight.do('key', lambda: 'new', wait_timeout=5) in ('late', 'new')
+    assert flight.do('key', lambda: 'new', wait_timeout=5) == 'new'
+
+
+def test_wait_timeout_bounds_followers():
+    flight = SingleFlight('test')
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        return 'result'
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, 'key', compute, wait_timeout=5)
+        assert started.wait(5)
+        with pytest.raises(TimeoutError):
+            flight.do('key', compute, wait_timeout=0.1)
+        release.set()
+        assert leader.result() == 'result'